@@ -0,0 +1,312 @@
+# benchmarks/etl_bench.py
+"""
+ETL benchmark: runs the stages of run_pipeline (src/etl/pipeline.py) on
+synthetic raw CSVs (benchmarks/synthetic_stats19.py) of increasing size and
+records, per stage and table, wall time, rows / second and peak memory.
+
+    python -m benchmarks.etl_bench                          # 10k, 30k, 100k collisions
+    python -m benchmarks.etl_bench --sizes 100k,1M,3M --plot etl_scaling.html
+    python -m benchmarks.etl_bench --compare abc1234        # vs an earlier commit's run
+
+Stages, in pipeline order: read_csv, clean_dataset, add_derived_features,
+filter_year_range and (collisions) format_sf per table, then
+enforce_foreign_keys, merge_datasets, write_feather and save_to_duckdb. For each pair of
+consecutive sizes the report shows the scaling exponent k in time ~ rows^k;
+k well above 1 is where the pipeline goes superlinear.
+
+Peak memory is the Python-heap peak above the stage's starting point, from
+tracemalloc (numpy / pandas buffers included, DuckDB's own allocations not).
+It is measured in a separate run of the stage on a copy of its input, so the
+timings don't carry tracemalloc's overhead. Those runs are several times
+slower than the timed ones; --no-memory skips them.
+
+Every run is appended, with the git commit and machine, to
+benchmarks/results/etl_history.jsonl (created on the first run and kept out
+of git, so comparisons stay on this machine). --compare REV prints rows / second
+against the latest recorded run of that commit (default: the latest run of
+any other commit).
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from benchmarks.synthetic_stats19 import PROJECT_ROOT, RAW_FILENAME, TABLES, generate_stats19, parse_count
+from src.etl.arrow_store import HAS_PYARROW, write_tables
+from src.etl.cleaning import clean_dataset
+from src.etl.geo import HAS_GEOPANDAS, format_sf
+from src.etl.loader import save_to_duckdb
+from src.etl.pipeline import _enforce_foreign_keys, _filter_year_range
+from src.etl.schema import load_schema
+from src.etl.transformation import add_derived_features, merge_datasets
+
+BENCH_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BENCH_DIR / ".cache"
+DEFAULT_HISTORY = BENCH_DIR / "results" / "etl_history.jsonl"
+DEFAULT_SIZES = "10k,30k,100k"
+SUPERLINEAR = 1.15  # scaling exponent above which a stage is flagged
+
+
+# ---------- inputs ----------
+def synthetic_inputs(collisions: int, seed: int, schema: pd.DataFrame) -> dict[str, Path]:
+    """Raw CSVs for `collisions` collisions, generated once under benchmarks/.cache/."""
+    out_dir = CACHE_DIR / f"stats19-{collisions}-{seed}"
+    paths = {table: out_dir / RAW_FILENAME.format(table=table) for table in TABLES}
+    if not all(p.exists() for p in paths.values()):
+        generate_stats19(out_dir, collisions, seed=seed, schema=schema)
+    return paths
+
+
+def _read_raw(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, low_memory=False)
+
+
+# ---------- measurement ----------
+def _fresh(args: tuple) -> tuple:
+    # stages modify their input frames in place; the memory run gets its own copies
+    return tuple(
+        a.copy() if isinstance(a, pd.DataFrame) else
+        {k: v.copy() for k, v in a.items()} if isinstance(a, dict) else a
+        for a in args
+    )
+
+
+def measure(fn, *args, memory: bool = True, mutates: bool = False):
+    """(result, seconds, peak_bytes or None) of fn(*args), with stage logging silenced."""
+    peak = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        if memory:
+            call_args = _fresh(args) if mutates else args
+            tracemalloc.start()
+            try:
+                fn(*call_args)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            del call_args
+        t0 = time.perf_counter()
+        result = fn(*args)
+        seconds = time.perf_counter() - t0
+    return result, seconds, peak
+
+
+def run_etl(paths: dict[str, Path], schema: pd.DataFrame, collisions: int, memory: bool = True) -> list[dict]:
+    """Run the pipeline's stages on `paths`, the way run_pipeline does; one record per stage."""
+    records = []
+
+    def stage(name, table, rows, fn, *args, mutates=False, skipped=False):
+        result, seconds, peak = measure(fn, *args, memory=memory, mutates=mutates)
+        if rows is None:
+            rows = len(result)
+        records.append({
+            "stage": name,
+            "table": table,
+            "collisions": collisions,
+            "rows": int(rows),
+            "seconds": seconds,
+            "rows_per_s": rows / seconds if seconds > 0 else None,
+            "peak_mb": peak / 2**20 if peak is not None else None,
+            "skipped": skipped,
+        })
+        return result
+
+    cleaned: dict[str, pd.DataFrame] = {"code_map": schema}
+    for table in ("casualty", "collision", "vehicle"):  # run_pipeline's file order
+        df = stage("read_csv", table, None, _read_raw, paths[table])
+        df = stage("clean_dataset", table, len(df), clean_dataset, df, table, schema, mutates=True)
+        df = stage("add_derived_features", table, len(df), add_derived_features, df, table, mutates=True)
+        df = stage("filter_year_range", table, len(df), _filter_year_range, df, table)
+        if table == "collision":
+            df = stage("format_sf", table, len(df), format_sf, df, skipped=not HAS_GEOPANDAS)
+        cleaned[table] = df
+
+    n_children = len(cleaned["vehicle"]) + len(cleaned["casualty"])
+    stage("enforce_foreign_keys", "all", n_children, _enforce_foreign_keys, cleaned, mutates=True)
+    cleaned["master"] = stage("merge_datasets", "all", len(cleaned["casualty"]), merge_datasets,
+                              cleaned["collision"], cleaned["vehicle"], cleaned["casualty"])
+
+    n_rows = sum(len(df) for df in cleaned.values())
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "road_safety.duckdb"
+
+        def save(dfs):
+            db_path.unlink(missing_ok=True)
+            save_to_duckdb(dfs, str(db_path))
+
+        if HAS_PYARROW:
+            tables = {k: v for k, v in cleaned.items() if k != "code_map"}
+            stage("write_feather", "all", n_rows - len(schema), write_tables, tables, Path(tmp) / "feather")
+        stage("save_to_duckdb", "all", n_rows, save, cleaned)
+    return records
+
+
+# ---------- scaling / history ----------
+def scaling(records: list[dict]) -> pd.DataFrame:
+    """
+    One row per (stage, table): rows / second at each size and the exponent k of
+    time ~ rows^k between consecutive sizes (k_last: the two largest sizes).
+    """
+    df = pd.DataFrame(records)
+    rows = []
+    for (stage, table), g in df.groupby(["stage", "table"], sort=False):
+        g = g.sort_values("collisions")
+        row = {"stage": stage, "table": table}
+        for r in g.itertuples():
+            row[f"rows_per_s@{r.collisions}"] = r.rows_per_s
+        exps = [
+            math.log(b.seconds / a.seconds) / math.log(b.rows / a.rows)
+            for a, b in zip(g.itertuples(), list(g.itertuples())[1:])
+            if a.seconds > 0 and b.seconds > 0 and b.rows > a.rows > 0
+        ]
+        row["k_last"] = exps[-1] if exps else None
+        row["peak_mb_max"] = g["peak_mb"].max()
+        row["superlinear"] = bool(exps and exps[-1] > SUPERLINEAR and not g["skipped"].any())
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _git(*args) -> str | None:
+    try:
+        out = subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def run_metadata() -> dict:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "duckdb": duckdb.__version__,
+            "geopandas": HAS_GEOPANDAS,
+        },
+    }
+
+
+def append_history(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+
+
+def load_history(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def pick_reference(history: list[dict], commit: str | None, current: str | None) -> dict | None:
+    """Latest run of `commit` (prefix match), or the latest run of any commit other than `current`."""
+    for report in reversed(history):
+        ref = report.get("commit") or ""
+        if (commit and ref.startswith(commit)) or (not commit and ref != current):
+            return report
+    return None
+
+
+def compare(report: dict, reference: dict) -> pd.DataFrame:
+    """rows / second now vs `reference`, per stage, table and size both runs share."""
+    key = ["stage", "table", "collisions"]
+    now = pd.DataFrame(report["stages"]).set_index(key)["rows_per_s"]
+    then = pd.DataFrame(reference["stages"]).set_index(key)["rows_per_s"]
+    both = pd.concat({"now": now, "ref": then}, axis=1, join="inner").reset_index()
+    both["ratio"] = both["now"] / both["ref"]
+    return both
+
+
+# ---------- output ----------
+def print_report(report: dict, curve: pd.DataFrame) -> None:
+    meta = report["machine"]
+    print(f"ETL benchmark @ {report['commit'] or '?'}{' (dirty)' if report['dirty'] else ''} · "
+          f"{meta['cpus']} CPUs · python {meta['python']} · pandas {meta['pandas']} · duckdb {meta['duckdb']}")
+    sizes = report["config"]["sizes"]
+    header = f"{'stage':22s} {'table':10s}" + "".join(f"{f'{n:,} rows/s':>18s}" for n in sizes)
+    print(header + f"{'k':>7s}{'peak MB':>10s}")
+    for r in curve.to_dict("records"):
+        cells = "".join(
+            f"{r.get(f'rows_per_s@{n}') or 0:>18,.0f}" for n in sizes
+        )
+        k = f"{r['k_last']:.2f}" if r["k_last"] is not None and not pd.isna(r["k_last"]) else "-"
+        peak = f"{r['peak_mb_max']:.1f}" if not pd.isna(r["peak_mb_max"]) else "-"
+        flag = "  << superlinear" if r["superlinear"] else ""
+        print(f"{r['stage']:22s} {r['table']:10s}{cells}{k:>7s}{peak:>10s}{flag}")
+    print(f"(sizes are collisions; k: time ~ rows^k between the two largest sizes, flagged above {SUPERLINEAR})")
+
+
+def write_plot(records: list[dict], path: Path) -> None:
+    import plotly.express as px
+
+    df = pd.DataFrame(records)
+    df["step"] = df["stage"] + " · " + df["table"]
+    fig = px.line(df, x="rows", y="seconds", color="step", markers=True, log_x=True, log_y=True,
+                  title="ETL stage scaling (log-log: slope 1 = linear)")
+    fig.write_html(str(path))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated collision counts (default {DEFAULT_SIZES})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to --history")
+    parser.add_argument("--compare", nargs="?", const="", default=None, metavar="REV",
+                        help="compare with the latest run of commit REV (default: latest other commit)")
+    parser.add_argument("--plot", type=Path, help="write a log-log scaling chart (HTML)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = sorted({parse_count(s) for s in args.sizes.split(",") if s.strip()})
+    schema = load_schema(PROJECT_ROOT)
+    records = []
+    for n in sizes:
+        print(f"{n:,} collisions ...", file=sys.stderr)
+        paths = synthetic_inputs(n, args.seed, schema)
+        records.extend(run_etl(paths, schema, n, memory=not args.no_memory))
+
+    report = {**run_metadata(), "config": {"sizes": sizes, "seed": args.seed}, "stages": records}
+    history = load_history(args.history)
+    if not args.no_save:
+        append_history(args.history, report)
+
+    curve = scaling(records)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, curve)
+    if args.plot:
+        write_plot(records, args.plot)
+
+    if args.compare is not None:
+        reference = pick_reference(history, args.compare or None, report["commit"])
+        if reference is None:
+            print("No earlier run to compare with.")
+        else:
+            print(f"\nrows/s vs {reference['commit']} ({reference['timestamp']}):")
+            diff = compare(report, reference)
+            print(diff.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# benchmarks/geo_coords.py
+"""
+Coordinate storage benchmark: how the type of geo_events latitude / longitude
+(GEO_COORD_TYPE in src/shared/config.py) affects file size, hotspot binning
+and bounding-box filters.
+
+    python -m benchmarks.geo_coords                   # synthetic 1M collisions
+    python -m benchmarks.geo_coords --db road_safety.duckdb
+
+Variants, each written to its own database file as (year, latitude, longitude,
+collision_severity, casualties) sorted by (year, latitude) like geo_events:
+
+    DOUBLE          raw floats (ALP-compressed by DuckDB)
+    FLOAT           float32
+    DECIMAL(9,6)    integer micro-degrees (int32, bit-packed)
+    DECIMAL+grid    DECIMAL(9,6) plus gx / gy INTEGER precomputed at the finest
+                    Hotspots scale, binned there without arithmetic
+
+Timings are the best of --repeat runs of the get_hotspots binning query (one
+year, every HOTSPOT_GRID_OPTIONS scale) and of a viewport count with the
+data layer's Decimal parameters (coord_params) and with plain floats.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from benchmarks.load_test import CACHE_DIR, MAP_FOCUS, build_synthetic_db
+from src.dashboard.data import HOTSPOT_GRID_OPTIONS
+from src.shared.spatial import coord_params
+
+FINE_SCALE = max(HOTSPOT_GRID_OPTIONS.values())
+VARIANTS = {
+    "DOUBLE": "latitude::DOUBLE AS latitude, longitude::DOUBLE AS longitude",
+    "FLOAT": "latitude::FLOAT AS latitude, longitude::FLOAT AS longitude",
+    "DECIMAL(9,6)": "latitude::DECIMAL(9,6) AS latitude, longitude::DECIMAL(9,6) AS longitude",
+    "DECIMAL+grid": (
+        "latitude::DECIMAL(9,6) AS latitude, longitude::DECIMAL(9,6) AS longitude, "
+        f"CAST(FLOOR(latitude * {FINE_SCALE}) AS INTEGER) AS gx, "
+        f"CAST(FLOOR(longitude * {FINE_SCALE}) AS INTEGER) AS gy"
+    ),
+}
+VIEWPORT_DEG = 0.2  # half-size of the bbox around each MAP_FOCUS city
+
+
+def best_ms(con, query: str, params=None, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        con.execute(query, params).fetchall()
+        best = min(best, time.perf_counter() - t0)
+    return 1000 * best
+
+
+def build_variant(source: Path, path: Path, select_sql: str) -> int:
+    """Copy geo_events from `source` into a fresh database at `path`; returns its size in bytes."""
+    path.unlink(missing_ok=True)
+    con = duckdb.connect(str(path))
+    try:
+        con.execute(f"ATTACH '{source}' AS src (READ_ONLY)")
+        con.execute(
+            f"""
+            CREATE TABLE geo_events AS
+            SELECT year, {select_sql}, collision_severity, casualties
+            FROM src.geo_events
+            ORDER BY year, latitude
+            """
+        )
+        con.execute("DETACH src")
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    return path.stat().st_size
+
+
+def binning_sql(scale: int, precomputed: bool) -> str:
+    if precomputed and scale == FINE_SCALE:
+        gx, gy = "gx", "gy"
+    else:
+        gx = f"CAST(FLOOR(latitude  * {scale}) AS BIGINT)"
+        gy = f"CAST(FLOOR(longitude * {scale}) AS BIGINT)"
+    return f"""
+        SELECT {gx} AS gx, {gy} AS gy, COUNT(*) AS collisions, SUM(casualties) AS casualties
+        FROM geo_events
+        WHERE year = ?
+        GROUP BY 1, 2
+    """
+
+
+def run(source: Path, repeat: int = 5) -> list[dict]:
+    with duckdb.connect(str(source), read_only=True) as con:
+        year = con.execute("SELECT mode(year) FROM geo_events").fetchone()[0]
+    bboxes = [(lat - VIEWPORT_DEG, lon - VIEWPORT_DEG, lat + VIEWPORT_DEG, lon + VIEWPORT_DEG)
+              for lat, lon in MAP_FOCUS.values()]
+    bbox_sql = ("SELECT COUNT(*) FROM geo_events WHERE year = ? "
+                "AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, select_sql in VARIANTS.items():
+            path = Path(tmp) / "variant.duckdb"
+            size = build_variant(source, path, select_sql)
+            with duckdb.connect(str(path), read_only=True) as con:
+                n = con.execute("SELECT COUNT(*) FROM geo_events").fetchone()[0]
+                row = {"variant": name, "rows": n, "file_mb": size / 1e6, "bytes_per_row": size / max(n, 1)}
+                for scale in sorted(HOTSPOT_GRID_OPTIONS.values(), reverse=True):
+                    sql = binning_sql(scale, precomputed=name.endswith("+grid"))
+                    row[f"bin_{scale}_ms"] = best_ms(con, sql, [year], repeat)
+                for label, to_params in (("decimal", coord_params), ("float", lambda b: b)):
+                    row[f"bbox_{label}_ms"] = sum(
+                        best_ms(con, bbox_sql, [year, p[0], p[2], p[1], p[3]], repeat)
+                        for p in map(to_params, bboxes)
+                    )
+            rows.append(row)
+    return rows
+
+
+def print_report(rows: list[dict]) -> None:
+    cols = [c for c in rows[0] if c not in ("variant", "rows")]
+    print(f"{rows[0]['rows']:,} geo_events rows; times are best-of ms "
+          f"(bbox = sum over {len(MAP_FOCUS)} viewports)")
+    print(f"{'variant':<14}" + "".join(f"{c:>16}" for c in cols))
+    for row in rows:
+        print(f"{row['variant']:<14}" + "".join(f"{row[c]:>16.1f}" for c in cols))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare geo_events coordinate storage types.")
+    parser.add_argument("--db", default=None, help="road_safety.duckdb to read geo_events from (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="collisions in the synthetic database")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query (best is reported)")
+    parser.add_argument("--json", default=None, help="also write the rows to this file")
+    args = parser.parse_args(argv)
+
+    source = Path(args.db) if args.db else CACHE_DIR / f"road_safety_{args.rows}_0.duckdb"
+    if args.db is None and not source.exists():
+        print(f"Building synthetic database {source} ...")
+        build_synthetic_db(source, args.rows)
+
+    rows = run(source, args.repeat)
+    print_report(rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
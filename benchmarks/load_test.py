@@ -0,0 +1,441 @@
+# benchmarks/load_test.py
+"""
+Load test for the dashboard's query layer: N concurrent simulated analysts
+against one read-only DuckDB connection, the way a single Streamlit instance
+serves its sessions (one pool cursor per session, shared result cache).
+
+Each worker replays a randomized but seeded filter sequence through the same
+functions the views call (src/dashboard/data.py): year / month switches,
+severity toggles, hotspot grid-size changes and drill-downs, radius queries
+around a city, heatmap pans / zooms, environment factors and demographics.
+Every query is timed; the run reports p50 / p95 / p99 latency and queries per
+second, overall and per query, and can be checked against a stored baseline:
+
+    python -m benchmarks.load_test                      # synthetic DB, 8 workers
+    python -m benchmarks.load_test --db road_safety.duckdb --workers 16 --ops 500
+    python -m benchmarks.load_test --update-baseline    # store benchmarks/baseline.json
+
+With a baseline for the same settings and machine (platform, CPU count, DuckDB
+version), the exit status is 1 if p50 / p95 / p99 grew, or QPS dropped, by more
+than --tolerance; a baseline from another machine is reported and skipped. Without --db a synthetic
+database (--rows collisions) is built once under benchmarks/.cache/. The
+result cache is off by default, so every call measures DuckDB; --cache turns
+it on to include hit rates.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+from streamlit.logger import set_log_level
+
+from src.shared import database
+from src.shared.config import AGE_BANDS
+from src.shared.database import ConnectionPool, get_query_cache
+from src.shared.query_builder import Where
+from src.dashboard.data import (
+    DEFAULT_HOTSPOT_GRID,
+    HOTSPOT_GRID_OPTIONS,
+    build_geo_where,
+    build_severity_filter,
+    get_cell_breakdown,
+    get_daily_trend_range,
+    get_demographics_data,
+    get_factor_data,
+    get_hotspots,
+    get_interaction_data,
+    get_kpi_comparison,
+    get_map_bins,
+    get_map_data,
+    get_monthly_trend,
+    get_years,
+)
+from src.dashboard.components.layers import tooltip_fields
+from src.dashboard.tabs.heatmap import (
+    MAP_FOCUS,
+    POINT_BUDGET,
+    POINT_DETAIL_ZOOM,
+    POINT_TOOLTIP,
+    viewport_bbox,
+    zoom_scale,
+)
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+CACHE_DIR = BENCH_DIR / ".cache"
+
+SEVERITIES = ["Fatal", "Serious", "Slight"]
+FACTORS = ["speed_limit", "road_type", "weather_conditions", "light_conditions",
+           "road_surface_conditions", "junction_detail", "urban_or_rural_area"]
+METRICS = ["risk_score", "casualties", "collisions"]
+
+# action -> relative frequency in a session
+ACTIONS = {
+    "year": 3,
+    "month": 2,
+    "severity": 2,
+    "grid": 3,
+    "drilldown": 2,
+    "radius": 2,
+    "heatmap": 3,
+    "environment": 2,
+    "demographics": 1,
+}
+
+
+# ---------- synthetic database ----------
+def build_synthetic_db(path: Path, rows: int, seed: int = 0) -> Path:
+    """Cleaned-table frames with the dashboard's columns, loaded through the real ETL loader."""
+    from src.etl.loader import save_to_duckdb
+    from src.etl.transformation import band_ages
+
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 365 * 5, rows), unit="D")
+    severity = rng.choice(SEVERITIES, rows, p=[0.02, 0.18, 0.80])
+    # collisions cluster around the MAP_FOCUS cities, 20% of them scattered more widely
+    cities = np.array(list(MAP_FOCUS.values())[1:])
+    home = cities[rng.integers(0, len(cities), rows)]
+    spread = np.where(rng.random(rows) < 0.8, 0.15, 1.5)
+    collision = pd.DataFrame({
+        "collision_index": [f"S{i:09d}" for i in range(rows)],
+        # STATS19 publishes coordinates to 6 decimals
+        "latitude": np.round(home[:, 0] + rng.normal(0, 1, rows) * spread, 6),
+        "longitude": np.round(home[:, 1] + rng.normal(0, 1, rows) * spread, 6),
+        "date": dates,
+        "time": [f"{h:02d}:{m:02d}" for h, m in zip(rng.integers(0, 24, rows), rng.integers(0, 60, rows))],
+        "year": dates.year,
+        "month": dates.month_name(),
+        "month_num": dates.month,
+        "hour": rng.integers(0, 24, rows),
+        "day_of_week": dates.day_name(),
+        "collision_severity": severity,
+        "number_of_casualties": rng.integers(1, 4, rows),
+        "number_of_vehicles": rng.integers(1, 4, rows),
+        "speed_limit": rng.choice([20, 30, 40, 50, 60, 70], rows),
+        "road_type": rng.choice(["Single carriageway", "Dual carriageway", "Roundabout", "One way street"], rows),
+        "weather_conditions": rng.choice(["Fine no high winds", "Raining no high winds", "Snowing no high winds"], rows),
+        "light_conditions": rng.choice(["Daylight", "Darkness - lights lit", "Darkness - no lighting"], rows),
+        "road_surface_conditions": rng.choice(["Dry", "Wet or damp", "Frost or ice"], rows),
+        "junction_detail": rng.choice(["Not at junction or within 20 metres", "T or staggered junction", "Crossroads"], rows),
+        "urban_or_rural_area": rng.choice(["Urban", "Rural"], rows),
+        "collision_adjusted_severity_serious": rng.random(rows),
+        "collision_adjusted_severity_slight": rng.random(rows),
+    })
+    ages = np.where(rng.random(rows) < 0.02, -1, rng.integers(0, 90, rows))
+    casualty = pd.DataFrame({
+        "collision_index": collision["collision_index"],
+        "vehicle_reference": 1,
+        "casualty_class": rng.choice(["Driver or rider", "Passenger", "Pedestrian"], rows),
+        "casualty_type": rng.choice(["Car occupant", "Pedestrian", "Cyclist", "Motorcycle 125cc and under rider or passenger"], rows),
+        "sex_of_casualty": rng.choice(["Male", "Female"], rows),
+        "age_of_casualty": ages,
+        **{column: band_ages(ages, edges, labels) for column, (edges, labels) in AGE_BANDS.items()},
+        "casualty_severity": severity,
+    })
+    vehicle = pd.DataFrame({
+        "collision_index": collision["collision_index"],
+        "vehicle_reference": 1,
+        "vehicle_type": rng.choice(["Car", "Van / Goods 3.5 tonnes mgw or under", "Pedal cycle"], rows),
+    })
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".building")
+    tmp.unlink(missing_ok=True)
+    save_to_duckdb({"collision": collision, "casualty": casualty, "vehicle": vehicle}, str(tmp))
+    tmp.replace(path)
+    return path
+
+
+# ---------- simulated analyst ----------
+class AnalystSession:
+    """
+    One simulated dashboard user. Each step() changes one control, like a click,
+    and runs the queries the affected view would run; returns [(query, ms), ...].
+    """
+
+    def __init__(self, con, years: list[int], rng: random.Random):
+        self.con = con
+        self.years = years
+        self.rng = rng
+        self.year = years[0]
+        self.month = "All"
+        self.severity = list(SEVERITIES)
+        self.grid = HOTSPOT_GRID_OPTIONS[DEFAULT_HOTSPOT_GRID]
+        self.metric = "risk_score"
+        self.top_cell = None
+
+    def _timed(self, name: str, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        result = fn(self.con, *args, **kwargs)
+        self._log.append((name, 1000 * (time.perf_counter() - t0)))
+        return result
+
+    def step(self) -> list[tuple[str, float]]:
+        self._log = []
+        action = self.rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+        getattr(self, f"_{action}")()
+        return self._log
+
+    # ----- views -----
+    def _overview(self):
+        self._timed("kpi.comparison", get_kpi_comparison, self.severity, year=self.year, month=self.month)
+        if self.month == "All":
+            self._timed("trend.monthly", get_monthly_trend, self.year, "fatal, serious, slight")
+        else:
+            start = pd.Timestamp(self.year, self.month, 1)
+            end = start + pd.offsets.MonthEnd(0)
+            self._timed("trend.daily_range", get_daily_trend_range, start.date(), end.date(), self.severity)
+
+    def _hotspots(self, radius=None, center=None):
+        where_sql, params = build_geo_where(
+            year=self.year, month=self.month, severity_filter=build_severity_filter(self.severity)
+        )
+        kwargs = {"metric": self.metric, "topk": self.rng.choice([10, 20, 50])}
+        if radius is not None:
+            kwargs.update(center=center, radius_miles=radius)
+        df = self._timed("hotspots.rank", get_hotspots, where_sql, params, self.grid, **kwargs)
+        self.top_cell = (where_sql, params, self.grid, int(df["cell_key"].iloc[0])) if df is not None and len(df) else None
+
+    # ----- actions -----
+    def _year(self):
+        self.year = self.rng.choice(self.years)
+        self._overview()
+
+    def _month(self):
+        self.month = self.rng.choice(["All", *range(1, 13)])
+        self._overview()
+
+    def _severity(self):
+        s = self.rng.choice(SEVERITIES)
+        self.severity = [x for x in SEVERITIES if (x in self.severity) != (x == s)]
+        self._overview()
+        self._hotspots()
+
+    def _grid(self):
+        self.grid = self.rng.choice(list(HOTSPOT_GRID_OPTIONS.values()))
+        self.metric = self.rng.choice(METRICS)
+        self._hotspots()
+
+    def _drilldown(self):
+        if self.top_cell is None:
+            self._hotspots()
+        if self.top_cell is None:
+            return
+        where_sql, params, scale, key = self.top_cell
+        ring = self.rng.choice([0, 1])
+        self._timed("hotspots.cell", get_cell_breakdown, where_sql, params, key, scale, ring=ring)
+
+    def _radius(self):
+        city = self.rng.choice(list(MAP_FOCUS)[1:])
+        self._hotspots(radius=self.rng.choice([1, 5, 10, 25]), center=MAP_FOCUS[city])
+
+    def _heatmap(self):
+        center = MAP_FOCUS[self.rng.choice(list(MAP_FOCUS))]
+        zoom = self.rng.choice([6, 8, 10, 12, 13])
+        where = Where().period(year=self.year, month=self.month).extend(build_severity_filter(self.severity))
+        bbox = viewport_bbox(center, zoom)
+        if zoom >= POINT_DETAIL_ZOOM:
+            self._timed("map.points", get_map_data, where, bbox, POINT_BUDGET, zoom_scale(zoom),
+                        tooltip_fields(POINT_TOOLTIP))
+        else:
+            self._timed("map.bins", get_map_bins, where, zoom_scale(zoom), bbox)
+
+    def _environment(self):
+        where = Where().period(year=self.year, month=self.month).extend(build_severity_filter(self.severity))
+        primary, secondary = self.rng.sample(FACTORS, 2)
+        self._timed("environment.factor", get_factor_data, where, primary)
+        self._timed("environment.interaction", get_interaction_data, where, primary, secondary)
+
+    def _demographics(self):
+        where = Where().period(year=self.year, month=self.month).extend(build_severity_filter(self.severity))
+        sex = self.rng.choice([None, ["Male"], ["Female"]])
+        ages = AGE_BANDS["age_group"][1]
+        age = self.rng.choice([None, [ages[0]], list(ages[2:])])
+        where.isin("c.sex_of_casualty", sex).isin("c.age_group", age)
+        self._timed("demographics.breakdown", get_demographics_data, where)
+
+
+# ---------- run / report ----------
+def _percentiles(ms: list[float]) -> dict:
+    if not ms:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"count": len(ms), "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def run_load(db_path, workers: int = 8, ops: int = 200, seed: int = 0, cache: bool = False) -> dict:
+    """
+    `workers` threads, each running `ops` session steps. Returns overall and
+    per-query latency percentiles, QPS and error count.
+    """
+    con = duckdb.connect(str(db_path), read_only=True)
+    query_cache = get_query_cache()
+    saved = database.DB_PATH, query_cache.max_bytes
+    # run_query checks the build of DB_PATH for its cache; point it at this database
+    database.DB_PATH = Path(db_path)
+    query_cache.clear()
+    if not cache:
+        query_cache.max_bytes = 0  # nothing fits, so every call runs
+    try:
+        collisions = int(con.execute("SELECT COUNT(*) FROM collision").fetchone()[0])
+        years = sorted({int(round(y)) for y in get_years(con)}, reverse=True)
+        samples, errors, elapsed = _run_workers(con, years, workers, ops, seed)
+        cache_stats = query_cache.stats()
+    finally:
+        con.close()
+        database.DB_PATH, query_cache.max_bytes = saved
+        query_cache.clear()
+
+    by_query: dict[str, list[float]] = {}
+    for name, ms in samples:
+        by_query.setdefault(name, []).append(ms)
+    return {
+        "config": {"workers": workers, "ops": ops, "seed": seed, "cache": cache, "collisions": collisions},
+        "machine": machine_info(),
+        "results": {
+            **_percentiles([ms for _, ms in samples]),
+            "qps": len(samples) / elapsed if elapsed else 0.0,
+            "elapsed_s": elapsed,
+            "errors": len(errors),
+            "cache_hit_rate": cache_stats["hit_rate"] if cache else None,
+        },
+        "queries": {name: _percentiles(ms) for name, ms in sorted(by_query.items())},
+        "error_samples": errors[:5],
+    }
+
+
+def _run_workers(con, years, workers: int, ops: int, seed: int):
+    pool = ConnectionPool(con, max_size=workers)
+    samples: list[tuple[str, float]] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    start = threading.Barrier(workers + 1)
+
+    def worker(i: int):
+        rng = random.Random(seed * 1000 + i)
+        with pool.cursor() as cur:
+            session = AnalystSession(cur, years, rng)
+            start.wait()
+            for _ in range(ops):
+                try:
+                    log = session.step()
+                except Exception as e:
+                    with lock:
+                        errors.append(f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}")
+                    continue
+                with lock:
+                    samples.extend(log)
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"analyst-{i}") for i in range(workers)]
+    for t in threads:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return samples, errors, time.perf_counter() - t0
+
+
+def machine_info() -> dict:
+    """What the latencies depend on besides the code; baselines only compare on the same machine."""
+    return {"platform": platform.platform(), "cpus": os.cpu_count(), "duckdb": duckdb.__version__}
+
+
+REGRESSION_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def baseline_mismatch(report: dict, baseline: dict) -> str | None:
+    """Why `baseline` can't gate `report` (different config or machine), or None if it can."""
+    for key in ("config", "machine"):
+        if baseline.get(key) != report[key]:
+            return f"Baseline was recorded with {key} {baseline.get(key)}"
+    return None
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Regressions of `report` against `baseline` (same config), as messages; empty = pass.
+    Latencies may grow and QPS may drop by at most `tolerance` (0.25 = 25%).
+    """
+    problems = []
+    cur, base = report["results"], baseline["results"]
+    for key in REGRESSION_KEYS:
+        limit = base[key] * (1 + tolerance)
+        if cur[key] > limit:
+            problems.append(f"{key} {cur[key]:.1f} > {limit:.1f} (baseline {base[key]:.1f})")
+    floor = base["qps"] / (1 + tolerance)
+    if cur["qps"] < floor:
+        problems.append(f"qps {cur['qps']:.1f} < {floor:.1f} (baseline {base['qps']:.1f})")
+    if cur["errors"] > base.get("errors", 0):
+        problems.append(f"errors {cur['errors']} > {base.get('errors', 0)}")
+    return problems
+
+
+def print_report(report: dict) -> None:
+    r = report["results"]
+    print(f"{report['config']} on {report['machine']}")
+    print(f"{r['count']} queries in {r['elapsed_s']:.1f}s -> {r['qps']:.1f} qps, {r['errors']} errors")
+    print(f"{'query':<26} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, q in [*report["queries"].items(), ("ALL", r)]:
+        print(f"{name:<26} {q['count']:>6} {q['p50_ms']:>9.1f} {q['p95_ms']:>9.1f} {q['p99_ms']:>9.1f}")
+    for e in report["error_samples"]:
+        print(f"  error: {e}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load test of the dashboard queries.")
+    parser.add_argument("--db", default=None, help="road_safety.duckdb to test (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=200_000, help="collisions in the synthetic database")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent simulated analysts")
+    parser.add_argument("--ops", type=int, default=100, help="session steps per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="serve repeats from the query result cache")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--json", default=None, help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    set_log_level("error")  # bare-mode ScriptRunContext warnings from st.cache_resource
+
+    db_path = Path(args.db) if args.db else CACHE_DIR / f"road_safety_{args.rows}_{args.seed}.duckdb"
+    if args.db is None and not db_path.exists():
+        print(f"Building synthetic database {db_path} ...")
+        build_synthetic_db(db_path, args.rows, args.seed)
+
+    report = run_load(db_path, args.workers, args.ops, args.seed, args.cache)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps({k: report[k] for k in ("config", "machine", "results", "queries")}, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("No baseline; run with --update-baseline to store one.")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    mismatch = baseline_mismatch(report, baseline)
+    if mismatch:
+        print(f"{mismatch}; not comparable, skipping the check.")
+        return 0
+    problems = compare_to_baseline(report, baseline, args.tolerance)
+    for p in problems:
+        print(f"REGRESSION: {p}")
+    print("FAIL" if problems else f"OK (within {args.tolerance:.0%} of baseline)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
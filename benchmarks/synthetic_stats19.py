@@ -0,0 +1,399 @@
+# benchmarks/synthetic_stats19.py
+"""
+Synthetic STATS19 raw data: collision, vehicle and casualty CSVs in the DfT
+"1979-latest-published-year" layout, so the ETL and the dashboard can be
+benchmarked offline at any size.
+
+Column names and order follow stats19_schema (src/etl/schema.py), and every
+coded column is drawn from that column's codes in the schema: realistic
+weights for the columns the dashboard reads (severity, road type, speed
+limit, light, weather, surface, vehicle / casualty types ...), a decaying
+default for the rest, and no codes that were retired before the generated
+years. Collisions cluster around GB cities (police force follows the city),
+with a rural scatter clipped to GB bounds. Vehicles and casualties are
+consistent with their collision: number_of_vehicles / number_of_casualties
+rows each, the worst casualty sets the collision severity, and a casualty's
+type follows the vehicle it was in. Local authority codes and LSOAs are
+valid codes but not tied to the coordinates.
+
+    python -m benchmarks.synthetic_stats19 --collisions 1M            # into data/raw
+    python -m benchmarks.synthetic_stats19 --collisions 50M --out /scratch/raw --seed 7
+
+Rows are generated and appended in chunks, so memory stays flat at any size.
+"""
+import argparse
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.etl.schema import load_schema
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# the names run_pipeline reads from data/raw
+RAW_FILENAME = "dft-road-casualty-statistics-{table}-1979-latest-published-year.csv"
+TABLES = ("collision", "vehicle", "casualty")
+
+# schema variables the published files name differently, and older aliases they no longer carry
+RENAMED = {
+    "collision_adjusted_serious": "collision_adjusted_severity_serious",
+    "collision_adjusted_slight": "collision_adjusted_severity_slight",
+    "casualty_adjusted_serious": "casualty_adjusted_severity_serious",
+    "casualty_adjusted_slight": "casualty_adjusted_severity_slight",
+}
+DROPPED = {"did_police_officer_attend_scene_of_collision", "lsoa_of_collision_location"}
+
+GB_BOUNDS = {"lat": (49.9, 60.85), "lon": (-7.6, 1.75)}
+
+# (lat, lon, relative collision share, police_force code)
+CITIES = {
+    "London": (51.5074, -0.1278, 22, 1),
+    "Birmingham": (52.4862, -1.8904, 7, 20),
+    "Manchester": (53.4808, -2.2426, 7, 6),
+    "Leeds": (53.8008, -1.5491, 5, 13),
+    "Liverpool": (53.4084, -2.9916, 4, 5),
+    "Sheffield": (53.3811, -1.4701, 3, 14),
+    "Newcastle": (54.9783, -1.6178, 3, 10),
+    "Bristol": (51.4545, -2.5879, 3, 52),
+    "Nottingham": (52.9548, -1.1581, 3, 31),
+    "Leicester": (52.6369, -1.1398, 2, 33),
+    "Southampton": (50.9097, -1.4044, 2, 44),
+    "Brighton": (50.8225, -0.1372, 2, 47),
+    "Norwich": (52.6309, 1.2974, 1, 36),
+    "Cambridge": (52.2053, 0.1218, 1, 35),
+    "Exeter": (50.7184, -3.5339, 1, 50),
+    "Cardiff": (51.4816, -3.1791, 2, 62),
+    "Glasgow": (55.8642, -4.2518, 3, 99),
+    "Edinburgh": (55.9533, -3.1883, 2, 99),
+    "Aberdeen": (57.1497, -2.0943, 1, 99),
+}
+URBAN_SHARE = 0.7        # collisions within a few km of a city centre
+URBAN_SPREAD_DEG = 0.08
+RURAL_SPREAD_DEG = 0.9
+
+# code -> weight for the columns the dashboard reads; other coded columns use _default_weights
+WEIGHTS = {
+    "collision_severity": {1: 1.5, 2: 21.5, 3: 77},
+    "road_type": {6: 73, 3: 15, 1: 6.5, 2: 2, 7: 1, 9: 1.5, -1: 0.1},
+    "light_conditions": {1: 72, 4: 20, 5: 1, 6: 5, 7: 2, -1: 0.1},
+    "weather_conditions": {1: 79, 2: 11, 3: 0.5, 4: 1, 5: 1, 6: 0.1, 7: 0.5, 8: 2.5, 9: 4.5, -1: 0.1},
+    "road_surface_conditions": {1: 70, 2: 26, 3: 0.5, 4: 2, 5: 0.2, 6: 0.1, 7: 0.1, 9: 1, -1: 0.1},
+    "junction_detail": {0: 42, 13: 30, 16: 8, 17: 2, 18: 3, 99: 14, -1: 1},
+    "first_road_class": {1: 4, 2: 0.3, 3: 45, 4: 12, 5: 8, 6: 31},
+    "vehicle_type": {9: 72, 1: 7, 19: 6, 3: 2.5, 5: 2, 2: 0.5, 4: 1, 8: 2, 11: 2, 21: 1.5,
+                     20: 0.5, 10: 0.2, 17: 0.2, 22: 0.1, 23: 0.2, 90: 1, 97: 0.2, 98: 0.1},
+    "casualty_class": {1: 60, 2: 25, 3: 15},
+    "sex_of_casualty": {1: 57, 2: 42, 9: 0.5, -1: 0.5},
+    "sex_of_driver": {1: 68, 2: 27, 3: 5},
+    "propulsion_code": {1: 55, 2: 35, 3: 2, 8: 6, -1: 2},
+}
+SPEED_LIMITS = {20: 12, 30: 55, 40: 8, 50: 4, 60: 13, 70: 8}
+HOUR_WEIGHTS = [1, 0.7, 0.5, 0.4, 0.4, 0.8, 2, 4.5, 6.5, 4.5, 4, 4.5,
+                5, 5, 5.5, 7, 7.5, 8, 6, 4.5, 3.5, 3, 2.5, 1.8]
+VEHICLES_PER_COLLISION = {1: 30, 2: 55, 3: 11, 4: 4}
+CASUALTIES_PER_COLLISION = {1: 78, 2: 15, 3: 5, 4: 2}
+# DfT age bands: 1 = 0-5, 2 = 6-10, 3 = 11-15, 4 = 16-20, 5 = 21-25, 6 = 26-35, ... 11 = over 75
+AGE_BAND_EDGES = [6, 11, 16, 21, 26, 36, 46, 56, 66, 76]
+
+_MISSING = re.compile(r"missing|unknown|undefined|deprecated|predates", re.IGNORECASE)
+_RETIRED = re.compile(r"\((?:19|20)\d\d\s*-\s*(?:19|20)\d\d\)")
+
+
+def parse_count(text: str) -> int:
+    """'250k' / '1M' / '1.5m' / '50000' -> int."""
+    m = re.fullmatch(r"\s*([\d.]+)\s*([kKmM]?)\s*", str(text))
+    if not m:
+        raise argparse.ArgumentTypeError(f"not a row count: {text!r}")
+    return int(float(m.group(1)) * {"": 1, "k": 1_000, "m": 1_000_000}[m.group(2).lower()])
+
+
+def raw_columns(schema: pd.DataFrame, table: str) -> list[str]:
+    """Column layout of the published CSV for `table`, in file order."""
+    variables = schema.loc[schema["table"] == table, "variable"].drop_duplicates()
+    return [RENAMED.get(v, v) for v in variables if v not in DROPPED]
+
+
+def _as_code(code):
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return code
+
+
+def _default_weights(codes: list, labels: list) -> np.ndarray:
+    # in short code lists the earlier codes are usually the common ones; long lists
+    # (local authorities ...) are drawn uniformly. "Missing / unknown" codes are rare.
+    w = np.array([0.6 ** i for i in range(len(codes))]) if len(codes) <= 20 else np.ones(len(codes))
+    w[[bool(_MISSING.search(str(label))) for label in labels]] = w.sum() * 0.005
+    return w
+
+
+class CodeSampler:
+    """Weighted draws of each schema variable's currently valid codes."""
+
+    def __init__(self, schema: pd.DataFrame):
+        self._choices: dict[tuple[str, str], tuple[np.ndarray, np.ndarray]] = {}
+        coded = schema.dropna(subset=["code"])
+        for (table, variable), rows in coded.groupby(["table", "variable"], sort=False):
+            rows = rows[~rows["label"].astype(str).str.contains(_RETIRED)]
+            codes = [_as_code(c) for c in rows["code"]]
+            if variable in WEIGHTS:
+                weights = np.array([WEIGHTS[variable].get(c, 0.0) for c in codes], dtype=float)
+            else:
+                weights = _default_weights(codes, rows["label"].tolist())
+            if not len(codes) or weights.sum() <= 0:
+                continue
+            self._choices[(table, RENAMED.get(variable, variable))] = (np.array(codes), weights / weights.sum())
+
+    def __contains__(self, key) -> bool:
+        return key in self._choices
+
+    def draw(self, rng: np.random.Generator, table: str, column: str, n: int) -> np.ndarray:
+        codes, p = self._choices[(table, column)]
+        return codes[rng.choice(len(codes), size=n, p=p)]
+
+
+def _weighted(rng, table: dict, n: int) -> np.ndarray:
+    values = np.array(list(table))
+    p = np.array(list(table.values()), dtype=float)
+    return values[rng.choice(len(values), size=n, p=p / p.sum())]
+
+
+def _age_band(age: np.ndarray) -> np.ndarray:
+    return np.where(age < 0, -1, np.searchsorted(AGE_BAND_EDGES, age, side="right") + 1)
+
+
+def _ages(rng, n: int, mean: float, sd: float, low: int, missing: float) -> np.ndarray:
+    age = np.clip(np.round(rng.normal(mean, sd, n)), low, 100).astype(int)
+    age[rng.random(n) < missing] = -1
+    return age
+
+
+def _lsoa(rng, n: int) -> np.ndarray:
+    codes = np.char.add("E0", np.char.zfill(rng.integers(1_000_000, 1_035_000, n).astype(str), 7))
+    return np.where(rng.random(n) < 0.08, "-1", codes)
+
+
+def _osgr(lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # local equirectangular approximation around the National Grid's true origin (49N, 2W)
+    easting = 400_000 + (lon + 2.0) * 111_320 * np.cos(np.radians(lat))
+    northing = -100_000 + (lat - 49.0) * 110_574
+    return easting.round().astype(int), northing.round().astype(int)
+
+
+def _fill_coded(frame: dict, sampler: CodeSampler, rng, table: str, columns: list[str], n: int) -> None:
+    for col in columns:
+        if col in frame:
+            continue
+        if col.endswith("_historic"):
+            frame[col] = np.full(n, -1)  # not collected for recent years
+        elif (table, col) in sampler:
+            frame[col] = sampler.draw(rng, table, col, n)
+
+
+def _collisions(rng, sampler: CodeSampler, columns: list[str], first_id: int, n: int,
+                years: range) -> tuple[pd.DataFrame, dict]:
+    city = np.array(list(CITIES.values()), dtype=float)
+    home = rng.choice(len(city), size=n, p=city[:, 2] / city[:, 2].sum())
+    urban = rng.random(n) < URBAN_SHARE
+    spread = np.where(urban, URBAN_SPREAD_DEG, RURAL_SPREAD_DEG)
+    lat = np.clip(city[home, 0] + rng.normal(0, 1, n) * spread, *GB_BOUNDS["lat"]).round(6)
+    lon = np.clip(city[home, 1] + rng.normal(0, 1, n) * spread * 1.6, *GB_BOUNDS["lon"]).round(6)
+    easting, northing = _osgr(lat, lon)
+    force = city[home, 3].astype(int)
+
+    first_day = pd.Timestamp(years.start, 1, 1)
+    n_days = (pd.Timestamp(years.stop, 1, 1) - first_day).days
+    date = first_day + pd.to_timedelta(rng.integers(0, n_days, n), unit="D")
+    hour = _weighted(rng, dict(enumerate(HOUR_WEIGHTS)), n)
+    minute = rng.integers(0, 12, n) * 5  # times are mostly recorded to the nearest 5 minutes
+    year = date.year.to_numpy()
+    ref_no = np.char.zfill((force * 100_000_000 + first_id + np.arange(n)).astype(str), 10)
+
+    n_vehicles = _weighted(rng, VEHICLES_PER_COLLISION, n)
+    n_casualties = _weighted(rng, CASUALTIES_PER_COLLISION, n)
+    severity = sampler.draw(rng, "collision", "collision_severity", n)
+    road_class = sampler.draw(rng, "collision", "first_road_class", n)
+    speed = np.where(road_class == 1, 70, _weighted(rng, SPEED_LIMITS, n))
+    speed = np.where(urban & (speed > 40), 30, speed)
+
+    adj_serious = np.select([severity == 2, severity == 3], [1.0, rng.random(n) * 0.25], 0.0).round(6)
+    adj_slight = np.where(severity == 3, 1.0 - adj_serious, 0.0).round(6)
+    enhanced = np.select([severity == 1, severity == 3], [1, 3], rng.choice([5, 6, 7], n))
+    urban_rural = np.where(rng.random(n) < 0.9, np.where(urban, 1, 2), np.where(urban, 2, 1))
+
+    frame = {
+        "collision_index": np.char.add(year.astype(str), ref_no),
+        "collision_year": year,
+        "collision_ref_no": ref_no,
+        "location_easting_osgr": easting,
+        "location_northing_osgr": northing,
+        "longitude": lon,
+        "latitude": lat,
+        "police_force": force,
+        "collision_severity": severity,
+        "enhanced_collision_severity": enhanced,
+        "number_of_vehicles": n_vehicles,
+        "number_of_casualties": n_casualties,
+        "date": date.strftime("%d/%m/%Y"),
+        "day_of_week": (date.dayofweek.to_numpy() + 1) % 7 + 1,  # 1 = Sunday
+        "time": [f"{h:02d}:{m:02d}" for h, m in zip(hour, minute)],
+        "first_road_class": road_class,
+        "first_road_number": np.where(road_class <= 4, rng.integers(1, 9999, n), 0),
+        "speed_limit": speed,
+        "second_road_number": np.where(rng.random(n) < 0.55, 0, rng.integers(1, 9999, n)),
+        "urban_or_rural_area": urban_rural,
+        "lsoa_of_accident_location": _lsoa(rng, n),
+        "local_authority_highway_current": None,  # copied from local_authority_highway below
+        "collision_adjusted_severity_serious": adj_serious,
+        "collision_adjusted_severity_slight": adj_slight,
+    }
+    _fill_coded(frame, sampler, rng, "collision", columns, n)
+    frame["local_authority_highway_current"] = frame["local_authority_highway"]
+    context = {"index": frame["collision_index"], "year": year, "ref_no": ref_no,
+               "vehicles": n_vehicles, "casualties": n_casualties, "severity": severity}
+    return pd.DataFrame(frame)[columns], context
+
+
+def _vehicles(rng, sampler: CodeSampler, columns: list[str], ctx: dict) -> pd.DataFrame:
+    per = ctx["vehicles"]
+    parent = np.repeat(np.arange(len(per)), per)
+    n = len(parent)
+    vehicle_type = sampler.draw(rng, "vehicle", "vehicle_type", n)
+    age = _ages(rng, n, 42, 16, 17, missing=0.12)
+    no_licence = np.isin(vehicle_type, [1, 22]) & (age >= 0)  # pedal cycles, mobility scooters
+    age[no_licence] = rng.integers(8, 80, n)[no_licence]
+    frame = {
+        "collision_index": ctx["index"][parent],
+        "collision_year": ctx["year"][parent],
+        "collision_ref_no": ctx["ref_no"][parent],
+        "vehicle_reference": np.arange(n) - np.repeat(np.cumsum(per) - per, per) + 1,
+        "vehicle_type": vehicle_type,
+        "age_of_driver": age,
+        "age_band_of_driver": _age_band(age),
+        "engine_capacity_cc": np.where(vehicle_type == 1, -1, _weighted(rng, {999: 10, 1248: 20, 1598: 30, 1995: 25, 2993: 10, -1: 5}, n)),
+        "age_of_vehicle": np.where(rng.random(n) < 0.15, -1, np.clip(rng.gamma(2.2, 3.5, n).round(), 0, 40).astype(int)),
+        "generic_make_model": np.where(rng.random(n) < 0.2, "-1", _weighted(rng, {"FORD FIESTA": 9, "VAUXHALL CORSA": 7, "VOLKSWAGEN GOLF": 6, "FORD FOCUS": 6, "NISSAN QASHQAI": 4, "TOYOTA YARIS": 3, "BMW 1 SERIES": 3, "MERCEDES SPRINTER": 2}, n)),
+        "lsoa_of_driver": _lsoa(rng, n),
+        "escooter_flag": (rng.random(n) < 0.005).astype(int),
+    }
+    _fill_coded(frame, sampler, rng, "vehicle", columns, n)
+    return pd.DataFrame(frame)[columns]
+
+
+def _casualties(rng, sampler: CodeSampler, columns: list[str], ctx: dict, vehicles: pd.DataFrame) -> pd.DataFrame:
+    per = ctx["casualties"]
+    parent = np.repeat(np.arange(len(per)), per)
+    n = len(parent)
+    casualty_ref = np.arange(n) - np.repeat(np.cumsum(per) - per, per) + 1
+    # the first casualty carries the collision's severity, the rest are no worse than it
+    severity = np.where(casualty_ref == 1, ctx["severity"][parent],
+                        np.maximum(ctx["severity"][parent], sampler.draw(rng, "collision", "collision_severity", n)))
+    vehicle_ref = (rng.random(n) * ctx["vehicles"][parent]).astype(int) + 1
+    first_vehicle_row = np.cumsum(ctx["vehicles"]) - ctx["vehicles"]
+    in_vehicle = vehicles["vehicle_type"].to_numpy()[first_vehicle_row[parent] + vehicle_ref - 1]
+
+    casualty_class = sampler.draw(rng, "casualty", "casualty_class", n)
+    casualty_type = np.where(casualty_class == 3, 0, in_vehicle)
+    age = _ages(rng, n, 36, 19, 0, missing=0.02)
+    adj_serious = np.select([severity == 2, severity == 3], [1.0, rng.random(n) * 0.25], 0.0).round(6)
+    frame = {
+        "collision_index": ctx["index"][parent],
+        "collision_year": ctx["year"][parent],
+        "collision_ref_no": ctx["ref_no"][parent],
+        "vehicle_reference": vehicle_ref,
+        "casualty_reference": casualty_ref,
+        "casualty_class": casualty_class,
+        "age_of_casualty": age,
+        "age_band_of_casualty": _age_band(age),
+        "casualty_severity": severity,
+        "enhanced_casualty_severity": np.select([severity == 1, severity == 3], [1, 3], rng.choice([5, 6, 7], n)),
+        "casualty_type": casualty_type,
+        "pedestrian_location": np.where(casualty_class == 3, sampler.draw(rng, "casualty", "pedestrian_location", n), 0),
+        "pedestrian_movement": np.where(casualty_class == 3, sampler.draw(rng, "casualty", "pedestrian_movement", n), 0),
+        "car_passenger": np.where((casualty_class == 2) & (in_vehicle == 9), rng.choice([1, 2], n), 0),
+        "bus_or_coach_passenger": np.where((casualty_class == 2) & np.isin(in_vehicle, [10, 11]), rng.choice([1, 2, 3, 4], n), 0),
+        "pedestrian_road_maintenance_worker": np.where(casualty_class == 3, 2, 0),
+        "lsoa_of_casualty": _lsoa(rng, n),
+        "casualty_adjusted_severity_serious": adj_serious,
+        "casualty_adjusted_severity_slight": np.where(severity == 3, 1.0 - adj_serious, 0.0).round(6),
+    }
+    _fill_coded(frame, sampler, rng, "casualty", columns, n)
+    return pd.DataFrame(frame)[columns]
+
+
+def _append_csv(con, df: pd.DataFrame, path: Path, header: bool) -> None:
+    # DuckDB writes CSV several times faster than DataFrame.to_csv; COPY can't
+    # append, so each chunk goes to a part file that is then appended to `path`
+    part = path.with_suffix(".part")
+    con.register("chunk", df)
+    try:
+        con.execute(f"COPY chunk TO '{part}' (FORMAT CSV, HEADER {str(header).lower()})")
+    finally:
+        con.unregister("chunk")
+    with open(path, "wb" if header else "ab") as out, open(part, "rb") as src:
+        shutil.copyfileobj(src, out)
+    part.unlink()
+
+
+def generate_stats19(out_dir, collisions: int, seed: int = 0, start_year: int = 2019, years: int = 5,
+                     chunk_size: int = 250_000, schema: pd.DataFrame | None = None) -> dict[str, Path]:
+    """
+    Write synthetic collision / vehicle / casualty CSVs for `collisions` collisions
+    dated start_year .. start_year + years - 1 into `out_dir`, under the file names
+    run_pipeline reads. The output depends only on the arguments (chunk_size included).
+    Returns {table: path}.
+    """
+    if schema is None:
+        schema = load_schema(PROJECT_ROOT)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sampler = CodeSampler(schema)
+    layout = {table: raw_columns(schema, table) for table in TABLES}
+    paths = {table: out_dir / RAW_FILENAME.format(table=table) for table in TABLES}
+    span = range(start_year, start_year + years)
+
+    rng = np.random.default_rng(seed)
+    con = duckdb.connect()
+    try:
+        for first_id in range(0, collisions, chunk_size):
+            n = min(chunk_size, collisions - first_id)
+            collision, ctx = _collisions(rng, sampler, layout["collision"], first_id, n, span)
+            vehicle = _vehicles(rng, sampler, layout["vehicle"], ctx)
+            casualty = _casualties(rng, sampler, layout["casualty"], ctx, vehicle)
+            for table, df in (("collision", collision), ("vehicle", vehicle), ("casualty", casualty)):
+                _append_csv(con, df, paths[table], header=first_id == 0)
+    finally:
+        con.close()
+    return paths
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--collisions", type=parse_count, default=parse_count("1M"),
+                        help="number of collisions, e.g. 250k, 1M, 10M, 50M (default 1M)")
+    parser.add_argument("--out", type=Path, default=PROJECT_ROOT / "data" / "raw")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-year", type=int, default=2019)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--chunk-size", type=parse_count, default=250_000)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    paths = generate_stats19(args.out, args.collisions, seed=args.seed, start_year=args.start_year,
+                             years=args.years, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - t0
+    for table, path in paths.items():
+        print(f"{table:10s} {path}  ({path.stat().st_size / 1e6:,.1f} MB)")
+    print(f"{args.collisions:,} collisions in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
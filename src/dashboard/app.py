@@ -1,12 +1,12 @@
 # app.py
 import streamlit as st
-from src.shared.database import get_connection
+from src.shared.config import WARMUP_ON_START
+from src.shared.database import get_pool
+from src.dashboard.warmup import start_warmup
+from src.dashboard.components.admin import render_admin_panel
 from src.dashboard.components.filters import render_sidebar
-from src.dashboard.tabs.overview import render_overview_tab
-from src.dashboard.tabs.heatmap import render_heatmap_tab
-from src.dashboard.tabs.demographics import render_demographics_tab
-from src.dashboard.tabs.environment import render_environment_tab
-from src.dashboard.tabs.hotspots import render_hotspots_tab
+from src.dashboard.fragments import run_cursor
+from src.dashboard.navigation import render_views
 
 
 st.set_page_config(
@@ -23,30 +23,28 @@ def main():
     st.title('Great Britain Road Safety Data (STATS19)')
     st.markdown('Analysis of police-reported road traffic collisions (2000–2024)')
 
-    con = get_connection()
-    if not con:
+    pool = get_pool()
+    if pool is None:
         st.stop()
 
-    # ★ filters.py 应该返回这 6 个东西（下面会统一用）
-    time_mode, selected_year, selected_month, selected_severity, severity_filter, date_range = render_sidebar(con)
-
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(['Overview', 'Heatmap', 'Hotspots', 'Mode & Demographics', 'Road & Environment'])
+    # Each script run borrows its own cursor; it is returned when the run ends
+    # (including st.stop() / st.rerun(), which unwind through the with block).
+    try:
+        with run_cursor(pool) as con:
+            if WARMUP_ON_START:
+                start_warmup(pool, con)
+            _render(con)
+    except TimeoutError as e:
+        st.error(f"The dashboard is busy, please retry shortly.\n\n{e}")
 
 
-    with tab1:
-        render_overview_tab(con, time_mode, selected_year, selected_month, selected_severity, date_range)
-
-    with tab2:
-        render_heatmap_tab(con, time_mode, selected_year, selected_month, severity_filter, date_range)
-
-    with tab3:
-        render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_filter, date_range)
-
-    with tab4:
-        render_demographics_tab(con, time_mode, selected_year, selected_month, severity_filter, date_range)
+def _render(con):
+    # ★ filters.py 应该返回这 6 个东西（下面会统一用）
+    time_mode, selected_year, selected_month, selected_severity, severity_filter, date_range = render_sidebar(con)
+    render_admin_panel()
 
-    with tab5:
-        render_environment_tab(con, time_mode, selected_year, selected_month, severity_filter, date_range)
+    # Only the active view runs its queries (see navigation.py)
+    render_views(con, (time_mode, selected_year, selected_month, selected_severity, severity_filter, date_range))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+# file: src/dashboard/components/admin.py
+"""
+Admin-only sidebar panel: connection pool, result cache, background executor,
+prepared statements and per-query telemetry, plus EXPLAIN ANALYZE on demand.
+
+Shown only when the URL carries ?admin=<token> matching DASHBOARD_ADMIN_TOKEN
+(see config.ADMIN_TOKEN), so regular sessions never render it.
+"""
+import hmac
+
+import pandas as pd
+import streamlit as st
+
+from src.shared.config import ADMIN_TOKEN, TELEMETRY_LOG_PATH
+from src.shared.database import get_pool, get_query_cache, get_statement_registry, get_telemetry
+from src.dashboard.executor import get_executor
+from src.dashboard.fragments import db_fragment
+
+RECENT_QUERIES = 50
+
+
+def is_admin() -> bool:
+    token = st.query_params.get("admin")
+    return bool(ADMIN_TOKEN and token and hmac.compare_digest(str(token), ADMIN_TOKEN))
+
+
+def render_admin_panel() -> None:
+    if not is_admin():
+        return
+    with st.sidebar:
+        _admin_panel()
+
+
+@db_fragment
+def _admin_panel(con):
+    # a fragment: its buttons rerun only this panel, not the open view
+    with st.expander("🛠 Admin · Query telemetry", expanded=False):
+        telemetry = get_telemetry()
+        refresh, reset = st.columns(2)
+        refresh.button("Refresh", key="admin_refresh")
+        if reset.button("Reset", key="admin_reset"):
+            telemetry.reset()
+            get_statement_registry().reset_stats()
+
+        pool, cache, executor = get_pool(), get_query_cache(), get_executor()
+
+        st.caption("Connection pool / result cache / background queries")
+        resources = {
+            "pool": pool.stats() if pool is not None else {},
+            "cache": {k: v for k, v in cache.stats().items() if k != "build_id"},
+            "executor": executor.stats() if executor is not None else {},
+        }
+        st.dataframe(
+            pd.DataFrame(
+                [(name, k, v) for name, stats in resources.items() for k, v in stats.items()],
+                columns=["resource", "metric", "value"],
+            ).astype({"value": str}),
+            hide_index=True,
+        )
+
+        st.caption("Prepared statements")
+        st.dataframe(pd.DataFrame(get_statement_registry().stats()), hide_index=True)
+
+        summary = pd.DataFrame(telemetry.summary())
+        st.caption(f"Queries by fingerprint (last {len(telemetry.records())} calls, slowest p95 first)")
+        st.dataframe(summary, hide_index=True)
+
+        st.caption("Recent queries")
+        st.dataframe(pd.DataFrame(telemetry.records(RECENT_QUERIES)), hide_index=True)
+        st.caption(f"Full log: `{TELEMETRY_LOG_PATH}` (JSON lines, rotated)")
+
+        if not summary.empty:
+            labels = {
+                fp: f"{stmt or 'ad hoc'} · {fp} · p95 {p95:.1f} ms"
+                for fp, stmt, p95 in summary[["fingerprint", "statement", "p95_ms"]].itertuples(index=False)
+            }
+            fp = st.selectbox("Profile query", list(labels), format_func=labels.get, key="admin_explain_fp")
+            if st.button("Run EXPLAIN ANALYZE", key="admin_explain"):
+                try:
+                    st.code(telemetry.explain(con, fp), language="text")
+                except Exception as e:
+                    st.error(f"Could not profile {fp}: {e}")
@@ -1,6 +1,6 @@
 # file: src/dashboard/components/filters.py
 import streamlit as st
-from src.dashboard.data import get_years, get_date_range
+from src.dashboard.data import build_severity_filter, get_years, get_date_range
 
 
 def render_sidebar(con):
@@ -44,13 +44,7 @@ def render_sidebar(con):
         default=severity_options
     )
 
-    # Construct Severity Filter Expression (NO leading AND)
-    if not selected_severity:
-        severity_filter = "1=0"  # no selection => return empty result
-    elif len(selected_severity) == 1:
-        severity_filter = f"collision_severity = '{selected_severity[0]}'"
-    else:
-        quoted = ",".join([f"'{s}'" for s in selected_severity])
-        severity_filter = f"collision_severity IN ({quoted})"
+    # Severity filter as a parameterized Where (see src/shared/query_builder.py)
+    severity_filter = build_severity_filter(selected_severity)
 
     return time_mode, selected_year, selected_month, selected_severity, severity_filter, date_range
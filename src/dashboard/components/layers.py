@@ -0,0 +1,119 @@
+# file: src/dashboard/components/layers.py
+"""
+Shared preparation of point data for pydeck layers.
+
+- Severity colours come from a category-code lookup into a NumPy palette
+  instead of a per-row Python function returning a list.
+- Only the columns a layer actually draws or shows in its tooltip are sent,
+  under short keys, with rounded coordinates; tooltip values are formatted
+  lazily (only the referenced columns, only on the rows being drawn).
+- severity_point_layers() goes one step further and emits one layer per
+  severity with a constant colour, so no per-row colour is serialized at all.
+
+st.pydeck_chart serializes layer data as JSON (pydeck's binary transport only
+works in Jupyter widgets), so trimming columns is what shrinks the payload.
+"""
+import json
+import re
+
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+
+SEVERITY_ORDER = ['Fatal', 'Serious', 'Slight']
+
+# Row i = colour for SEVERITY_ORDER[i]; the last row (code -1) covers anything else.
+SEVERITY_RGBA = np.array(
+    [
+        [255, 0, 0, 160],      # Fatal: red
+        [255, 165, 0, 160],    # Serious: orange
+        [0, 128, 255, 160],    # Slight: blue
+        [0, 128, 255, 160],    # other / missing: blue
+    ],
+    dtype=np.uint8,
+)
+
+_SEVERITY_INDEX = pd.Index(SEVERITY_ORDER)
+_FIELD = re.compile(r'\{(\w+)\}')
+
+
+def severity_codes(severity: pd.Series) -> np.ndarray:
+    """Severity labels -> integer codes into SEVERITY_ORDER (-1 for anything else)."""
+    return _SEVERITY_INDEX.get_indexer(severity)
+
+
+def severity_rgba(severity: pd.Series) -> np.ndarray:
+    """Severity labels -> (n, 4) uint8 RGBA array."""
+    return SEVERITY_RGBA[severity_codes(severity)]
+
+
+def tooltip_fields(html: str) -> list[str]:
+    """Column names referenced as {field} in a pydeck tooltip template."""
+    return list(dict.fromkeys(_FIELD.findall(html or '')))
+
+
+def _format_for_tooltip(col: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.dt.strftime('%Y-%m-%d')
+    if col.dtype == 'object':
+        return col.astype(str)
+    return col
+
+
+def prepare_points(df: pd.DataFrame, tooltip_html: str = '',
+                   lon: str = 'longitude', lat: str = 'latitude',
+                   precision: int = 5) -> tuple[pd.DataFrame, str]:
+    """
+    Project df down to coordinates + the fields referenced by tooltip_html.
+
+    Coordinates become `x`/`y` rounded to `precision` decimals (5 ≈ 1 m), tooltip
+    fields are formatted for display and renamed to short keys (`t0`, `t1`, ...),
+    since every key is repeated per row in the JSON payload.
+    Returns the projected frame and the tooltip template rewritten to the short keys.
+    """
+    fields = [f for f in tooltip_fields(tooltip_html) if f in df.columns]
+    rename = {f: f't{i}' for i, f in enumerate(fields)}
+
+    data = {
+        'x': df[lon].round(precision),
+        'y': df[lat].round(precision),
+    }
+    for f in fields:
+        data[rename[f]] = _format_for_tooltip(df[f])
+    out = pd.DataFrame(data, index=df.index).dropna(subset=['x', 'y'])
+
+    html = _FIELD.sub(lambda m: '{' + rename.get(m.group(1), m.group(1)) + '}', tooltip_html or '')
+    return out, html
+
+
+def to_records(df: pd.DataFrame) -> list[dict]:
+    """DataFrame -> list of row dicts (pandas' C JSON writer is faster than to_dict)."""
+    return json.loads(df.to_json(orient='records'))
+
+
+def severity_point_layers(df: pd.DataFrame, tooltip_html: str = '',
+                          severity_col: str = 'collision_severity', **layer_kwargs) -> tuple[list, str]:
+    """
+    ScatterplotLayers for df, one per severity with a constant fill colour, so no
+    per-row colour is serialized. layer_kwargs go to every pdk.Layer.
+    Returns (layers, tooltip_html rewritten for the projected columns).
+    """
+    points, html = prepare_points(df, tooltip_html)
+    layer_kwargs['get_position'] = ['x', 'y']
+
+    if severity_col not in df.columns:
+        return [pdk.Layer('ScatterplotLayer', to_records(points),
+                          get_fill_color=SEVERITY_RGBA[-1].tolist(), **layer_kwargs)], html
+
+    codes = severity_codes(df.loc[points.index, severity_col])
+    layers = []
+    # Draw Slight first so Fatal/Serious stay on top.
+    for code in (-1, 2, 1, 0):
+        part = points[codes == code]
+        if part.empty:
+            continue
+        layers.append(
+            pdk.Layer('ScatterplotLayer', to_records(part),
+                      get_fill_color=SEVERITY_RGBA[code].tolist(), **layer_kwargs)
+        )
+    return layers, html
@@ -1,51 +1,32 @@
 # file: src/dashboard/data.py
 from __future__ import annotations
 
-from src.shared.database import run_query
+import calendar
+import datetime as dt
 
+import pandas as pd
 
-def _quote_list_str(values: list[str]) -> str:
-    """
-    Quote a list of strings into SQL IN-list format:
-      ["Fatal","Serious"] -> "('Fatal','Serious')"
-    """
-    quoted = ",".join([f"'{v}'" for v in values])
-    return f"({quoted})"
+from src.shared.database import run_query
+from src.shared.query_builder import Where, ident
+from src.shared.spatial import (
+    MAX_CELL_LEVEL,
+    cell_center,
+    cell_center_sql,
+    cell_key_range,
+    cell_level,
+    coord_params,
+    haversine_sql,
+    neighbour_keys,
+    radius_bbox,
+)
 
 
-def _sev_clause(severity_filter: str | None, alias: str | None = None) -> str:
+def build_severity_filter(selected_severity: list[str]) -> Where:
     """
-    Normalize a severity filter into a safe SQL fragment.
-
-    Accept both styles:
-      - "collision_severity IN ('Fatal','Serious')"     (recommended / new)
-      - "AND collision_severity IN (...)"              (legacy / old)
-      - "collision_severity = 'Fatal'"
-      - "1=0"                                          (no selection)
-
-    Return:
-      - "" (empty) if input is None/blank
-      - " AND (<expr>)" otherwise
-
-    If alias is provided (e.g., alias="col"), replace column references:
-      collision_severity -> col.collision_severity
+    Sidebar severity selection -> Where on collision_severity (empty selection matches nothing).
+    Shared by the sidebar and the cache warmup so both emit identical SQL.
     """
-    if not severity_filter:
-        return ""
-
-    s = severity_filter.strip()
-    if not s:
-        return ""
-
-    # Tolerate legacy style with a leading AND
-    if s.upper().startswith("AND "):
-        s = s[4:].strip()
-
-    # Apply alias for joined-table queries
-    if alias:
-        s = s.replace("collision_severity", f"{alias}.collision_severity")
-
-    return f" AND ({s})"
+    return Where().isin("collision_severity", selected_severity or [])
 
 
 def get_years(con):
@@ -61,24 +42,6 @@ def get_years(con):
         return []
 
 
-def get_kpi_data(con, year, severity_filter_cols):
-    """
-    severity_filter_cols is a tuple of (cols_coll, cols_cas, cols_veh),
-    e.g. ("fatal + serious", "fatal_casualties + serious_casualties", ...)
-    """
-    cols_coll, cols_cas, cols_veh = severity_filter_cols
-
-    kpi_query = f"""
-        SELECT 
-            SUM({cols_coll})  AS total_collisions,
-            SUM({cols_cas})   AS total_casualties,
-            SUM({cols_veh})   AS total_vehicles
-        FROM kpi_monthly
-        WHERE year = {year}
-    """
-    return run_query(kpi_query, con)
-
-
 def get_monthly_trend(con, year, cols):
     """
     Fetch monthly KPI trend from kpi_monthly for a given year.
@@ -92,28 +55,28 @@ def get_monthly_trend(con, year, cols):
             month,
             {cols}
         FROM kpi_monthly
-        WHERE year = {year}
+        WHERE year = ?
         ORDER BY month_num
     """
-    return run_query(trend_query, con)
+    return run_query(trend_query, con, [int(year)], statement="trend.monthly")
 
 
 def get_daily_trend(con, year, month):
     """
     Return daily collisions by severity for a given year/month (for single-month view).
     """
+    where = Where().period(year=year, month=month)
     query = f"""
         SELECT 
             date,
             collision_severity,
             COUNT(*) AS count
         FROM collision
-        WHERE year = {year}
-          AND month(date) = {month}
+        WHERE {where.sql}
         GROUP BY date, collision_severity
         ORDER BY date
     """
-    return run_query(query, con)
+    return run_query(query, con, where.params, statement="trend.daily")
 
 
 def get_date_range(con):
@@ -126,31 +89,107 @@ def get_date_range(con):
     return df["min_date"].iloc[0], df["max_date"].iloc[0]
 
 
-def get_kpi_range(con, start_date, end_date, selected_severity):
+def _as_date(value) -> dt.date:
+    return pd.Timestamp(value).date()
+
+
+def _shift_years(d: dt.date, years: int) -> dt.date:
+    """Same calendar day `years` later (earlier if negative); Feb 29 -> Feb 28."""
+    y = d.year + years
+    return d.replace(year=y, day=min(d.day, calendar.monthrange(y, d.month)[1]))
+
+
+def kpi_periods(year=None, month=None, date_range=None) -> dict[str, tuple[dt.date, dt.date]]:
     """
-    KPI totals under custom date range:
-      - start_date / end_date: Python date objects or 'YYYY-MM-DD'
-      - selected_severity: subset of ['Fatal','Serious','Slight']
+    Sidebar time selection -> the periods compared by get_kpi_comparison():
+      current, previous, last_year (same period one year earlier), year_2, year_3.
+    "previous" is the preceding year / month in Year/Month mode and the window of
+    the same length right before the range in Custom Range mode.
     """
-    if not selected_severity:
-        return None
-
-    # Build a local severity filter (this function receives a list, not the sidebar expression)
-    if len(selected_severity) == 1:
-        sev_filter = f" AND collision_severity = '{selected_severity[0]}'"
+    if date_range:
+        start, end = (_as_date(d) for d in date_range)
+        days = (end - start).days + 1
+        previous = (start - dt.timedelta(days=days), start - dt.timedelta(days=1))
+    elif month is None or month == "All":
+        start, end = dt.date(int(year), 1, 1), dt.date(int(year), 12, 31)
+        previous = (_shift_years(start, -1), _shift_years(end, -1))
     else:
-        sev_filter = f" AND collision_severity IN {_quote_list_str(selected_severity)}"
+        y, m = int(year), int(month)
+        start = dt.date(y, m, 1)
+        end = dt.date(y, m, calendar.monthrange(y, m)[1])
+        prev_end = start - dt.timedelta(days=1)
+        previous = (prev_end.replace(day=1), prev_end)
+
+    periods = {"current": (start, end), "previous": previous}
+    for k, name in ((1, "last_year"), (2, "year_2"), (3, "year_3")):
+        periods[name] = (_shift_years(start, -k), _shift_years(end, -k))
+    return periods
+
+
+def get_kpi_comparison(con, selected_severity, year=None, month=None, date_range=None):
+    """
+    KPI totals for several periods in one query over kpi_daily.
+
+    Returns one row per period (current, previous, last_year, rolling_3y) with
+    start_date, end_date, total_collisions, total_casualties, total_vehicles and
+    `has_data`. The current period has data if it overlaps the loaded dates; a
+    comparison period only if it lies entirely within them, so a half-loaded
+    year is never used as a baseline. rolling_3y is the mean of the same period
+    over those of the three preceding years that have data. Works for both
+    sidebar time modes; see kpi_periods() for how the periods are chosen.
+    """
+    periods = kpi_periods(year, month, date_range)
+    severity = build_severity_filter(selected_severity)
+    first_day, last_day = get_date_range(con)
+    if first_day is None:
+        return None
+    first_day, last_day = _as_date(first_day), _as_date(last_day)
 
+    # One pass over kpi_daily: each day is matched against the period list
+    # (i indexes the bound arrays), so the SQL text doesn't depend on the dates.
     query = f"""
+        WITH p AS (SELECT ?::DATE[] AS starts, ?::DATE[] AS ends)
         SELECT
-            SUM(collisions)  AS total_collisions,
-            SUM(casualties)  AS total_casualties,
-            SUM(vehicles)    AS total_vehicles
-        FROM kpi_daily
-        WHERE date BETWEEN '{start_date}' AND '{end_date}'
-        {sev_filter}
-    """
-    return run_query(query, con)
+            i,
+            SUM(collisions) AS total_collisions,
+            SUM(casualties) AS total_casualties,
+            SUM(vehicles)   AS total_vehicles
+        FROM kpi_daily d, p, range(1, {len(periods) + 1}) r(i)
+        WHERE d.date BETWEEN p.starts[i] AND p.ends[i]
+          AND {severity.render("d")[0]}
+        GROUP BY i
+    """
+    params = [[s for s, _ in periods.values()], [e for _, e in periods.values()], *severity.params]
+    df = run_query(query, con, params, statement="kpi.comparison")
+    if df is None:
+        return None
+
+    metrics = ["total_collisions", "total_casualties", "total_vehicles"]
+    sums = {int(r["i"]): r for _, r in df.iterrows()}
+    rows = {}
+    for i, (name, (start, end)) in enumerate(periods.items(), start=1):
+        if name == "current":
+            has_data = start <= last_day and end >= first_day
+        else:
+            has_data = first_day <= start and end <= last_day
+        r = sums.get(i)
+        rows[name] = {
+            "start_date": start,
+            "end_date": end,
+            **{m: float(r[m]) if r is not None else 0.0 for m in metrics},
+            "has_data": has_data,
+        }
+
+    history = [rows[k] for k in ("last_year", "year_2", "year_3") if rows[k]["has_data"]]
+    rows["rolling_3y"] = {
+        "start_date": min((h["start_date"] for h in history), default=None),
+        "end_date": max((h["end_date"] for h in history), default=None),
+        **{m: sum(h[m] for h in history) / len(history) if history else None for m in metrics},
+        "has_data": bool(history),
+    }
+
+    order = ["current", "previous", "last_year", "rolling_3y"]
+    return pd.DataFrame.from_dict({k: rows[k] for k in order}, orient="index").rename_axis("period")
 
 
 def get_daily_trend_range(con, start_date, end_date, selected_severity):
@@ -159,78 +198,166 @@ def get_daily_trend_range(con, start_date, end_date, selected_severity):
     """
     if not selected_severity:
         # Return empty DataFrame; caller can handle.
-        return run_query("SELECT date, collision_severity AS severity, 0 AS count LIMIT 0", con)
-
-    if len(selected_severity) == 1:
-        sev_filter = f" AND collision_severity = '{selected_severity[0]}'"
-    else:
-        sev_filter = f" AND collision_severity IN {_quote_list_str(selected_severity)}"
+        return run_query("SELECT date, collision_severity AS severity, 0 AS count FROM kpi_daily LIMIT 0", con)
 
+    where = Where().between("date", start_date, end_date).isin("collision_severity", selected_severity)
     query = f"""
         SELECT
             date,
             collision_severity AS severity,
             SUM(collisions) AS count
         FROM kpi_daily
-        WHERE date BETWEEN '{start_date}' AND '{end_date}'
-        {sev_filter}
+        WHERE {where.sql}
         GROUP BY date, collision_severity
         ORDER BY date
     """
-    return run_query(query, con)
+    return run_query(query, con, where.params, statement="trend.daily_range")
+
+
+# =========================================================
+# Geo fact table (geo_events): one row per geo-located collision
+# =========================================================
+GEO_TABLE = "geo_events"
+GEO_COLUMNS = (
+    "latitude", "longitude", "date", "time", "year", "month_num", "collision_severity",
+    "weather_conditions", "light_conditions", "road_type", "casualties", "vehicles", "cell_key",
+)
 
 
-def get_map_data(con, time_filter, severity_filter,
-                 road_type_filter, weather_filter, light_filter):
+def geo_columns(columns) -> list[str]:
     """
-    Map point data from collision_geopoints.
+    A tab's declared geo_events columns, validated and de-duplicated (order kept).
+    Callers name exactly the columns they draw, show or export; queries select
+    only those.
+    """
+    columns = list(dict.fromkeys(columns))
+    unknown = [c for c in columns if c not in GEO_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown {GEO_TABLE} column(s): {', '.join(map(str, unknown))}")
+    return columns
+
 
-    - time_filter: a fragment produced by Heatmap tab (must start with ' AND ...')
-                 e.g. " AND year = 2024" or " AND date BETWEEN '2024-01-01' AND '2024-03-31'"
-    - severity_filter: recommended to be a pure boolean expression (no leading AND),
-                       e.g. "collision_severity IN ('Fatal','Serious')"
-                       but legacy "AND ..." is also tolerated.
-    - other filters: fragments created in tab layer (typically start with ' AND ...')
+def _with_bbox(where: Where, bbox) -> Where:
+    """
+    where AND the viewport bbox = (min_lat, min_lon, max_lat, max_lon), if given.
     """
-    sev = _sev_clause(severity_filter)
+    where = where.copy()
+    if bbox:
+        min_lat, min_lon, max_lat, max_lon = coord_params(bbox)
+        where.between("latitude", min_lat, max_lat).between("longitude", min_lon, max_lon)
+    return where
 
-    map_query = f"""
-        SELECT 
-            latitude, 
-            longitude,
-            collision_severity,
-            date,
-            time,
-            number_of_casualties,
-            number_of_vehicles
-        FROM collision_geopoints 
-        WHERE 1=1
-        {time_filter}
-        {sev}
+
+def sample_points(con, table: str, columns: list[str], where_sql: str = "1=1",
+                  params: list | None = None, budget: int = 50000,
+                  strata_scale: int = 100, seed: int = 42, statement: str | None = None):
     """
-    if road_type_filter:
-        map_query += road_type_filter
-    if weather_filter:
-        map_query += weather_filter
-    if light_filter:
-        map_query += light_filter
+    Deterministic, spatially stratified point sample computed inside DuckDB.
 
-    map_query += " LIMIT 50000"
-    return run_query(map_query, con)
+    Rows matching where_sql are stratified into grid cells (strata_scale cells per
+    degree). Every non-empty cell gets at least one point and the rest of the
+    budget is shared in proportion to cell density, so sparse rural areas stay
+    visible next to dense urban ones. Rows are ranked by a seeded hash, so the
+    same filters always return the same sample. Only the sampled rows (at most
+    `budget`) leave the database.
 
+    Returns the requested columns plus `n_matching` (rows matching the filters).
+    `statement` names the query for the prepared-statement registry.
+    """
+    budget = int(budget)
+    strata_scale = int(strata_scale)
+    cols_sql = ", ".join(columns)
 
-def get_demographics_data(con, time_filter, severity_filter, filters):
+    query = f"""
+        WITH base AS (
+            SELECT
+                {cols_sql},
+                CAST(FLOOR(latitude  * {strata_scale}) AS BIGINT) AS _sx,
+                CAST(FLOOR(longitude * {strata_scale}) AS BIGINT) AS _sy,
+                hash(latitude, longitude, date, {int(seed)}) AS _h
+            FROM {table}
+            WHERE {where_sql}
+        ),
+        ranked AS (
+            SELECT
+                *,
+                ROW_NUMBER() OVER (PARTITION BY _sx, _sy ORDER BY _h) AS _rk,
+                COUNT(*) OVER (PARTITION BY _sx, _sy) AS _n_cell,
+                COUNT(*) OVER () AS n_matching
+            FROM base
+        )
+        SELECT {cols_sql}, n_matching
+        FROM ranked
+        WHERE _rk <= GREATEST(1, CEIL(_n_cell * {budget} / n_matching))
+        ORDER BY (_rk - 1) / _n_cell, _h
+        LIMIT {budget}
+    """
+    return run_query(query, con, params, statement=statement)
+
+
+# what every point layer draws: position + severity colour
+MAP_POINT_COLUMNS = ("latitude", "longitude", "collision_severity")
+
+
+def get_map_data(con, where: Where, bbox=None, budget=50000, strata_scale=100, columns=()):
+    """
+    Map point data from geo_events.
+
+    - where: Heatmap filters (time, severity, road/weather/light) as a Where
+    - bbox: optional (min_lat, min_lon, max_lat, max_lon) viewport
+    - budget / strata_scale: point budget and stratification grid, see sample_points.
+      The result has an extra `n_matching` column (rows before sampling).
+    - columns: extra geo_events columns the caller shows (e.g. its tooltip fields);
+      MAP_POINT_COLUMNS are always returned
+    """
+    where = _with_bbox(where, bbox)
+    columns = geo_columns(MAP_POINT_COLUMNS + tuple(columns))
+    return sample_points(con, GEO_TABLE, columns, where.sql, where.params,
+                         budget=budget, strata_scale=strata_scale, statement="map.points")
+
+
+def get_map_bins(con, where: Where, scale, bbox=None):
+    """
+    Spatially aggregated map data from geo_events: one row per grid cell
+    (scale = cells per degree) with collision counts by severity, computed in DuckDB.
+    Filters follow get_map_data. The result size depends on scale/bbox, not on data volume.
+    """
+    scale = int(scale)
+    where = _with_bbox(where, bbox)
+
+    query = f"""
+        WITH binned AS (
+            SELECT
+                CAST(FLOOR(latitude  * {scale}) AS BIGINT) AS gx,
+                CAST(FLOOR(longitude * {scale}) AS BIGINT) AS gy,
+                collision_severity,
+                casualties
+            FROM {GEO_TABLE}
+            WHERE {where.sql}
+        )
+        SELECT
+            (gx + 0.5) / {scale} AS latitude,
+            (gy + 0.5) / {scale} AS longitude,
+            COUNT(*) AS collisions,
+            COUNT(*) FILTER (WHERE collision_severity = 'Fatal')   AS fatal,
+            COUNT(*) FILTER (WHERE collision_severity = 'Serious') AS serious,
+            COUNT(*) FILTER (WHERE collision_severity = 'Slight')  AS slight,
+            SUM(casualties) AS casualties
+        FROM binned
+        GROUP BY gx, gy
+    """
+    return run_query(query, con, where.params, statement="map.bins")
+
+
+def get_demographics_data(con, where: Where):
     """
-    Demographics analysis via casualty JOIN collision.
+    Demographics analysis via casualty c JOIN collision col.
 
-    - time_filter: already built for alias 'col' (from demographics tab),
-                  e.g. " AND col.year = 2024" or " AND col.date BETWEEN ..."
-    - severity_filter: pure expression on collision_severity (no leading AND),
-                       will be aliased to col.collision_severity here.
-    - filters: additional fragments from demographics tab, typically like:
-              [" AND c.sex_of_casualty = 'Male'", ...]
+    - where: time + severity filters on collision columns (unqualified, rendered
+             as col.<column>) and casualty filters qualified as c.<column>,
+             e.g. Where().period(year=2024).isin("c.sex_of_casualty", ["Male"])
     """
-    sev = _sev_clause(severity_filter, alias="col")
+    where_sql, params = where.render("col")
 
     demo_query = f"""
         SELECT 
@@ -241,31 +368,23 @@ def get_demographics_data(con, time_filter, severity_filter, filters):
             COUNT(*) as count
         FROM casualty c
         JOIN collision col ON c.collision_index = col.collision_index
-        WHERE 1=1
-        {time_filter}
-        {sev}
-    """
-    for f in filters:
-        demo_query += f
-
-    demo_query += """
+        WHERE {where_sql}
         GROUP BY 
             c.casualty_type, 
             c.age_group, 
             c.sex_of_casualty, 
             c.casualty_severity
     """
-    return run_query(demo_query, con)
+    return run_query(demo_query, con, params, statement="demographics.breakdown")
 
 
-def get_factor_data(con, time_filter, severity_filter, primary_col):
+def get_factor_data(con, where: Where, primary_col):
     """
     Single-factor environment breakdown from collision table.
 
-    - time_filter: produced by Environment tab (must start with ' AND ...')
-    - severity_filter: pure expression preferred; legacy 'AND ...' tolerated.
+    - where: time + severity filters from the Environment tab
     """
-    sev = _sev_clause(severity_filter)
+    primary_col = ident(primary_col)
 
     query = f"""
         SELECT 
@@ -273,23 +392,20 @@ def get_factor_data(con, time_filter, severity_filter, primary_col):
             collision_severity,
             COUNT(*) as count
         FROM collision
-        WHERE 1=1
-        {time_filter}
-        {sev}
+        WHERE {where.sql}
         GROUP BY {primary_col}, collision_severity
         ORDER BY count DESC
     """
-    return run_query(query, con)
+    return run_query(query, con, where.params, statement="environment.factor")
 
 
-def get_interaction_data(con, time_filter, severity_filter, primary_col, secondary_col):
+def get_interaction_data(con, where: Where, primary_col, secondary_col):
     """
     Two-factor interaction analysis (counts) from collision table.
 
-    - time_filter: produced by Environment tab (must start with ' AND ...')
-    - severity_filter: pure expression preferred; legacy 'AND ...' tolerated.
+    - where: time + severity filters from the Environment tab
     """
-    sev = _sev_clause(severity_filter)
+    primary_col, secondary_col = ident(primary_col), ident(secondary_col)
 
     query = f"""
         SELECT 
@@ -297,9 +413,242 @@ def get_interaction_data(con, time_filter, severity_filter, primary_col, seconda
             {secondary_col},
             COUNT(*) as count
         FROM collision
-        WHERE 1=1
-        {time_filter}
-        {sev}
+        WHERE {where.sql}
         GROUP BY {primary_col}, {secondary_col}
     """
-    return run_query(query, con)
+    return run_query(query, con, where.params, statement="environment.interaction")
+
+
+# =========================================================
+# Hotspots (geo_events, hierarchical grid cells)
+# =========================================================
+DEFAULT_CENTER = (51.5074, -0.1278)  # London
+
+# Neighborhood size (grid cell, north-south) -> cells per degree. Scales are powers
+# of two: a cell at scale 2**L is geo_events.cell_key >> 2 * (MAX_CELL_LEVEL - L).
+HOTSPOT_GRID_OPTIONS = {
+    "~50 m": 2048,
+    "~100 m": 1024,
+    "~200 m": 512,
+    "~0.4 km": 256,
+    "~0.9 km": 128,
+    "~1.7 km": 64,
+    "~3.5 km": 32,
+    "~7 km": 16,
+}
+DEFAULT_HOTSPOT_GRID = "~100 m"
+
+# Drill-down extent: the selected cell, or the block of cells around it
+NEIGHBOURHOOD_RINGS = {
+    "This cell": 0,
+    "+ adjacent cells (3×3)": 1,
+    "5×5 cells": 2,
+}
+
+
+def build_geo_where(year=None, month=None, date_range=None,
+                    severity_filter: Where | None = None,
+                    conditions: dict[str, str] | None = None) -> tuple[str, list]:
+    """
+    WHERE clause (without the keyword) + params for geo_events.
+
+    - date_range=(start, end) takes precedence over year/month (Custom Range mode)
+    - month: "All"/None or 1-12
+    - severity_filter: sidebar Where (see build_severity_filter)
+    - conditions: exact-match column filters, e.g. {"road_type": "Roundabout"}
+    """
+    where = Where().period(year=year, month=month, date_range=date_range, month_col="month_num")
+    where.extend(severity_filter)
+    for col, value in (conditions or {}).items():
+        where.eq(col, value)
+    return where.sql, where.params
+
+
+def _cell_shift(scale: int) -> tuple[int, int]:
+    """scale (cells per degree) -> (grid level, right shift from the finest cell_key)."""
+    level = cell_level(scale)
+    return level, 2 * (MAX_CELL_LEVEL - level)
+
+
+def get_hotspots(con, where_sql: str, params: list, scale: int,
+                 metric: str = "risk_score", topk: int = 20,
+                 center: tuple[float, float] = DEFAULT_CENTER,
+                 radius_miles: float | None = None):
+    """
+    Top-K grid cells (scale = cells per degree, a power of two) ranked by metric, from geo_events.
+    distance_miles is measured from center; radius_miles keeps only cells within that distance.
+
+    Rows are grouped on their integer cell_key shifted to the grid's level; a cell's
+    centroid is decoded from its key only for the cells that are returned (with a
+    radius, for every cell in the radius box, since their distances are needed).
+
+    With a radius, raw rows are first restricted to a lat/lon bounding box around the
+    centre (padded by one cell, so every cell whose centroid is in range keeps all of
+    its rows). geo_events is sorted by (year, latitude), so the box prunes whole
+    row groups via zone maps; the exact distance is then computed once per cell.
+    """
+    level, shift = _cell_shift(scale)
+    center_lat, center_lon = float(center[0]), float(center[1])
+
+    where = [f"({where_sql})"]
+    where_params = list(params)
+    top_sql = f"ORDER BY {metric} DESC, cell_key ASC LIMIT ?"
+    top_params = [int(topk)]
+    radius_filter_sql = ""
+    radius_params: list = []
+    if radius_miles is not None:
+        min_lat, min_lon, max_lat, max_lon = coord_params(radius_bbox(
+            center_lat, center_lon, float(radius_miles), pad_deg=1.0 / scale
+        ))
+        where.append("latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+        where_params += [min_lat, max_lat, min_lon, max_lon]
+        top_sql, top_params = "", []  # rank after the distance filter
+        radius_filter_sql = "WHERE distance_miles <= ?"
+        radius_params = [float(radius_miles)]
+
+    grid_lat, grid_lon = cell_center_sql("cell_key", level)
+    query = f"""
+    WITH agg AS (
+        SELECT
+            cell_key >> {shift} AS cell_key,
+            COUNT(*) AS collisions,
+            SUM(casualties) AS casualties,
+            SUM(
+                CASE
+                    WHEN collision_severity='Fatal' THEN 3
+                    WHEN collision_severity='Serious' THEN 2
+                    WHEN collision_severity='Slight' THEN 1
+                    ELSE 0
+                END
+            ) AS risk_score
+        FROM {GEO_TABLE}
+        WHERE {" AND ".join(where)}
+        GROUP BY 1
+    ),
+    ranked AS (
+        SELECT * FROM agg
+        {top_sql}
+    ),
+    placed AS (
+        SELECT
+            cell_key,
+            {grid_lat} AS grid_lat,
+            {grid_lon} AS grid_lon,
+            collisions,
+            casualties,
+            risk_score
+        FROM ranked
+    ),
+    scored AS (
+        SELECT
+            *,
+            {haversine_sql("grid_lat", "grid_lon")} AS distance_miles
+        FROM placed
+    )
+    SELECT *
+    FROM scored
+    {radius_filter_sql}
+    ORDER BY {metric} DESC, cell_key ASC
+    LIMIT ?;
+    """
+
+    # Params order: WHERE (+ bbox), top-K (no radius), distance, optional radius filter, LIMIT
+    final_params = (where_params + top_params + [center_lat, center_lat, center_lon]
+                    + radius_params + [int(topk)])
+    return run_query(query, con, final_params, statement="hotspots.rank")
+
+
+def cell_where(where_sql: str, params: list, cell_key: int, scale: int, ring: int = 0) -> tuple[str, list]:
+    """
+    build_geo_where() output narrowed to one grid cell (as returned by get_hotspots),
+    or with ring > 0 to the (2 * ring + 1)**2 block of cells centred on it.
+
+    geo_events is sorted by (year, latitude), so row groups are skipped on the
+    lat / lon box of the cell or block (micro-degree Decimals, see coord_params);
+    cell_key then matches the cells exactly: a cell is a contiguous range of
+    finest-level keys, a block the cells listed by neighbour_keys.
+    """
+    level, shift = _cell_shift(scale)
+    keys = neighbour_keys(int(cell_key), level, int(ring))
+    lat, lon = cell_center(int(cell_key), level)
+    half = (int(ring) + 0.5) / scale
+    min_lat, min_lon, max_lat, max_lon = coord_params((lat - half, lon - half, lat + half, lon + half))
+    sql = "latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ? AND cell_key BETWEEN ? AND ?"
+    cell_params = [min_lat, max_lat, min_lon, max_lon,
+                   cell_key_range(keys[0], level)[0], cell_key_range(keys[-1], level)[1]]
+    if len(keys) > 1:
+        sql += f" AND list_contains(?, cell_key >> {shift})"
+        cell_params.append(keys)
+    return f"({where_sql}) AND {sql}", list(params) + cell_params
+
+
+def get_cell_breakdown(con, where_sql: str, params: list, cell_key: int, scale: int, ring: int = 0):
+    """Collisions / casualties by severity inside one hotspot cell (or block, see cell_where)."""
+    cell_sql, cell_params = cell_where(where_sql, params, cell_key, scale, ring)
+    query = f"""
+    SELECT
+        collision_severity,
+        COUNT(*) AS collisions,
+        SUM(casualties) AS casualties
+    FROM {GEO_TABLE}
+    WHERE {cell_sql}
+    GROUP BY collision_severity
+    ORDER BY collisions DESC;
+    """
+    return run_query(query, con, cell_params, statement="hotspots.cell")
+
+
+CELL_ROW_ORDER_COLS = ("date", "collision_severity", "casualties")
+
+
+def get_cell_rows(con, where_sql: str, params: list, cell_key: int, scale: int,
+                  columns: list[str], order_col: str = "date", limit: int = 2000,
+                  after: tuple | None = None, ring: int = 0):
+    """
+    One page of raw rows from a hotspot cell (or block of cells, see cell_where),
+    ordered by (order_col NULLS LAST, rowid).
+    Only `columns` (geo_events columns, see geo_columns) are selected.
+
+    Keyset pagination: `after` is the (order value, rowid) of the previous page's last
+    row (None for the first page), so each page is a range scan rather than an OFFSET
+    that re-reads every earlier row.
+
+    Returns (page_df, next_key); next_key is None on the last page.
+    """
+    if order_col not in CELL_ROW_ORDER_COLS:
+        raise ValueError(f"Unsupported order column: {order_col}")
+    columns = geo_columns(columns)
+
+    cell_sql, cell_params = cell_where(where_sql, params, cell_key, scale, ring)
+    where = [cell_sql]
+    if after is not None:
+        last_val, last_rowid = after
+        if last_val is None:
+            # already in the trailing NULL block
+            where.append(f"{order_col} IS NULL AND rowid > ?")
+            cell_params.append(int(last_rowid))
+        else:
+            where.append(f"({order_col} > ? OR {order_col} IS NULL OR ({order_col} = ? AND rowid > ?))")
+            cell_params += [last_val, last_val, int(last_rowid)]
+
+    query = f"""
+    SELECT {", ".join(columns + [f"{order_col} AS _key", "rowid AS _rowid"])}
+    FROM {GEO_TABLE}
+    WHERE {" AND ".join(where)}
+    ORDER BY {order_col} ASC NULLS LAST, rowid ASC
+    LIMIT ?;
+    """
+    # one extra row tells us whether a next page exists
+    df = run_query(query, con, cell_params + [int(limit) + 1], statement="hotspots.cell_rows")
+
+    next_key = None
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        last = df.iloc[-1]
+        key = last["_key"]
+        if pd.isna(key):
+            key = None
+        elif hasattr(key, "item"):  # numpy scalar -> python, so DuckDB can bind it
+            key = key.item()
+        next_key = (key, int(last["_rowid"]))
+    return df.drop(columns=["_key", "_rowid"]), next_key
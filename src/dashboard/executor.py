@@ -0,0 +1,201 @@
+# src/dashboard/executor.py
+"""
+Background query execution for the dashboard.
+
+A view submits its queries with fetch(), which runs them on a shared thread pool
+(each worker thread has its own DuckDB cursor) and returns a Future straight away, so a view can
+start all of its queries before waiting on any of them. await_result() then fills
+a placeholder while the query runs.
+
+Queries are tracked per session and per slot (e.g. "hotspots.rank"). Submitting
+to a slot that still has a query in flight interrupts the old one, so dragging a
+filter only ever leaves the latest query running. While waiting, await_result()
+keeps updating its placeholder; this is what lets Streamlit stop a superseded
+script run, and the unwinding run then cancels its own queries.
+"""
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from src.shared.config import QUERY_WORKERS
+from src.shared.database import get_connection
+
+
+class QueryCancelled(CancelledError):
+    """The query was superseded (or its script run ended) before it finished."""
+
+
+class _Task:
+    """One submitted query; owns the cursor it runs on so it can be interrupted."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.cursor = None
+        self.future: Future | None = None
+
+    def attach(self, cur) -> bool:
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.cursor = cur
+            return True
+
+    def detach(self) -> None:
+        with self._lock:
+            self.cursor = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            # interrupt under the lock: once detached, the worker's cursor serves other tasks
+            if self.cursor is not None:
+                try:
+                    self.cursor.interrupt()
+                except Exception:
+                    pass
+        if self.future is not None:
+            self.future.cancel()  # no-op once running
+
+
+class QueryExecutor:
+    """
+    Thread pool running `fn(cursor, *args, **kwargs)` calls for all sessions.
+    At most one call per (session, slot) is live; a newer submit cancels the older one.
+    """
+
+    def __init__(self, con, max_workers: int = QUERY_WORKERS):
+        self._con = con
+        self._threads = ThreadPoolExecutor(max_workers=int(max_workers), thread_name_prefix="dash-query")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._inflight: dict[tuple[str, str], _Task] = {}
+        self._submitted = 0
+        self._superseded = 0
+
+    def submit(self, session_id: str, slot: str, fn, *args, **kwargs) -> Future:
+        task = _Task()
+        key = (session_id, slot)
+        with self._lock:
+            prev = self._inflight.get(key)
+            self._inflight[key] = task
+            self._submitted += 1
+            if prev is not None:
+                self._superseded += 1
+        if prev is not None:
+            prev.cancel()
+        task.future = self._threads.submit(self._run, key, task, fn, args, kwargs)
+        return task.future
+
+    def _cursor(self):
+        # one long-lived cursor per worker thread, so prepared statements are reused
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self._local.cursor = self._con.cursor()
+        return cur
+
+    def _run(self, key, task: _Task, fn, args, kwargs):
+        cur = self._cursor()
+        try:
+            if not task.attach(cur):
+                raise QueryCancelled(key[1])
+            try:
+                return fn(cur, *args, **kwargs)
+            except Exception as e:
+                # execute_query reports any interrupt as a timeout; tell the two apart
+                if task.cancelled:
+                    raise QueryCancelled(key[1]) from e
+                raise
+        finally:
+            task.detach()
+            with self._lock:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+
+    def cancel(self, session_id: str, slot: str | None = None) -> int:
+        """Cancel one slot, or every in-flight query of the session. Returns how many."""
+        with self._lock:
+            keys = [k for k in self._inflight if k[0] == session_id and (slot is None or k[1] == slot)]
+            tasks = [self._inflight.pop(k) for k in keys]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def cancel_future(self, future: Future) -> bool:
+        """Cancel the in-flight query behind `future` (if it is still tracked)."""
+        with self._lock:
+            key = next((k for k, t in self._inflight.items() if t.future is future), None)
+            task = self._inflight.pop(key) if key is not None else None
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._inflight),
+                "submitted": self._submitted,
+                "superseded": self._superseded,
+            }
+
+
+@st.cache_resource
+def get_executor():
+    """
+    Process-wide QueryExecutor over get_connection(), or None if the database is unavailable.
+    """
+    con = get_connection()
+    if con is None:
+        return None
+    return QueryExecutor(con)
+
+
+def _session_id() -> str:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "default"
+
+
+def fetch(slot: str, fn, *args, **kwargs) -> Future:
+    """
+    Run `fn(con, *args, **kwargs)` in the background for the current session.
+    A query already in flight in the same slot is cancelled first.
+    """
+    executor = get_executor()
+    if executor is None:
+        raise RuntimeError("Database is unavailable.")
+    return executor.submit(_session_id(), slot, fn, *args, **kwargs)
+
+
+def await_result(future: Future, placeholder=None, label: str = "Loading…", poll: float = 0.25):
+    """
+    Block until `future` is done, showing `label` (and elapsed time) in `placeholder`.
+
+    Updating the placeholder hands control back to Streamlit, so a rerun triggered
+    by new input stops this run here; the future is then cancelled instead of
+    finishing a result nobody will see. Exceptions raised by the query are re-raised.
+    """
+    if placeholder is None:
+        placeholder = st.empty()
+    t0 = time.perf_counter()
+    try:
+        while True:
+            try:
+                result = future.result(timeout=poll)
+                break
+            except FutureTimeout:
+                placeholder.info(f"⏳ {label} ({time.perf_counter() - t0:.1f}s)")
+    except BaseException:
+        # superseded run (RerunException / StopException) or query error
+        if not future.done():
+            future.cancel()
+            executor = get_executor()
+            if executor is not None:
+                executor.cancel_future(future)
+        raise
+    placeholder.empty()
+    return result
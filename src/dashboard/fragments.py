@@ -0,0 +1,65 @@
+# src/dashboard/fragments.py
+"""
+Helpers for st.fragment panels that query DuckDB.
+
+A fragment reruns on its own when one of its widgets changes: only the fragment
+function runs, not the sidebar or the other views. It is called again with the
+arguments from the last full run, but the cursor that run borrowed from the pool
+has already been returned. So db_fragment() panels get their cursor as the first
+argument: during a full run that is the run's own cursor (see run_cursor()), and
+during a fragment rerun a freshly borrowed one.
+"""
+import functools
+import threading
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from src.shared.database import get_pool
+
+_run = threading.local()
+
+
+@contextmanager
+def run_cursor(pool):
+    """Borrow the script run's cursor from `pool` and make it available to db_fragment panels."""
+    with pool.cursor() as con:
+        _run.con = con
+        try:
+            yield con
+        finally:
+            _run.con = None
+
+
+def db_fragment(func):
+    """st.fragment that calls func(con, *args, **kwargs) with a live cursor."""
+
+    @functools.wraps(func)
+    def panel(*args, **kwargs):
+        con = getattr(_run, "con", None)
+        if con is not None:
+            return func(con, *args, **kwargs)
+
+        pool = get_pool()
+        if pool is None:
+            st.stop()
+        try:
+            with run_cursor(pool) as con:
+                return func(con, *args, **kwargs)
+        except TimeoutError as e:
+            st.error(f"The dashboard is busy, please retry shortly.\n\n{e}")
+
+    return st.fragment(panel)
+
+
+def in_fragment_rerun() -> bool:
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def rerun_fragment():
+    """st.rerun() limited to the current fragment when Streamlit allows it (fragment reruns)."""
+    if in_fragment_rerun():
+        st.rerun(scope="fragment")
+    st.rerun()
@@ -0,0 +1,69 @@
+# src/dashboard/navigation.py
+"""
+Dashboard navigation: which views exist and which one is active.
+
+Views are rendered as lazy tabs. Switching tabs reruns the app and only the open
+view renders, so hidden views run no queries. The active tab is bound to the
+`view` query parameter, so it survives a browser reload and can be linked to
+directly (e.g. ?view=Hotspots).
+
+Each render of the active view is timed. The last few timings are kept in
+session_state (VIEW_TIMINGS_KEY) and the latest one is shown under the view.
+"""
+import time
+
+import streamlit as st
+
+from src.dashboard.tabs.overview import render_overview_tab
+from src.dashboard.tabs.heatmap import render_heatmap_tab
+from src.dashboard.tabs.demographics import render_demographics_tab
+from src.dashboard.tabs.environment import render_environment_tab
+from src.dashboard.tabs.hotspots import render_hotspots_tab
+
+NAV_KEY = "view"
+VIEW_TIMINGS_KEY = "view_timings"
+VIEW_TIMINGS_KEEP = 50
+
+
+# label -> render(con, sidebar); sidebar is the tuple returned by render_sidebar()
+def _overview(con, sidebar):
+    time_mode, selected_year, selected_month, selected_severity, _, date_range = sidebar
+    render_overview_tab(con, time_mode, selected_year, selected_month, selected_severity, date_range)
+
+
+def _with_severity_filter(render):
+    def view(con, sidebar):
+        time_mode, selected_year, selected_month, _, severity_filter, date_range = sidebar
+        render(con, time_mode, selected_year, selected_month, severity_filter, date_range)
+    return view
+
+
+VIEWS = {
+    'Overview': _overview,
+    'Heatmap': _with_severity_filter(render_heatmap_tab),
+    'Hotspots': _with_severity_filter(render_hotspots_tab),
+    'Mode & Demographics': _with_severity_filter(render_demographics_tab),
+    'Road & Environment': _with_severity_filter(render_environment_tab),
+}
+
+
+def record_view_timing(view: str, ms: float) -> None:
+    timings = st.session_state.setdefault(VIEW_TIMINGS_KEY, [])
+    timings.append({"view": view, "ms": round(ms, 1), "at": time.time()})
+    del timings[:-VIEW_TIMINGS_KEEP]
+
+
+def render_views(con, sidebar) -> None:
+    """Render the tab bar and the active view only."""
+    tabs = st.tabs(list(VIEWS), key=NAV_KEY, on_change="rerun", bind="query-params")
+
+    for (label, render), tab in zip(VIEWS.items(), tabs):
+        if not tab.open:
+            continue
+        with tab:
+            t0 = time.perf_counter()
+            render(con, sidebar)
+            # not reached on st.stop() / superseded runs, so only full renders are timed
+            ms = 1000 * (time.perf_counter() - t0)
+            record_view_timing(label, ms)
+            st.caption(f"⏱ {label} rendered in {ms:,.0f} ms")
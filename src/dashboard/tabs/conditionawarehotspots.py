@@ -1,32 +1,61 @@
 import streamlit as st
-import duckdb
 import pandas as pd
 
-def get_con(db_path="road_safety.duckdb"):
-    return duckdb.connect(db_path, read_only=True)
+from src.shared.database import get_connection, run_query
+from src.shared.query_builder import Where
 
-def condition_hotspots_tab(db_path="road_safety.duckdb"):
+
+def _get_years(con) -> list[int]:
+    df = run_query("SELECT DISTINCT year FROM geo_grid_agg ORDER BY year;", con)
+    return df["year"].tolist()
+
+
+def _get_year_options(con, year: int) -> dict[str, list]:
+    """
+    Dropdown options for one year, fetched in a single pass over geo_grid_agg.
+    The shared query cache keys on the year parameter, so switching back to a
+    recently viewed year is served from memory (LRU eviction).
+    """
+    df = run_query(
+        """
+        SELECT
+            list(DISTINCT weather_conditions ORDER BY weather_conditions) AS weather_conditions,
+            list(DISTINCT light_conditions   ORDER BY light_conditions)   AS light_conditions,
+            list(DISTINCT road_type          ORDER BY road_type)          AS road_type,
+            list(DISTINCT collision_severity ORDER BY collision_severity) AS collision_severity
+        FROM geo_grid_agg
+        WHERE year = ?;
+        """,
+        con,
+        [int(year)],
+        statement="condition_hotspots.options",
+    )
+    row = df.iloc[0]
+    return {k: list(row[k]) if row[k] is not None else [] for k in df.columns}
+
+
+def condition_hotspots_tab(con=None):
     st.header("Condition-aware Hotspots")
-    con = get_con(db_path)
+    if con is None:
+        con = get_connection()
+    if con is None:
+        return
 
     # --- options for dropdowns ---
-    years = con.execute("SELECT DISTINCT year FROM geo_grid_events ORDER BY year;").fetchall()
-    years = [y[0] for y in years]
+    # geo_grid_agg is pre-aggregated by (year, cell, conditions, severity) in the ETL,
+    # so these lookups scan a small table instead of every geo-located collision.
+    years = _get_years(con)
+    if not years:
+        st.info("No rows in `geo_grid_agg`. Re-run `python clean_stats19.py`.")
+        return
     year = st.selectbox("Year", years, index=len(years)-1)
 
     # Optional filters - load distinct values for current year to keep list smaller
-    weather_opts = [r[0] for r in con.execute(
-        "SELECT DISTINCT weather_conditions FROM geo_grid_events WHERE year=? ORDER BY 1;", [year]
-    ).fetchall()]
-    light_opts = [r[0] for r in con.execute(
-        "SELECT DISTINCT light_conditions FROM geo_grid_events WHERE year=? ORDER BY 1;", [year]
-    ).fetchall()]
-    road_opts = [r[0] for r in con.execute(
-        "SELECT DISTINCT road_type FROM geo_grid_events WHERE year=? ORDER BY 1;", [year]
-    ).fetchall()]
-    sev_opts = [r[0] for r in con.execute(
-        "SELECT DISTINCT collision_severity FROM geo_grid_events WHERE year=? ORDER BY 1;", [year]
-    ).fetchall()]
+    opts = _get_year_options(con, year)
+    weather_opts = opts["weather_conditions"]
+    light_opts = opts["light_conditions"]
+    road_opts = opts["road_type"]
+    sev_opts = opts["collision_severity"]
 
     weather = st.multiselect("Weather (optional)", weather_opts, default=[])
     light = st.multiselect("Light (optional)", light_opts, default=[])
@@ -36,44 +65,32 @@ def condition_hotspots_tab(db_path="road_safety.duckdb"):
     metric = st.selectbox("Rank by", ["risk_score", "casualties", "collisions"], index=0)
     topk = st.slider("Top K hotspots", 5, 100, 20, step=5)
 
-    # --- build WHERE dynamically (safe, parameterized) ---
-    where = ["year = ?"]
-    params = [year]
-
-    if weather:
-        where.append("weather_conditions IN (" + ",".join(["?"] * len(weather)) + ")")
-        params.extend(weather)
-    if light:
-        where.append("light_conditions IN (" + ",".join(["?"] * len(light)) + ")")
-        params.extend(light)
-    if road:
-        where.append("road_type IN (" + ",".join(["?"] * len(road)) + ")")
-        params.extend(road)
-    if severity:
-        where.append("collision_severity IN (" + ",".join(["?"] * len(severity)) + ")")
-        params.extend(severity)
-
-    where_sql = " AND ".join(where)
+    # --- build WHERE (parameterized; one SQL text whatever the selection sizes) ---
+    where = (
+        Where()
+        .eq("year", int(year))
+        .isin("weather_conditions", weather or None)
+        .isin("light_conditions", light or None)
+        .isin("road_type", road or None)
+        .isin("collision_severity", severity or None)
+    )
+    where_sql, params = where.sql, where.params
 
     query = f"""
     SELECT
-      cell_id, grid_lat, grid_lon,
-      COUNT(*) AS collisions,
+      cell_key, grid_lat, grid_lon,
+      SUM(collisions) AS collisions,
       SUM(casualties) AS casualties,
-      SUM(CASE WHEN collision_severity='Fatal' THEN 3
-               WHEN collision_severity='Serious' THEN 2
-               WHEN collision_severity='Slight' THEN 1
-               ELSE 0 END) AS risk_score
-    FROM geo_grid_events
+      SUM(risk_score) AS risk_score
+    FROM geo_grid_agg
     WHERE {where_sql}
-    GROUP BY cell_id, grid_lat, grid_lon
-    ORDER BY {metric} DESC
+    GROUP BY cell_key, grid_lat, grid_lon
+    ORDER BY {metric} DESC, cell_key ASC
     LIMIT ?;
     """
     params2 = params + [topk]
 
-    df = con.execute(query, params2).df()
-    con.close()
+    df = run_query(query, con, params2, statement="condition_hotspots.rank")
 
     st.subheader("Top hotspots")
     st.dataframe(df)
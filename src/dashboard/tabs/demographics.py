@@ -181,6 +181,8 @@ def render_demographics_tab(con, selected_year, selected_month, severity_filter)
 
 import streamlit as st
 import plotly.express as px
+from src.shared.config import AGE_BANDS, AGE_UNKNOWN
+from src.shared.query_builder import Where
 from src.dashboard.data import get_demographics_data
 
 def render_demographics_tab(con, time_mode, selected_year, selected_month, severity_filter, date_range):
@@ -197,49 +199,29 @@ def render_demographics_tab(con, time_mode, selected_year, selected_month, sever
         sex_options = ['Male', 'Female']
         sel_sex = st.multiselect('Sex', sex_options, default=sex_options)
 
-        age_options = ['Child', 'Young Adult', 'Adult', 'Senior', 'Unknown']
+        age_options = [*AGE_BANDS['age_group'][1], AGE_UNKNOWN]
         sel_age = st.multiselect('Age Group', age_options, default=age_options)
 
-    # ============ 构造人口过滤条件 ============
-    filters = []
-    if sel_cas_class:
-        if len(sel_cas_class) == 1:
-            filters.append(f" AND c.casualty_class = '{sel_cas_class[0]}'")
-        else:
-            filters.append(f" AND c.casualty_class IN {tuple(sel_cas_class)}")
-
-    if sel_sex:
-        if len(sel_sex) == 1:
-            filters.append(f" AND c.sex_of_casualty = '{sel_sex[0]}'")
-        else:
-            filters.append(f" AND c.sex_of_casualty IN {tuple(sel_sex)}")
-
-    if sel_age:
-        if len(sel_age) == 1:
-            filters.append(f" AND c.age_group = '{sel_age[0]}'")
-        else:
-            filters.append(f" AND c.age_group IN {tuple(sel_age)}")
-
-    # ============ 时间过滤（注意 alias 是 col.） ============
+    # ============ 时间过滤（collision 列，查询里会加 col. 前缀） ============
     if time_mode == "Year/Month":
         if selected_year is None:
             st.error("Please select a year.")
             return
-
-        if selected_month == 'All':
-            time_filter = f" AND col.year = {selected_year}"
-        else:
-            time_filter = f" AND col.year = {selected_year} AND month(col.date) = {selected_month}"
+        where = Where().period(year=selected_year, month=selected_month)
     else:
         if not date_range or len(date_range) != 2:
             st.error("Please select a valid date range.")
             return
-        start_date, end_date = date_range
-        time_filter = f" AND col.date BETWEEN '{start_date}' AND '{end_date}'"
+        where = Where().period(date_range=date_range)
+    where.extend(severity_filter)
+
+    # ============ 人口过滤条件（casualty 表 c.，没选 = 不过滤） ============
+    where.isin("c.casualty_class", sel_cas_class or None)
+    where.isin("c.sex_of_casualty", sel_sex or None)
+    where.isin("c.age_group", sel_age or None)
 
     try:
-        # ★ 现在传 time_filter
-        demo_df = get_demographics_data(con, time_filter, severity_filter, filters)
+        demo_df = get_demographics_data(con, where)
 
         if demo_df is None or getattr(demo_df, 'empty', True):
             st.warning('No casualty data found with selected filters.')
@@ -263,7 +245,7 @@ def render_demographics_tab(con, time_mode, selected_year, selected_month, sever
 
             # 2) 年龄 × 性别
             age_sex_df = demo_df.groupby(['age_group', 'sex_of_casualty'])['count'].sum().reset_index()
-            age_order = ['Child', 'Young Adult', 'Adult', 'Senior', 'Unknown']
+            age_order = [*AGE_BANDS['age_group'][1], AGE_UNKNOWN]
 
             fig_age = px.bar(
                 age_sex_df,
@@ -182,7 +182,9 @@ def render_environment_tab(con, selected_year, selected_month, severity_filter):
 
 import streamlit as st
 import plotly.express as px
+from src.shared.query_builder import Where
 from src.dashboard.data import get_factor_data, get_interaction_data
+from src.dashboard.fragments import db_fragment
 
 def render_environment_tab(con, time_mode, selected_year, selected_month, severity_filter, date_range):
     st.header('Road & Environment Analysis')
@@ -193,16 +195,13 @@ def render_environment_tab(con, time_mode, selected_year, selected_month, severi
             st.error("Please select a year.")
             return
 
-        if selected_month == 'All':
-            time_filter = f" AND year = {selected_year}"
-        else:
-            time_filter = f" AND year = {selected_year} AND month(date) = {selected_month}"
+        where = Where().period(year=selected_year, month=selected_month)
     else:
         if not date_range or len(date_range) != 2:
             st.error("Please select a valid date range.")
             return
-        start_date, end_date = date_range
-        time_filter = f" AND date BETWEEN '{start_date}' AND '{end_date}'"
+        where = Where().period(date_range=date_range)
+    where.extend(severity_filter)
 
     col_env_charts, col_env_controls = st.columns([3, 1])
 
@@ -222,18 +221,11 @@ def render_environment_tab(con, time_mode, selected_year, selected_month, severi
         primary_label = st.selectbox('Primary Factor', list(factors.keys()), index=0)
         primary_col = factors[primary_label]
 
-        secondary_label = st.selectbox(
-            'Secondary Factor (Optional)',
-            ['None'] + list(factors.keys()),
-            index=0
-        )
-
     with col_env_charts:
         st.subheader(f'Collisions by {primary_label}')
 
         try:
-            # ★ 现在传 time_filter
-            df_1 = get_factor_data(con, time_filter, severity_filter, primary_col)
+            df_1 = get_factor_data(con, where, primary_col)
 
             if df_1 is None or df_1.empty:
                 st.warning('No data found.')
@@ -249,41 +241,63 @@ def render_environment_tab(con, time_mode, selected_year, selected_month, severi
             )
             st.plotly_chart(fig_1, use_container_width=True)
 
-            # 二维交互热力图
-            if secondary_label != 'None' and secondary_label != primary_label:
-                secondary_col = factors[secondary_label]
+        except Exception as e:
+            st.error(f'Error analyzing environment factors: {e}')
+            return
 
-                st.divider()
-                st.subheader(f'Interaction: {primary_label} vs {secondary_label}')
+    _interaction_panel(where, factors, primary_label)
 
-                df_2 = get_interaction_data(
-                    con,
-                    time_filter,
-                    severity_filter,
-                    primary_col,
-                    secondary_col
-                )
 
-                if df_2 is not None and not df_2.empty:
-                    pivot_df = df_2.pivot(
-                        index=primary_col,
-                        columns=secondary_col,
-                        values='count'
-                    ).fillna(0)
-
-                    fig_2 = px.imshow(
-                        pivot_df,
-                        labels=dict(
-                            x=secondary_label,
-                            y=primary_label,
-                            color='Collisions'
-                        ),
-                        x=pivot_df.columns,
-                        y=pivot_df.index,
-                        title=f'Heatmap: {primary_label} vs {secondary_label}',
-                        aspect='auto'
-                    )
-                    st.plotly_chart(fig_2, use_container_width=True)
+@db_fragment
+def _interaction_panel(con, where, factors, primary_label):
+    """二维交互（fragment）：换 Secondary Factor 只重跑这一块，主图和 sidebar 不动"""
+    primary_col = factors[primary_label]
+    col_chart, col_ctrl = st.columns([3, 1])
+
+    with col_ctrl:
+        secondary_label = st.selectbox(
+            'Secondary Factor (Optional)',
+            ['None'] + list(factors.keys()),
+            index=0
+        )
+
+    # 二维交互热力图
+    if secondary_label == 'None' or secondary_label == primary_label:
+        return
+    secondary_col = factors[secondary_label]
+
+    with col_chart:
+        st.divider()
+        st.subheader(f'Interaction: {primary_label} vs {secondary_label}')
+
+        try:
+            df_2 = get_interaction_data(
+                con,
+                where,
+                primary_col,
+                secondary_col
+            )
+
+            if df_2 is not None and not df_2.empty:
+                pivot_df = df_2.pivot(
+                    index=primary_col,
+                    columns=secondary_col,
+                    values='count'
+                ).fillna(0)
+
+                fig_2 = px.imshow(
+                    pivot_df,
+                    labels=dict(
+                        x=secondary_label,
+                        y=primary_label,
+                        color='Collisions'
+                    ),
+                    x=pivot_df.columns,
+                    y=pivot_df.index,
+                    title=f'Heatmap: {primary_label} vs {secondary_label}',
+                    aspect='auto'
+                )
+                st.plotly_chart(fig_2, use_container_width=True)
 
         except Exception as e:
             st.error(f'Error analyzing environment factors: {e}')
@@ -274,36 +274,100 @@ def render_heatmap_tab(con, selected_year, selected_month, severity_filter):
         st.error(f'Error loading map: {e}')
 '''
 
+
+import math
+
 import streamlit as st
 import pydeck as pdk
-from src.dashboard.data import get_map_data
+from src.shared.query_builder import Where
+from src.dashboard.data import get_map_bins, get_map_data
+from src.dashboard.executor import await_result, fetch
+from src.dashboard.components.layers import severity_point_layers, tooltip_fields
+
+# 视角预设 (lat, lon)
+MAP_FOCUS = {
+    'Great Britain': (54.0, -2.5),
+    'London': (51.5074, -0.1278),
+    'Birmingham': (52.4862, -1.8904),
+    'Manchester': (53.4808, -2.2426),
+    'Leeds': (53.8008, -1.5491),
+    'Liverpool': (53.4084, -2.9916),
+    'Newcastle': (54.9783, -1.6178),
+    'Bristol': (51.4545, -2.5879),
+    'Cardiff': (51.4816, -3.1791),
+    'Edinburgh': (55.9533, -3.1883),
+    'Glasgow': (55.8642, -4.2518),
+}
+DEFAULT_FOCUS = 'Great Britain'
+DEFAULT_ZOOM = 6
+NATIONAL_ZOOM = DEFAULT_ZOOM  # 到这个级别为止按全国分格，不加视口过滤
+POINT_DETAIL_ZOOM = 12    # 放大到这个级别才加载原始点
+POINT_BUDGET = 50000     # 放大后最多下发的点数（空间分层抽样）
+VIEW_PX = (1200, 700)     # 地图视口（像素）
+BIN_PX = 8                # 每个聚合格子约占的像素
+# 原始点的 tooltip；查询只取这里引用到的列（加上坐标和严重程度）
+POINT_TOOLTIP = ('<b>Severity:</b> {collision_severity}<br/>'
+                 '<b>Date:</b> {date}<br/>'
+                 '<b>Time:</b> {time}<br/>'
+                 '<b>Casualties:</b> {casualties}<br/>'
+                 '<b>Vehicles:</b> {vehicles}')
+
+
+def _px_per_degree(zoom: int) -> float:
+    # Web Mercator: 256px tile covers 360° of longitude at zoom 0
+    return 256 * (2 ** zoom) / 360
+
+
+def zoom_scale(zoom: int) -> int:
+    """Grid cells per degree so that one bin spans ~BIN_PX pixels at this zoom."""
+    return max(1, int(round(_px_per_degree(zoom) / BIN_PX)))
+
+
+def viewport_bbox(center, zoom: int):
+    """
+    (min_lat, min_lon, max_lat, max_lon) visible around center at this zoom, or None
+    (no bbox predicate) at national zooms (<= NATIONAL_ZOOM): the map does not refetch
+    when panned, and a 1200x700 viewport there would cut off northern Scotland.
+    """
+    if zoom <= NATIONAL_ZOOM:
+        return None
+    lat, lon = center
+    ppd = _px_per_degree(zoom)
+    half_lon = VIEW_PX[0] / 2 / ppd
+    half_lat = VIEW_PX[1] / 2 / ppd * math.cos(math.radians(lat))
+    return lat - half_lat, lon - half_lon, lat + half_lat, lon + half_lon
+
 
 def render_heatmap_tab(con, time_mode, selected_year, selected_month, severity_filter, date_range):
     st.header('Collision Heatmap')
 
-    # ============ 时间过滤片段：给 collision_geopoints 用 ============
+    # ============ 时间过滤：给 geo_events 用（参数化） ============
     if time_mode == "Year/Month":
         if selected_year is None:
             st.error("Please select a year.")
             return
-
-        if selected_month == 'All':
-            # 只按年份过滤
-            time_filter = f" AND year = {selected_year}"
-        else:
-            # 年份 + 指定月份
-            time_filter = f" AND year = {selected_year} AND month(date) = {selected_month}"
+        # month == 'All' 时只按年份过滤
+        where = Where().period(year=selected_year, month=selected_month)
     else:
         if not date_range or len(date_range) != 2:
             st.error("Please select a valid date range.")
             return
-        start_date, end_date = date_range
-        time_filter = f" AND date BETWEEN '{start_date}' AND '{end_date}'"
+        where = Where().period(date_range=date_range)
 
     # ============ 右侧控制面板 ============
     col_map, col_controls = st.columns([3, 1])
 
     with col_controls:
+        st.subheader('Map View')
+
+        focus_label = st.selectbox('Focus', list(MAP_FOCUS.keys()), index=list(MAP_FOCUS).index(DEFAULT_FOCUS))
+        center = MAP_FOCUS[focus_label]
+        zoom = st.slider('Zoom level', min_value=5, max_value=16, value=DEFAULT_ZOOM)
+        st.caption(
+            f'Below zoom {POINT_DETAIL_ZOOM} collisions are aggregated into grid bins in the database; '
+            'individual points load when zoomed in.'
+        )
+
         st.subheader('Map Filters')
 
         # Road Type
@@ -331,81 +395,94 @@ def render_heatmap_tab(con, time_mode, selected_year, selected_month, severity_f
         ]
         sel_light = st.multiselect('Light Conditions', light_conds)
 
-    # ============ 其他过滤条件 ============
-    road_filter = ""
-    if sel_road_type:
-        if len(sel_road_type) == 1:
-            road_filter = f" AND road_type = '{sel_road_type[0]}'"
-        else:
-            road_filter = f" AND road_type IN {tuple(sel_road_type)}"
+    # ============ 其他过滤条件（没选 = 不过滤） ============
+    where.extend(severity_filter)
+    where.isin("road_type", sel_road_type or None)
+    where.isin("weather_conditions", sel_weather or None)
+    where.isin("light_conditions", sel_light or None)
 
-    weather_filter = ""
-    if sel_weather:
-        if len(sel_weather) == 1:
-            weather_filter = f" AND weather_conditions = '{sel_weather[0]}'"
-        else:
-            weather_filter = f" AND weather_conditions IN {tuple(sel_weather)}"
-
-    light_filter = ""
-    if sel_light:
-        if len(sel_light) == 1:
-            light_filter = f" AND light_conditions = '{sel_light[0]}'"
-        else:
-            light_filter = f" AND light_conditions IN {tuple(sel_light)}"
+    bbox = viewport_bbox(center, zoom)
+    show_points = zoom >= POINT_DETAIL_ZOOM
 
     # ============ 查询 & 画图 ============
     try:
-        # ★ 现在传的是 time_filter（包含 year/月/日期范围）
-        map_df = get_map_data(
-            con,
-            time_filter,
-            severity_filter,
-            road_filter,
-            weather_filter,
-            light_filter,
-        )
+        if show_points:
+            # 放大后：视口内的原始点
+            map_future = fetch(
+                "heatmap.map",
+                get_map_data,
+                where,
+                bbox=bbox,
+                budget=POINT_BUDGET,
+                strata_scale=zoom_scale(zoom),
+                columns=tooltip_fields(POINT_TOOLTIP),
+            )
+        else:
+            # 缩小时：DuckDB 里按格子聚合，传给前端的只有格子
+            map_future = fetch(
+                "heatmap.map",
+                get_map_bins,
+                where,
+                scale=zoom_scale(zoom),
+                bbox=bbox,
+            )
+        # 后台线程跑查询；换了筛选条件会打断上一次还没跑完的查询
+        map_df = await_result(map_future, label="Loading map data…")
 
         if map_df is None or map_df.empty:
             st.warning('No collisions found with selected filters.')
             return
 
-        # Tooltip 需要字符串
-        map_df['date'] = map_df['date'].astype(str)
-        map_df['time'] = map_df['time'].astype(str)
-
-        def get_color(severity):
-            if severity == 'Fatal':
-                return [255, 0, 0, 160]      # Red
-            elif severity == 'Serious':
-                return [255, 165, 0, 160]    # Orange
-            else:
-                return [0, 128, 255, 160]    # Blue
-
-        map_df['color'] = map_df['collision_severity'].apply(get_color)
-
-        # Deck.gl 图层
-        layer = pdk.Layer(
-            'ScatterplotLayer',
-            map_df,
-            get_position=['longitude', 'latitude'],
-            get_fill_color='color',
-            get_radius=30,
-            pickable=True,
-            opacity=0.8,
-            stroked=True,
-            filled=True,
-            radius_min_pixels=3,
-            radius_max_pixels=30,
-        )
-
-        # 视角位置
-        mid_lat = map_df['latitude'].mean()
-        mid_lon = map_df['longitude'].mean()
+        if show_points:
+            # 每个严重程度一个图层（颜色固定），只下发坐标 + tooltip 字段
+            layers, tooltip_html = severity_point_layers(
+                map_df,
+                POINT_TOOLTIP,
+                get_radius=30,
+                pickable=True,
+                opacity=0.8,
+                stroked=True,
+                filled=True,
+                radius_min_pixels=3,
+                radius_max_pixels=30,
+            )
+            n_matching = int(map_df['n_matching'].iloc[0])
+            caption = f'Showing {len(map_df):,} of {n_matching:,} collisions in view.'
+            if len(map_df) < n_matching:
+                caption += ' Points are a spatially stratified sample (every occupied area is represented).'
+        else:
+            layers = [
+                pdk.Layer(
+                    'HeatmapLayer',
+                    map_df,
+                    get_position=['longitude', 'latitude'],
+                    get_weight='collisions',
+                    radius_pixels=BIN_PX * 4,
+                    opacity=0.8,
+                ),
+                # 透明的格子中心点，只用于 tooltip
+                pdk.Layer(
+                    'ScatterplotLayer',
+                    map_df,
+                    get_position=['longitude', 'latitude'],
+                    get_fill_color=[0, 0, 0, 0],
+                    radius_min_pixels=BIN_PX / 2,
+                    radius_max_pixels=BIN_PX / 2,
+                    pickable=True,
+                ),
+            ]
+            tooltip_html = ('<b>Collisions:</b> {collisions}<br/>'
+                            '<b>Fatal:</b> {fatal}<br/>'
+                            '<b>Serious:</b> {serious}<br/>'
+                            '<b>Slight:</b> {slight}<br/>'
+                            '<b>Casualties:</b> {casualties}')
+            n_collisions = int(map_df['collisions'].sum())
+            caption = f'Showing {n_collisions:,} collisions in view, aggregated into {len(map_df):,} bins.'
 
         view_state = pdk.ViewState(
-            longitude=mid_lon,
-            latitude=mid_lat,
-            zoom=6,
+            longitude=center[1],
+            latitude=center[0],
+            zoom=zoom,
             min_zoom=5,
             max_zoom=18,
             pitch=0,
@@ -422,14 +499,10 @@ def render_heatmap_tab(con, time_mode, selected_year, selected_month, severity_f
             """, unsafe_allow_html=True)
 
             deck = pdk.Deck(
-                layers=[layer],
+                layers=layers,
                 initial_view_state=view_state,
                 tooltip={
-                    'html': '<b>Severity:</b> {collision_severity}<br/>'
-                            '<b>Date:</b> {date}<br/>'
-                            '<b>Time:</b> {time}<br/>'
-                            '<b>Casualties:</b> {number_of_casualties}<br/>'
-                            '<b>Vehicles:</b> {number_of_vehicles}',
+                    'html': tooltip_html,
                     'style': {
                         'backgroundColor': 'steelblue',
                         'color': 'white'
@@ -437,7 +510,7 @@ def render_heatmap_tab(con, time_mode, selected_year, selected_month, severity_f
                 }
             )
             st.pydeck_chart(deck, use_container_width=True)
-            st.caption(f'Showing {len(map_df)} collisions.')
+            st.caption(caption)
 
     except Exception as e:
         st.error(f'Error loading map: {e}')
@@ -5,6 +5,38 @@ import pandas as pd
 import io
 import pydeck as pdk
 
+from src.shared.database import run_query
+from src.dashboard.data import (
+    DEFAULT_CENTER,
+    DEFAULT_HOTSPOT_GRID,
+    HOTSPOT_GRID_OPTIONS,
+    CELL_ROW_ORDER_COLS,
+    NEIGHBOURHOOD_RINGS,
+    GEO_TABLE,
+    build_geo_where,
+    cell_where,
+    get_cell_breakdown,
+    get_cell_rows,
+    get_hotspots,
+    sample_points,
+)
+from src.dashboard.executor import await_result, fetch
+from src.dashboard.fragments import db_fragment, rerun_fragment
+from src.dashboard.components.layers import severity_point_layers, tooltip_fields
+
+# Max raw points drawn on the drill-down map
+MAP_POINT_BUDGET = 8000
+# Tooltip of the drill-down map; fields the user hides from the table are left out
+CELL_POINT_TOOLTIP = (
+    "<b>Severity:</b> {collision_severity}<br/>"
+    "<b>Date:</b> {date}<br/>"
+    "<b>Casualties:</b> {casualties}<br/>"
+    "<b>Vehicles:</b> {vehicles}<br/>"
+    "<b>Weather:</b> {weather_conditions}<br/>"
+    "<b>Light:</b> {light_conditions}<br/>"
+    "<b>Road:</b> {road_type}"
+)
+
 # Optional: enable click-to-select-center on map
 HAS_FOLIUM = True
 try:
@@ -14,32 +46,14 @@ except Exception:
     HAS_FOLIUM = False
 
 
-def _sanitize_severity_filter(severity_filter: str | None) -> str | None:
-    """
-    Accept both styles:
-      - "AND collision_severity IN (...)"   (legacy)
-      - "collision_severity IN (...)"       (recommended)
-    Return a pure boolean expression without leading AND.
-    """
-    if not severity_filter:
-        return None
-    s = severity_filter.strip()
-    if not s:
-        return None
-    if s.upper().startswith("AND "):
-        s = s[4:].strip()
-    return s or None
-
-
 def _table_exists(con, table_name: str) -> bool:
     try:
-        return (
-            con.execute(
-                "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?;",
-                [table_name],
-            ).fetchone()[0]
-            > 0
+        df = run_query(
+            "SELECT COUNT(*) AS n FROM information_schema.tables WHERE table_name = ?;",
+            con,
+            [table_name],
         )
+        return int(df["n"].iloc[0]) > 0
     except Exception:
         return False
 
@@ -50,7 +64,7 @@ def _get_distinct_values(con, table: str, col: str, limit: int = 30) -> list[str
     Returns a list of strings (no NULL/blank).
     """
     try:
-        df = con.execute(
+        df = run_query(
             f"""
             SELECT {col} AS v, COUNT(*) AS n
             FROM {table}
@@ -59,8 +73,9 @@ def _get_distinct_values(con, table: str, col: str, limit: int = 30) -> list[str
             ORDER BY n DESC
             LIMIT ?;
             """,
+            con,
             [int(limit)],
-        ).df()
+        )
         if df is None or df.empty:
             return []
         return [str(x) for x in df["v"].tolist()]
@@ -78,14 +93,23 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
     # -----------------------------
     # Required table check
     # -----------------------------
-    if not _table_exists(con, "geo_events_raw"):
+    if not _table_exists(con, GEO_TABLE):
         st.error(
-            "`geo_events_raw` not found in DuckDB.\n"
-            "Please update ETL (loader.py) to create `geo_events_raw` and re-run:\n"
+            f"`{GEO_TABLE}` not found in DuckDB.\n"
+            f"Please update ETL (loader.py) to create `{GEO_TABLE}` and re-run:\n"
             "`python clean_stats19.py`"
         )
         return
 
+    _hotspot_panel(time_mode, selected_year, selected_month, severity_filter, date_range)
+
+
+@db_fragment
+def _hotspot_panel(con, time_mode, selected_year, selected_month, severity_filter, date_range):
+    """
+    Controls + ranking. A fragment: Top K, grid size, condition filters and the
+    radius picker rerun only this panel, not the sidebar or other views.
+    """
     # -----------------------------
     # Core controls
     # -----------------------------
@@ -93,17 +117,11 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
     topk = st.slider("Top K", min_value=5, max_value=200, value=20, step=5)
 
     # Neighborhood size dropdown (grid cell size)
-    grid_options = {
-        "50 m": 2225,
-        "100 m": 1113,
-        "200 m": 556,
-        "~0.5 km (0.005°)": 200,   # ~0.005°
-        "~1.1 km (0.01°)": 100,    # ~0.01°
-        "~2.2 km (0.02°)": 50,     # ~0.02°
-        "~5.5 km (0.05°)": 20,     # ~0.05°
-    }
-    grid_label = st.selectbox("Neighborhood size (grid cell)", list(grid_options.keys()), index=1)
-    scale = int(grid_options[grid_label])
+    grid_labels = list(HOTSPOT_GRID_OPTIONS.keys())
+    grid_label = st.selectbox(
+        "Neighborhood size (grid cell)", grid_labels, index=grid_labels.index(DEFAULT_HOTSPOT_GRID)
+    )
+    scale = int(HOTSPOT_GRID_OPTIONS[grid_label])
 
     # -----------------------------
     # Condition Filters (dropdowns)
@@ -112,11 +130,11 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
     st.markdown("### Condition Filters (optional)")
 
     if "hotspots_weather_opts" not in st.session_state:
-        st.session_state.hotspots_weather_opts = _get_distinct_values(con, "geo_events_raw", "weather_conditions", limit=30)
+        st.session_state.hotspots_weather_opts = _get_distinct_values(con, GEO_TABLE, "weather_conditions", limit=30)
     if "hotspots_light_opts" not in st.session_state:
-        st.session_state.hotspots_light_opts = _get_distinct_values(con, "geo_events_raw", "light_conditions", limit=30)
+        st.session_state.hotspots_light_opts = _get_distinct_values(con, GEO_TABLE, "light_conditions", limit=30)
     if "hotspots_road_opts" not in st.session_state:
-        st.session_state.hotspots_road_opts = _get_distinct_values(con, "geo_events_raw", "road_type", limit=30)
+        st.session_state.hotspots_road_opts = _get_distinct_values(con, GEO_TABLE, "road_type", limit=30)
 
     weather_opts = st.session_state.hotspots_weather_opts
     light_opts = st.session_state.hotspots_light_opts
@@ -133,50 +151,31 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
     # -----------------------------
     # Build WHERE (parameterized)
     # -----------------------------
-    sev_expr = _sanitize_severity_filter(severity_filter)
-
-    where: list[str] = []
-    params: list = []
-
     # Time filtering: support both sidebar modes
     if time_mode == "Year/Month":
         if selected_year is None:
             st.warning("Please select a Year (Year/Month mode) in the sidebar.")
             return
-        where.append("year = ?")
-        params.append(int(selected_year))
-
-        if selected_month is not None and selected_month != "All":
-            try:
-                where.append("month_num = ?")
-                params.append(int(selected_month))
-            except Exception:
-                pass
+        time_kwargs = {"year": selected_year, "month": selected_month}
     else:
         # Custom Range mode
         if not date_range or len(date_range) != 2:
             st.warning("Please select a valid date range in the sidebar.")
             return
-        start_date, end_date = date_range
-        where.append("date::DATE BETWEEN ? AND ?")
-        params.extend([str(start_date), str(end_date)])
-
-    # Severity
-    if sev_expr:
-        where.append(f"({sev_expr})")
+        time_kwargs = {"date_range": date_range}
 
     # Conditions (exact match via dropdown)
-    if weather_sel != "All":
-        where.append("weather_conditions = ?")
-        params.append(weather_sel)
-    if light_sel != "All":
-        where.append("light_conditions = ?")
-        params.append(light_sel)
-    if road_sel != "All":
-        where.append("road_type = ?")
-        params.append(road_sel)
-
-    where_sql = " AND ".join(where) if where else "1=1"
+    conditions = {
+        col: sel
+        for col, sel in [
+            ("weather_conditions", weather_sel),
+            ("light_conditions", light_sel),
+            ("road_type", road_sel),
+        ]
+        if sel != "All"
+    }
+
+    where_sql, params = build_geo_where(severity_filter=severity_filter, conditions=conditions, **time_kwargs)
 
     # =========================================================
     # Radius Query (click-to-select center) - optional
@@ -192,9 +191,9 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
 
     # Persist center in session state
     if "hotspot_center_lat" not in st.session_state:
-        st.session_state.hotspot_center_lat = 51.5074   # London default
+        st.session_state.hotspot_center_lat = DEFAULT_CENTER[0]   # London default
     if "hotspot_center_lon" not in st.session_state:
-        st.session_state.hotspot_center_lon = -0.1278
+        st.session_state.hotspot_center_lon = DEFAULT_CENTER[1]
 
     center_lat = float(st.session_state.hotspot_center_lat)
     center_lon = float(st.session_state.hotspot_center_lon)
@@ -238,7 +237,7 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
                 st.session_state.hotspot_center_lat = float(out["last_clicked"]["lat"])
                 st.session_state.hotspot_center_lon = float(out["last_clicked"]["lng"])
                 st.session_state.run_radius_query = False  # ★center changed -> require Run again
-                st.rerun()
+                rerun_fragment()
 
         else:
             st.info("Tip: Install `folium` and `streamlit-folium` to enable click-to-select.")
@@ -270,78 +269,22 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
     # Dynamic grid binning query
     # If radius enabled: filter aggregated cells by haversine distance to center.
     # -----------------------------
-    R_MILES = 3958.8
-
-    dist_expr = f"""
-    ({R_MILES} * 2 * ASIN(SQRT(
-        POW(SIN(RADIANS((grid_lat - ?) / 2)), 2) +
-        COS(RADIANS(?)) * COS(RADIANS(grid_lat)) *
-        POW(SIN(RADIANS((grid_lon - ?) / 2)), 2)
-    )))
-    """
-
-    radius_filter_sql = ""
-    radius_params: list = []
-    if use_radius and radius_miles is not None:
-        radius_filter_sql = f"WHERE {dist_expr} <= ?"
-        radius_params = [center_lat, center_lat, center_lon, float(radius_miles)]
-
-    query = f"""
-    WITH binned AS (
-        SELECT
-            CAST(FLOOR(latitude  * {scale}) AS BIGINT) AS gx,
-            CAST(FLOOR(longitude * {scale}) AS BIGINT) AS gy,
-            year,
-            month_num,
-            date,
-            collision_severity,
-            weather_conditions,
-            light_conditions,
-            road_type,
-            casualties,
-            vehicles
-        FROM geo_events_raw
-        WHERE {where_sql}
-    ),
-    agg AS (
-        SELECT
-            CONCAT(CAST(gx AS VARCHAR), '_', CAST(gy AS VARCHAR)) AS cell_id,
-            (gx + 0.5) / {scale} AS grid_lat,
-            (gy + 0.5) / {scale} AS grid_lon,
-            COUNT(*) AS collisions,
-            SUM(casualties) AS casualties,
-            SUM(
-                CASE
-                    WHEN collision_severity='Fatal' THEN 3
-                    WHEN collision_severity='Serious' THEN 2
-                    WHEN collision_severity='Slight' THEN 1
-                    ELSE 0
-                END
-            ) AS risk_score
-        FROM binned
-        GROUP BY cell_id, grid_lat, grid_lon
-    )
-    SELECT
-        *,
-        {dist_expr} AS distance_miles
-    FROM agg
-    {radius_filter_sql}
-    ORDER BY {metric} DESC, cell_id ASC
-    LIMIT ?;
-    """
-
-    # Params order:
-    base = params[:]
-    select_dist = [center_lat, center_lat, center_lon]
-    final_params = base + select_dist
-
-    if use_radius and radius_miles is not None:
-        final_params += radius_params
-
-    final_params += [int(topk)]
-
     try:
-        df = con.execute(query, final_params).df()
+        # Runs on the background executor; a newer ranking (filters changed) interrupts this one.
+        df = await_result(
+            fetch(
+                "hotspots.rank",
+                get_hotspots,
+                where_sql,
+                params,
+                scale,
+                metric=metric,
+                topk=topk,
+                center=(center_lat, center_lon),
+                radius_miles=radius_miles if use_radius else None,
+            ),
+            label="Ranking hotspots…",
+        )
     except Exception as e:
         st.error(f"Hotspot query failed.\n\nError: {e}")
         return
@@ -357,78 +300,53 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
     mdf = df.rename(columns={"grid_lat": "lat", "grid_lon": "lon"})
     st.map(mdf)
 
+    _drilldown_panel(df, where_sql, params, scale)
+
+
+@db_fragment
+def _drilldown_panel(con, df, where_sql, params, scale):
+    """
+    Drill-down for one hotspot cell. A nested fragment: picking a cell or paging
+    through its rows reruns only this panel (the ranking above is not recomputed).
+    """
     st.markdown("### Drill-down (selected neighborhood)")
 
-    cell_options = df["cell_id"].astype(str).tolist()
+    cell_options = df["cell_key"].astype(int).tolist()
     if not cell_options:
         st.info("No hotspot cells available for drill-down.")
         return
 
-    if "hotspot_cell_id" not in st.session_state or st.session_state.hotspot_cell_id not in cell_options:
-        st.session_state.hotspot_cell_id = cell_options[0]
+    if "hotspot_cell_key" not in st.session_state or st.session_state.hotspot_cell_key not in cell_options:
+        st.session_state.hotspot_cell_key = cell_options[0]
 
-    default_idx = cell_options.index(st.session_state.hotspot_cell_id)
+    default_idx = cell_options.index(st.session_state.hotspot_cell_key)
 
     cell = st.selectbox(
-        "Select a hotspot cell_id",
+        "Select a hotspot cell_key",
         options=cell_options,
         index=default_idx,
         key="hotspot_cell_selectbox",
     )
 
-    st.session_state.hotspot_cell_id = cell
-
-
-    drill_query = f"""
-    WITH binned AS (
-        SELECT
-            CAST(FLOOR(latitude  * {scale}) AS BIGINT) AS gx,
-            CAST(FLOOR(longitude * {scale}) AS BIGINT) AS gy,
-            collision_severity,
-            casualties
-        FROM geo_events_raw
-        WHERE {where_sql}
-    ),
-    labeled AS (
-        SELECT
-            CONCAT(CAST(gx AS VARCHAR), '_', CAST(gy AS VARCHAR)) AS cell_id,
-            collision_severity,
-            casualties
-        FROM binned
-    )
-    SELECT
-        collision_severity,
-        COUNT(*) AS collisions,
-        SUM(casualties) AS casualties
-    FROM labeled
-    WHERE cell_id = ?
-    GROUP BY collision_severity
-    ORDER BY collisions DESC;
-    """
+    st.session_state.hotspot_cell_key = cell
+
+    ring_label = st.radio("Neighbourhood", list(NEIGHBOURHOOD_RINGS), horizontal=True)
+    ring = NEIGHBOURHOOD_RINGS[ring_label]
 
     try:
-        ddf = con.execute(drill_query, params + [cell]).df()
+        # only this cell's key range is scanned (no rebinning of the whole filter set)
+        ddf = get_cell_breakdown(con, where_sql, params, cell, scale, ring)
         st.dataframe(ddf, use_container_width=True)
 
         st.markdown("### See details (all raw points in this neighborhood)")
         
 
         with st.expander("See details / export raw rows for this cell", expanded=False):
-            # 解析 cell_id -> gx, gy
-            try:
-                gx_str, gy_str = str(cell).split("_")
-                gx_sel, gy_sel = int(gx_str), int(gy_str)
-            except Exception:
-                st.error(f"Invalid cell_id format: {cell}")
-                st.stop()
-
-            cA, cB, cC = st.columns([2, 2, 2])
+            cA, cB = st.columns([2, 2])
             with cA:
-                detail_limit = st.number_input("Rows to show", min_value=100, max_value=200000, value=2000, step=500)
+                detail_limit = st.number_input("Rows per page", min_value=100, max_value=200000, value=2000, step=500)
             with cB:
-                detail_offset = st.number_input("Offset (pagination)", min_value=0, max_value=10_000_000, value=0, step=2000)
-            with cC:
-                detail_order = st.selectbox("Order by", ["date", "collision_severity", "casualties"], index=0)
+                detail_order = st.selectbox("Order by", list(CELL_ROW_ORDER_COLS), index=0)
 
             cols_default = [
                 "date", "year", "month_num",
@@ -438,44 +356,39 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
             ]
             show_cols = st.multiselect("Columns to display", options=cols_default, default=cols_default)
 
-            order_sql = {
-                "date": "date",
-                "collision_severity": "collision_severity",
-                "casualties": "casualties"
-            }[detail_order]
-
-            detail_query = f"""
-            WITH binned AS (
-                SELECT
-                    CAST(FLOOR(latitude  * {scale}) AS BIGINT) AS gx,
-                    CAST(FLOOR(longitude * {scale}) AS BIGINT) AS gy,
-                    date,
-                    year,
-                    month_num,
-                    latitude,
-                    longitude,
-                    collision_severity,
-                    casualties,
-                    vehicles,
-                    weather_conditions,
-                    light_conditions,
-                    road_type
-                FROM geo_events_raw
-                WHERE {where_sql}
-            )
-            SELECT {", ".join(show_cols)}
-            FROM binned
-            WHERE gx = ? AND gy = ?
-            ORDER BY {order_sql} ASC
-            LIMIT ? OFFSET ?;
-            """
+            # Keyset pagination state: start key of every page visited so far.
+            # Any change to cell / filters / ordering / page size restarts at page 1.
+            page_sig = (cell, scale, ring, where_sql, tuple(params), detail_order, int(detail_limit))
+            if st.session_state.get("hotspot_detail_sig") != page_sig:
+                st.session_state.hotspot_detail_sig = page_sig
+                st.session_state.hotspot_detail_keys = [None]
+                st.session_state.hotspot_details_loaded = False
 
-            run_details = st.button("Load details", type="primary")
+            if st.button("Load details", type="primary"):
+                st.session_state.hotspot_details_loaded = True
 
-            if run_details:
+            if st.session_state.hotspot_details_loaded:
                 try:
-                    dparams = params + [gx_sel, gy_sel, int(detail_limit), int(detail_offset)]
-                    detail_df = con.execute(detail_query, dparams).df()
+                    page_keys = st.session_state.hotspot_detail_keys
+                    page_no = len(page_keys)
+                    detail_df, next_key = get_cell_rows(
+                        con, where_sql, params, cell, scale,
+                        columns=show_cols, order_col=detail_order,
+                        limit=int(detail_limit), after=page_keys[-1], ring=ring,
+                    )
+
+                    # callbacks update the page stack before the (fragment) rerun
+                    pPrev, pInfo, pNext = st.columns([1, 2, 1])
+                    with pPrev:
+                        st.button("← Previous page", disabled=page_no == 1, on_click=page_keys.pop)
+                    with pInfo:
+                        st.caption(f"Page {page_no} · {len(detail_df):,} rows")
+                    with pNext:
+                        st.button(
+                            "Next page →", disabled=next_key is None,
+                            on_click=page_keys.append, args=(next_key,),
+                        )
+
                     st.dataframe(detail_df, use_container_width=True)
 
                     st.markdown("#### Map of raw points in this cell (Heatmap-style)")
@@ -486,50 +399,45 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
                     if plot_df.empty:
                         st.info("No valid lat/lon points to plot for this cell.")
                     else:
-                        if "date" in plot_df.columns:
-                            plot_df["date"] = plot_df["date"].astype(str)
-                        if "time" in plot_df.columns:
-                            plot_df["time"] = plot_df["time"].astype(str)
-
-                        def get_color(sev: str):
-                            if sev == "Fatal":
-                                return [255, 0, 0, 160]
-                            elif sev == "Serious":
-                                return [255, 165, 0, 160]
-                            else:
-                                return [0, 128, 255, 160]
-
-                        if "collision_severity" in plot_df.columns:
-                            plot_df["color"] = plot_df["collision_severity"].apply(get_color)
-                        else:
-                            plot_df["color"] = [[0, 128, 255, 160]] * len(plot_df)
-
-                        max_points = 8000
-                        if len(plot_df) > max_points:
-                            plot_df = plot_df.sample(n=max_points, random_state=42)
-                            st.caption(f"Too many points. Showing a random sample of {max_points:,}.")
-
-                        layer = pdk.Layer(
-                            "ScatterplotLayer",
+                        if len(plot_df) > MAP_POINT_BUDGET:
+                            # Draw a stratified sample of the whole cell (not just this page),
+                            # computed in DuckDB so only the plotted points are fetched.
+                            # only what the map draws: position, severity colour, tooltip fields
+                            sample_cols = [
+                                c for c in ["collision_severity"] + tooltip_fields(CELL_POINT_TOOLTIP)
+                                if c in show_cols
+                            ]
+                            plot_df = sample_points(
+                                con,
+                                GEO_TABLE,
+                                ["latitude", "longitude"] + list(dict.fromkeys(sample_cols)),
+                                *cell_where(where_sql, params, cell, scale, ring),
+                                budget=MAP_POINT_BUDGET,
+                                strata_scale=scale * 16,
+                                statement="hotspots.cell_sample",
+                            )
+                            st.caption(
+                                f"Too many points. Showing a spatially stratified sample of "
+                                f"{len(plot_df):,} (of {int(plot_df['n_matching'].iloc[0]):,} in this cell)."
+                            )
+
+                        layers, tooltip_html = severity_point_layers(
                             plot_df,
-                            get_position=["longitude", "latitude"],
-                            get_fill_color="color",
-
+                            CELL_POINT_TOOLTIP,
                             get_radius=6,
                             radius_min_pixels=1,
                             radius_max_pixels=6,
 
                             stroked=True,
-                            get_line_color=[255, 255, 255, 220],   
+                            get_line_color=[255, 255, 255, 220],
                             line_width_min_pixels=1,
-                            line_width_max_pixels=1,    
+                            line_width_max_pixels=1,
 
                             filled=True,
                             opacity=0.75,
                             pickable=True,
                         )
 
-
                         mid_lat = plot_df["latitude"].mean()
                         mid_lon = plot_df["longitude"].mean()
 
@@ -544,16 +452,10 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
                         )
 
                         deck = pdk.Deck(
-                            layers=[layer],
+                            layers=layers,
                             initial_view_state=view_state,
                             tooltip={
-                                "html": "<b>Severity:</b> {collision_severity}<br/>"
-                                        "<b>Date:</b> {date}<br/>"
-                                        "<b>Casualties:</b> {casualties}<br/>"
-                                        "<b>Vehicles:</b> {vehicles}<br/>"
-                                        "<b>Weather:</b> {weather_conditions}<br/>"
-                                        "<b>Light:</b> {light_conditions}<br/>"
-                                        "<b>Road:</b> {road_type}",
+                                "html": tooltip_html,
                                 "style": {"backgroundColor": "steelblue", "color": "white"},
                             },
                         )
@@ -572,7 +474,7 @@ def render_hotspots_tab(con, time_mode, selected_year, selected_month, severity_
                     st.download_button(
                         "Download this page (CSV)",
                         data=csv_bytes,
-                        file_name=f"cell_{cell}_limit{detail_limit}_offset{detail_offset}.csv",
+                        file_name=f"cell_{cell}_{detail_order}_page{page_no}.csv",
                         mime="text/csv",
                     )
                 except Exception as e:
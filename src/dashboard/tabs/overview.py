@@ -1,16 +1,21 @@
 # src/dashboard/tabs/overview.py
 import calendar
-from datetime import date
+from datetime import date, timedelta
 import streamlit as st
 import plotly.express as px
 
 from src.dashboard.data import (
-    get_kpi_data,          # 年度 KPI（用 kpi_monthly）
-    get_kpi_range,         # 自定义日期范围 KPI（用 kpi_daily）
+    get_kpi_comparison,    # 多期 KPI 对比（用 kpi_daily，两种时间模式通用）
     get_monthly_trend,     # 年度按月趋势（用 kpi_monthly）
     get_daily_trend_range  # 任意日期范围按日趋势（用 kpi_daily）
 )
+from src.dashboard.fragments import db_fragment
 
+KPI_METRICS = [
+    ("Total Collisions", "total_collisions"),
+    ("Total Casualties", "total_casualties"),
+    ("Vehicles Involved", "total_vehicles"),
+]
 
 def render_overview_tab(con, time_mode, selected_year, selected_month,
                         selected_severity, date_range):
@@ -25,94 +30,78 @@ def render_overview_tab(con, time_mode, selected_year, selected_month,
     st.header("Safety Overview")
 
     # ==========================
-    # Top-level KPI 指标
+    # Top-level KPI 指标（一次查询拿到 当前 / 上一期 / 去年同期 / 近三年均值）
     # ==========================
     col1, col2, col3 = st.columns(3)
 
-    # ---------- Year/Month 模式：用 kpi_monthly ----------
     if time_mode == "Year/Month":
-        # 没选严重程度：全部置 0
-        if not selected_severity:
-            cols_coll = "0"
-            cols_cas = "0"
-            cols_veh = "0"
-        else:
-            # e.g. ['Fatal', 'Serious'] -> "fatal + serious"
-            cols_coll = " + ".join([s.lower() for s in selected_severity])
-            cols_cas = " + ".join([f"{s.lower()}_casualties" for s in selected_severity])
-            cols_veh = " + ".join([f"{s.lower()}_vehicles" for s in selected_severity])
+        period_kwargs = {"year": selected_year, "month": selected_month}
+    elif not date_range or len(date_range) != 2:
+        st.error("Please select a valid date range.")
+        period_kwargs = None
+    else:
+        period_kwargs = {"date_range": date_range}
 
+    if period_kwargs is not None:
         try:
-            kpi_df = get_kpi_data(con, selected_year, (cols_coll, cols_cas, cols_veh))
-            if kpi_df is None or kpi_df.empty:
-                raise ValueError("No KPI data returned for the selected filters.")
-            kpi_data = kpi_df.iloc[0]
-
-            # 尝试拿上一年的数据做 delta
-            prev_year = selected_year - 1
-            try:
-                kpi_prev_df = get_kpi_data(con, prev_year, (cols_coll, cols_cas, cols_veh))
-                if kpi_prev_df is None or kpi_prev_df.empty:
-                    raise ValueError("No KPI data returned for the previous year.")
-                kpi_data_prev = kpi_prev_df.iloc[0]
-
-                delta_col = int(kpi_data["total_collisions"] - kpi_data_prev["total_collisions"])
-                delta_cas = int(kpi_data["total_casualties"] - kpi_data_prev["total_casualties"])
-                delta_veh = int(kpi_data["total_vehicles"] - kpi_data_prev["total_vehicles"])
-
-                col1.metric(
-                    "Total Collisions",
-                    f"{int(kpi_data['total_collisions']):,}",
-                    delta=f"{delta_col:,} vs {prev_year}",
-                )
-                col2.metric(
-                    "Total Casualties",
-                    f"{int(kpi_data['total_casualties']):,}",
-                    delta=f"{delta_cas:,} vs {prev_year}",
-                )
-                col3.metric(
-                    "Vehicles Involved",
-                    f"{int(kpi_data['total_vehicles']):,}",
-                    delta=f"{delta_veh:,} vs {prev_year}",
-                )
-            except Exception:
-                # 没有上一年数据就不展示 delta
-                col1.metric("Total Collisions", f"{int(kpi_data['total_collisions']):,}")
-                col2.metric("Total Casualties", f"{int(kpi_data['total_casualties']):,}")
-                col3.metric("Vehicles Involved", f"{int(kpi_data['total_vehicles']):,}")
+            kpi = get_kpi_comparison(con, selected_severity, **period_kwargs)
+            if kpi is None or not kpi.loc["current", "has_data"]:
+                raise ValueError("No KPI data for the selected period.")
+            labels = _period_labels(time_mode, selected_year, selected_month, date_range)
 
+            for col, (title, metric) in zip((col1, col2, col3), KPI_METRICS):
+                _kpi_metric(col, title, kpi, metric, labels)
         except Exception as e:
             st.error(f"Error calculating KPIs: {e}")
 
-    # ---------- Custom Range 模式：用 kpi_daily ----------
-    else:
-        if not date_range or len(date_range) != 2:
-            st.error("Please select a valid date range.")
-        else:
-            start_date, end_date = date_range
-            try:
-                kpi_df = get_kpi_range(con, start_date, end_date, selected_severity)
-                if kpi_df is None or kpi_df.empty:
-                    raise ValueError("No KPI data for selected date range.")
-                kpi_data = kpi_df.iloc[0]
-
-                col1.metric(
-                    "Total Collisions",
-                    f"{int(kpi_data['total_collisions']):,}",
-                )
-                col2.metric(
-                    "Total Casualties",
-                    f"{int(kpi_data['total_casualties']):,}",
-                )
-                col3.metric(
-                    "Vehicles Involved",
-                    f"{int(kpi_data['total_vehicles']):,}",
-                )
-            except Exception as e:
-                st.error(f"Error calculating KPIs for selected date range: {e}")
-
     st.divider()
 
+    _trends_panel(time_mode, selected_year, selected_month, selected_severity, date_range)
+
+
+def _period_labels(time_mode, selected_year, selected_month, date_range):
+    """delta 文案里用的 上一期 / 去年同期 名称"""
+    if time_mode != "Year/Month":
+        start_date, end_date = date_range
+        days = (end_date - start_date).days + 1
+        return {"previous": f"previous {days} days", "last_year": "same dates last year"}
+    if selected_month == "All":
+        # 整年：上一期就是去年
+        return {"previous": str(selected_year - 1), "last_year": None}
+    prev = date(selected_year, selected_month, 1) - timedelta(days=1)
+    return {
+        "previous": prev.strftime("%b %Y"),
+        "last_year": date(selected_year - 1, selected_month, 1).strftime("%b %Y"),
+    }
+
+
+def _kpi_metric(col, title, kpi, metric, labels):
+    """一个 KPI：delta 对上一期，caption 里再给 去年同期 和 近三年均值"""
+    current = kpi.loc["current", metric]
+
+    delta = None
+    if kpi.loc["previous", "has_data"]:
+        delta = f"{current - kpi.loc['previous', metric]:+,.0f} vs {labels['previous']}"
+    col.metric(title, f"{current:,.0f}", delta=delta)
+
+    notes = []
+    if labels["last_year"] and kpi.loc["last_year", "has_data"]:
+        notes.append(f"{_pct_change(current, kpi.loc['last_year', metric])} vs {labels['last_year']}")
+    if kpi.loc["rolling_3y", "has_data"]:
+        notes.append(f"{_pct_change(current, kpi.loc['rolling_3y', metric])} vs 3-yr avg")
+    if notes:
+        col.caption(" · ".join(notes))
+
+
+def _pct_change(current, baseline):
+    if not baseline:
+        return "n/a"
+    return f"{100 * (current - baseline) / baseline:+.1f}%"
+
+
+@db_fragment
+def _trends_panel(con, time_mode, selected_year, selected_month, selected_severity, date_range):
+    """趋势图（fragment）：切换 Severity Series 只重跑这一块，不重算 KPI / sidebar"""
     # ==========================
     # 时间趋势：按月 / 按日
     # ==========================
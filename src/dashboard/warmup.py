@@ -0,0 +1,193 @@
+# src/dashboard/warmup.py
+"""
+Cache warmup: replay the dashboard's canonical queries after an ETL rebuild,
+so the first analyst to open each tab doesn't pay cold-cache latency.
+
+- In the dashboard, start_warmup() runs the plan once per database build on a
+  background thread, filling the shared query cache (src/shared/query_cache.py).
+- From the CLI it replays the plan and prints timings (useful to check a plan,
+  and it also warms the OS page cache for road_safety.duckdb):
+
+      python -m src.dashboard.warmup [--plan warmup_plan.json]
+
+A plan is a dict; a JSON file passed via --plan (or WARMUP_PLAN) overrides keys of DEFAULT_PLAN.
+Year selectors accept "all", "latest" or a list of years.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import duckdb
+import streamlit as st
+
+from src.shared.config import DB_PATH
+from src.shared.database import get_build_id
+from src.shared.query_builder import Where
+from src.dashboard.data import (
+    DEFAULT_CENTER,
+    DEFAULT_HOTSPOT_GRID,
+    HOTSPOT_GRID_OPTIONS,
+    build_geo_where,
+    build_severity_filter,
+    get_date_range,
+    get_factor_data,
+    get_hotspots,
+    get_kpi_comparison,
+    get_map_bins,
+    get_monthly_trend,
+    get_years,
+)
+from src.dashboard.tabs.heatmap import DEFAULT_FOCUS, DEFAULT_ZOOM, MAP_FOCUS, viewport_bbox, zoom_scale
+
+# Mirrors the dashboard defaults (sidebar, Overview, Hotspots, Environment, Heatmap).
+DEFAULT_PLAN = {
+    "severity": ["Fatal", "Serious", "Slight"],
+    "overview_years": "all",
+    "hotspot_years": "all",
+    "hotspot_grid": DEFAULT_HOTSPOT_GRID,
+    "hotspot_metric": "risk_score",
+    "hotspot_topk": 20,
+    "environment_years": "latest",
+    "environment_factor": "speed_limit",
+    "heatmap_years": "latest",
+}
+
+
+def load_plan(path: str | None = None) -> dict:
+    plan = dict(DEFAULT_PLAN)
+    path = path or os.environ.get("WARMUP_PLAN")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            plan.update(json.load(f))
+    return plan
+
+
+def _pick_years(selector, years: list[int]) -> list[int]:
+    if not years:
+        return []
+    if selector == "all":
+        return list(years)
+    if selector == "latest":
+        return [years[0]]
+    return [int(y) for y in selector if int(y) in years]
+
+
+def canonical_combinations(years: list[int], plan: dict) -> list[tuple[str, dict]]:
+    """
+    Expand a plan into (view, filters) steps, e.g. ("overview", {"year": 2024}).
+    `years` is newest first, as shown in the sidebar.
+    """
+    steps: list[tuple[str, dict]] = [("sidebar", {})]
+    steps += [("overview", {"year": y}) for y in _pick_years(plan["overview_years"], years)]
+    steps += [("hotspots", {"year": y}) for y in _pick_years(plan["hotspot_years"], years)]
+    steps += [("environment", {"year": y}) for y in _pick_years(plan["environment_years"], years)]
+    steps += [("heatmap", {"year": y}) for y in _pick_years(plan["heatmap_years"], years)]
+    return steps
+
+
+def _run_step(con, view: str, filters: dict, plan: dict) -> None:
+    severity_filter = build_severity_filter(plan["severity"])
+
+    if view == "sidebar":
+        get_years(con)
+        get_date_range(con)
+    elif view == "overview":
+        year = filters["year"]
+        get_kpi_comparison(con, plan["severity"], year=year, month="All")
+        get_monthly_trend(con, year, "fatal, serious, slight")
+    elif view == "hotspots":
+        where_sql, params = build_geo_where(year=filters["year"], month="All", severity_filter=severity_filter)
+        get_hotspots(
+            con,
+            where_sql,
+            params,
+            HOTSPOT_GRID_OPTIONS[plan["hotspot_grid"]],
+            metric=plan["hotspot_metric"],
+            topk=plan["hotspot_topk"],
+            center=DEFAULT_CENTER,
+        )
+    elif view == "environment":
+        where = Where().period(year=filters["year"], month="All").extend(severity_filter)
+        get_factor_data(con, where, plan["environment_factor"])
+    elif view == "heatmap":
+        where = Where().period(year=filters["year"], month="All").extend(severity_filter)
+        get_map_bins(
+            con,
+            where,
+            scale=zoom_scale(DEFAULT_ZOOM),
+            bbox=viewport_bbox(MAP_FOCUS[DEFAULT_FOCUS], DEFAULT_ZOOM),
+        )
+    else:
+        raise ValueError(f"Unknown warmup view: {view}")
+
+
+def replay(con, plan: dict | None = None) -> list[dict]:
+    """
+    Run every step of the plan through the regular data-layer functions
+    (and therefore the shared query cache). Returns per-step timings.
+    """
+    plan = plan or load_plan()
+    years = sorted({int(round(y)) for y in get_years(con)}, reverse=True)
+
+    timings = []
+    for view, filters in canonical_combinations(years, plan):
+        t0 = time.perf_counter()
+        error = None
+        try:
+            _run_step(con, view, filters, plan)
+        except Exception as e:
+            error = str(e)
+        timings.append({"view": view, **filters, "seconds": time.perf_counter() - t0, "error": error})
+    return timings
+
+
+def _replay_in_background(pool, plan: dict) -> None:
+    try:
+        with pool.cursor() as con:
+            timings = replay(con, plan)
+        total = sum(t["seconds"] for t in timings)
+        failed = sum(1 for t in timings if t["error"])
+        print(f"[warmup] replayed {len(timings)} steps in {total:.1f}s ({failed} failed)")
+    except Exception as e:
+        print(f"[warmup] aborted: {e}")
+
+
+@st.cache_resource(show_spinner=False)
+def _start_once(build_id: str, _pool):
+    thread = threading.Thread(
+        target=_replay_in_background, args=(_pool, load_plan()), name="cache-warmup", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def start_warmup(pool, con) -> None:
+    """
+    Kick off the warmup for the current database build (no-op if already started).
+    """
+    _start_once(str(get_build_id(con)), pool)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Replay canonical dashboard queries.")
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to road_safety.duckdb")
+    parser.add_argument("--plan", default=None, help="JSON file overriding DEFAULT_PLAN keys")
+    args = parser.parse_args(argv)
+
+    con = duckdb.connect(args.db, read_only=True)
+    try:
+        timings = replay(con, load_plan(args.plan))
+    finally:
+        con.close()
+
+    for t in timings:
+        label = f"{t['view']:<12} {t.get('year', ''):<6}"
+        status = f"ERROR {t['error']}" if t["error"] else "ok"
+        print(f"{label} {t['seconds'] * 1000:8.1f} ms  {status}")
+    print(f"total {sum(t['seconds'] for t in timings):.2f}s over {len(timings)} steps")
+
+
+if __name__ == "__main__":
+    main()
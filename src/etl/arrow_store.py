@@ -0,0 +1,172 @@
+# src/etl/arrow_store.py
+"""
+Arrow IPC (Feather v2) copies of the cleaned tables, for offline analysis.
+
+The ETL writes data/cleaned/<table>.feather next to the cleaned CSVs
+(collision, vehicle, casualty and master). The files are uncompressed and
+rows are grouped by year, one run of record batches per year, so that:
+
+    from src.etl.arrow_store import load_table, open_table
+
+    df = load_table("master", columns=["year", "casualty_type", "age_group"], years=[2022, 2023])
+    tbl = open_table("collision")            # pyarrow.Table
+
+memory-maps the file and returns views on it. Nothing is parsed or copied:
+reopening a table takes milliseconds whatever its size, column projection
+and the year filter only pick columns / record batches, and processes
+reading the same file share its pages through the OS page cache.
+load_table's pandas frame wraps the same buffers (pd.ArrowDtype columns;
+dictionary columns such as the age bands come back as ordered Categoricals,
+which copies only their small integer codes).
+
+pyarrow is optional: without it the ETL skips these files (HAS_PYARROW).
+"""
+import json
+import numbers
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    HAS_PYARROW = False
+
+CLEANED_DIR = Path(__file__).resolve().parents[2] / "data" / "cleaned"
+YEAR_COLUMNS = ("year", "collision_year")  # first one present is used to group rows
+BATCH_ROWS = 256 * 1024
+_META_KEY = b"road_safety.year_batches"
+
+
+def _require_pyarrow() -> None:
+    if not HAS_PYARROW:
+        raise ImportError("Arrow tables need `pyarrow`. Install it with: pip install pyarrow")
+
+
+def feather_path(name: str, directory=None) -> Path:
+    return Path(directory or CLEANED_DIR) / f"{name}.feather"
+
+
+def _year_column(columns) -> str | None:
+    return next((c for c in YEAR_COLUMNS if c in columns), None)
+
+
+def _to_arrow(df: pd.DataFrame) -> "pa.Table":
+    df = pd.DataFrame(df)  # a GeoDataFrame becomes a plain frame; data is not copied
+    if "geometry" in df.columns and df["geometry"].map(lambda g: hasattr(g, "wkb")).any():
+        df["geometry"] = df["geometry"].map(lambda g: g.wkb if hasattr(g, "wkb") else None)  # WKB bytes
+    for col in df.columns:
+        # cleaned columns can mix decoded labels with unmapped raw codes
+        if df[col].dtype == "object" and col != "geometry":
+            df[col] = df[col].astype("string")
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _year_groups(years: pd.Series) -> list[tuple[str | None, np.ndarray]]:
+    """
+    (year, row positions) for each year in ascending order, missing years last as
+    one group (year None). Rows keep their order within a year (stable argsort);
+    only the int64 positions are allocated, never a sorted copy of the frame.
+    """
+    key = pd.to_numeric(years, errors="coerce").to_numpy(dtype="float64", na_value=np.inf)
+    order = np.argsort(key, kind="stable")
+    ordered = key[order]
+    bounds = [0, *(np.flatnonzero(ordered[1:] != ordered[:-1]) + 1).tolist(), len(order)]
+    return [
+        (str(int(ordered[start])) if np.isfinite(ordered[start]) else None, order[start:stop])
+        for start, stop in zip(bounds, bounds[1:])
+        if stop > start
+    ]
+
+
+def write_feather(df: pd.DataFrame, path, batch_rows: int = BATCH_ROWS) -> Path:
+    """
+    Write `df` as an uncompressed Feather v2 file, rows grouped by year (stable
+    order on `year` / `collision_year` when present). The batch range of each
+    year is stored in the schema metadata for open_table(years=...).
+
+    The frame itself is not sorted: each batch gathers its rows by position from
+    the Arrow table and is written before the next one is built, so peak memory
+    stays at the Arrow copy plus one batch (`master` is the largest frame the ETL
+    holds).
+    """
+    _require_pyarrow()
+    path = Path(path)
+    year_col = _year_column(df.columns)
+    table = _to_arrow(df)
+    data = table.combine_chunks()  # one chunk per column: zero-copy unless from_pandas split a column
+    data = data.to_batches()[0] if data.num_rows else None
+
+    # one (slice start, None) or (None, row positions) per output batch
+    chunks, year_batches = [], {}
+    if year_col is not None:
+        for year, rows in _year_groups(df[year_col]):
+            first = len(chunks)
+            chunks.extend((None, rows[i:i + batch_rows]) for i in range(0, len(rows), batch_rows))
+            if year is not None:
+                year_batches[year] = [first, len(chunks)]
+    else:
+        chunks = [(i, None) for i in range(0, table.num_rows, batch_rows)]
+
+    meta = dict(table.schema.metadata or {})
+    meta[_META_KEY] = json.dumps({"column": year_col, "batches": year_batches}).encode()
+    schema = table.schema.with_metadata(meta)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".feather.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for start, rows in chunks:
+            batch = data.slice(start, batch_rows) if rows is None else data.take(pa.array(rows))
+            writer.write_batch(batch)
+    tmp.replace(path)
+    return path
+
+
+def write_tables(tables: dict[str, pd.DataFrame], directory=None) -> dict[str, Path]:
+    """write_feather each frame to <directory>/<name>.feather; returns {name: path}."""
+    return {name: write_feather(df, feather_path(name, directory)) for name, df in tables.items()}
+
+
+def open_table(name_or_path, columns=None, years=None, directory=None) -> "pa.Table":
+    """
+    Memory-map a table written by write_feather and return a zero-copy pyarrow.Table.
+
+    name_or_path: "collision" / "vehicle" / "casualty" / "master", or a .feather path
+    columns: optional list of columns to keep (in that order)
+    years: optional year or list of years; selects the matching record batches
+    """
+    _require_pyarrow()
+    path = Path(name_or_path)
+    if path.suffix != ".feather":
+        path = feather_path(str(name_or_path), directory)
+    reader = pa.ipc.open_file(pa.memory_map(str(path), "r"))
+
+    if years is None:
+        table = reader.read_all()
+    else:
+        meta = json.loads((reader.schema.metadata or {}).get(_META_KEY, b"{}"))
+        if not meta.get("column"):
+            raise ValueError(f"{path.name} has no year column to filter on")
+        # any scalar (int, str, numpy integer such as df['year'].max()) is one year
+        wanted = [years] if isinstance(years, (numbers.Integral, str)) or np.isscalar(years) else years
+        batches = [
+            reader.get_batch(i)
+            for year in sorted({str(int(y)) for y in wanted})
+            for i in range(*meta["batches"].get(year, (0, 0)))
+        ]
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+    return table.select(list(columns)) if columns is not None else table
+
+
+def _pandas_type(arrow_type):
+    # dictionary columns (pandas Categoricals on the way in) go back to Categoricals
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def load_table(name_or_path, columns=None, years=None, directory=None) -> pd.DataFrame:
+    """open_table() as a pandas DataFrame backed by the memory-mapped Arrow buffers."""
+    table = open_table(name_or_path, columns=columns, years=years, directory=directory)
+    return table.to_pandas(types_mapper=_pandas_type)
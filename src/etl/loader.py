@@ -1,8 +1,13 @@
 # src/etl/loader.py
 
+import uuid
+
 import duckdb
 import pandas as pd
 
+from src.shared.config import GEO_COORD_TYPE, GRID_SCALE
+from src.shared.spatial import MAX_CELL_LEVEL, cell_center_sql, cell_key_sql, cell_level
+
 gpd = None
 GEO_DATAFRAME_TYPE = None
 try:
@@ -12,14 +17,136 @@ try:
 except ImportError:
     HAS_GEOPANDAS = False
 
+# Supported geo_events coordinate types (see GEO_COORD_TYPE). FLOAT is not offered:
+# DuckDB's ALP codec stores 6-decimal DOUBLEs more compactly than float32.
+GEO_COORD_TYPES = ("DECIMAL(9,6)", "DOUBLE")
+
+
+def _create_view(con, name: str, select_sql: str) -> None:
+    """CREATE OR REPLACE VIEW, dropping a table of the same name left by an older ETL run."""
+    is_table = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [name]
+    ).fetchone()[0]
+    if is_table:
+        con.execute(f"DROP TABLE {name};")
+    con.execute(f"CREATE OR REPLACE VIEW {name} AS {select_sql};")
+
+
+def _create_geo_grid_tables(con, grid_scale: int) -> None:
+    """
+    Materialize the pre-binned tables used by the Condition-aware Hotspots tab.
+
+    - geo_grid_events: view binning every geo_events row at grid_scale (cells
+      per degree, a power of two); nothing is stored, it is there for ad-hoc queries.
+    - geo_grid_agg: collisions / casualties / risk_score per
+      (year, cell_key, weather, light, road_type, severity). The tab's dropdowns and
+      ranking query read this table instead of the raw point set. Rows are
+      written ORDER BY year so DuckDB zone maps can skip whole row groups for
+      `WHERE year = ?`.
+
+    Cells are geo_events.cell_key shifted to grid_scale's level, so they line up
+    with the Hotspots tab's cells at the same scale.
+    """
+    scale = int(grid_scale)
+    level = cell_level(scale)  # ValueError unless a power of two
+    shift = 2 * (MAX_CELL_LEVEL - level)
+    grid_lat, grid_lon = cell_center_sql("cell_key", level)
+
+    print(f"Creating geo_grid_events / geo_grid_agg (grid_scale={scale} cells per degree)...")
+    _create_view(
+        con,
+        "geo_grid_events",
+        f"""
+        WITH binned AS (
+            SELECT * REPLACE (cell_key >> {shift} AS cell_key)
+            FROM geo_events
+        )
+        SELECT
+            cell_key,
+            {grid_lat} AS grid_lat,
+            {grid_lon} AS grid_lon,
+            latitude,
+            longitude,
+            date,
+            year,
+            month_num,
+            collision_severity,
+            weather_conditions,
+            light_conditions,
+            road_type,
+            casualties,
+            vehicles
+        FROM binned
+        """,
+    )
+
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE geo_grid_agg AS
+        WITH agg AS (
+            SELECT
+                year,
+                cell_key >> {shift} AS cell_key,
+                weather_conditions,
+                light_conditions,
+                road_type,
+                collision_severity,
+                COUNT(*)        AS collisions,
+                SUM(casualties) AS casualties,
+                SUM(
+                    CASE
+                        WHEN collision_severity = 'Fatal' THEN 3
+                        WHEN collision_severity = 'Serious' THEN 2
+                        WHEN collision_severity = 'Slight' THEN 1
+                        ELSE 0
+                    END
+                ) AS risk_score
+            FROM geo_events
+            GROUP BY ALL
+        ),
+        cells AS (
+            -- decode each cell's centroid once, not once per condition combination
+            SELECT cell_key, {grid_lat} AS grid_lat, {grid_lon} AS grid_lon
+            FROM (SELECT DISTINCT cell_key FROM agg)
+        )
+        SELECT
+            year,
+            cell_key,
+            grid_lat,
+            grid_lon,
+            weather_conditions,
+            light_conditions,
+            road_type,
+            collision_severity,
+            collisions,
+            casualties,
+            risk_score
+        FROM agg
+        JOIN cells USING (cell_key)
+        ORDER BY year, cell_key;
+        """
+    )
+
+    # Record the scale so the dashboard can describe cell size without guessing.
+    con.execute(f"CREATE OR REPLACE TABLE geo_grid_meta AS SELECT {scale} AS grid_scale;")
 
-def save_to_duckdb(cleaned_dfs: dict[str, pd.DataFrame], db_path: str) -> None:
+
+def save_to_duckdb(
+    cleaned_dfs: dict[str, pd.DataFrame],
+    db_path: str,
+    grid_scale: int = GRID_SCALE,
+    coord_type: str = GEO_COORD_TYPE,
+) -> None:
     """
     Saves cleaned dataframes to a DuckDB database file.
 
     cleaned_dfs: dict, e.g. {"collision": df_collision, "vehicle": df_vehicle, ...}
     db_path: path to road_safety.duckdb
+    grid_scale: cells per degree for the pre-binned geo_grid_agg table
+    coord_type: storage type of geo_events latitude / longitude, one of GEO_COORD_TYPES
     """
+    if coord_type not in GEO_COORD_TYPES:
+        raise ValueError(f"coord_type must be one of {GEO_COORD_TYPES}, got {coord_type!r}")
     print(f"Creating DuckDB database at {db_path}...")
     con = duckdb.connect(str(db_path))
 
@@ -58,7 +185,9 @@ def save_to_duckdb(cleaned_dfs: dict[str, pd.DataFrame], db_path: str) -> None:
         # -----------------------------
         # 2) Pre-aggregated tables (existing)
         # -----------------------------
-        print("Creating pre-aggregated tables (kpi_monthly, by_hour, by_dow, collision_geopoints, kpi_daily)...")
+        print("Creating pre-aggregated tables (kpi_monthly, by_hour, by_dow, kpi_daily)...")
+        # Integer SUM()s are HUGEINT in DuckDB; on disk those scan ~10x slower than
+        # BIGINT, so the KPI count columns are stored as BIGINT.
 
         con.execute(
             """
@@ -67,15 +196,15 @@ def save_to_duckdb(cleaned_dfs: dict[str, pd.DataFrame], db_path: str) -> None:
                 year, 
                 month_num, 
                 month, 
-                SUM(CASE WHEN collision_severity = 'Fatal' THEN 1 ELSE 0 END) as fatal,
-                SUM(CASE WHEN collision_severity = 'Serious' THEN 1 ELSE 0 END) as serious,
-                SUM(CASE WHEN collision_severity = 'Slight' THEN 1 ELSE 0 END) as slight,
-                SUM(CASE WHEN collision_severity = 'Fatal' THEN number_of_casualties ELSE 0 END) as fatal_casualties,
-                SUM(CASE WHEN collision_severity = 'Serious' THEN number_of_casualties ELSE 0 END) as serious_casualties,
-                SUM(CASE WHEN collision_severity = 'Slight' THEN number_of_casualties ELSE 0 END) as slight_casualties,
-                SUM(CASE WHEN collision_severity = 'Fatal' THEN number_of_vehicles ELSE 0 END) as fatal_vehicles,
-                SUM(CASE WHEN collision_severity = 'Serious' THEN number_of_vehicles ELSE 0 END) as serious_vehicles,
-                SUM(CASE WHEN collision_severity = 'Slight' THEN number_of_vehicles ELSE 0 END) as slight_vehicles,
+                SUM(CASE WHEN collision_severity = 'Fatal' THEN 1 ELSE 0 END)::BIGINT as fatal,
+                SUM(CASE WHEN collision_severity = 'Serious' THEN 1 ELSE 0 END)::BIGINT as serious,
+                SUM(CASE WHEN collision_severity = 'Slight' THEN 1 ELSE 0 END)::BIGINT as slight,
+                SUM(CASE WHEN collision_severity = 'Fatal' THEN number_of_casualties ELSE 0 END)::BIGINT as fatal_casualties,
+                SUM(CASE WHEN collision_severity = 'Serious' THEN number_of_casualties ELSE 0 END)::BIGINT as serious_casualties,
+                SUM(CASE WHEN collision_severity = 'Slight' THEN number_of_casualties ELSE 0 END)::BIGINT as slight_casualties,
+                SUM(CASE WHEN collision_severity = 'Fatal' THEN number_of_vehicles ELSE 0 END)::BIGINT as fatal_vehicles,
+                SUM(CASE WHEN collision_severity = 'Serious' THEN number_of_vehicles ELSE 0 END)::BIGINT as serious_vehicles,
+                SUM(CASE WHEN collision_severity = 'Slight' THEN number_of_vehicles ELSE 0 END)::BIGINT as slight_vehicles,
                 SUM(CASE WHEN collision_severity = 'Fatal' THEN 1 ELSE 0 END) as adj_fatal,
                 SUM(collision_adjusted_severity_serious) as adj_serious,
                 SUM(collision_adjusted_severity_slight) as adj_slight
@@ -112,27 +241,6 @@ def save_to_duckdb(cleaned_dfs: dict[str, pd.DataFrame], db_path: str) -> None:
             """
         )
 
-        con.execute(
-            """
-            CREATE OR REPLACE TABLE collision_geopoints AS
-            SELECT 
-                latitude, 
-                longitude,
-                year,
-                month_num,
-                collision_severity,
-                date,
-                time,
-                number_of_casualties,
-                number_of_vehicles,
-                road_type,
-                weather_conditions,
-                light_conditions
-            FROM collision 
-            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-            """
-        )
-
         print("Creating kpi_daily (daily aggregated KPI table)...")
         con.execute(
             """
@@ -142,9 +250,9 @@ def save_to_duckdb(cleaned_dfs: dict[str, pd.DataFrame], db_path: str) -> None:
                 year,
                 month_num,
                 collision_severity,
-                COUNT(*)                  AS collisions,
-                SUM(number_of_casualties) AS casualties,
-                SUM(number_of_vehicles)   AS vehicles
+                COUNT(*)                          AS collisions,
+                SUM(number_of_casualties)::BIGINT AS casualties,
+                SUM(number_of_vehicles)::BIGINT   AS vehicles
             FROM collision
             GROUP BY date, year, month_num, collision_severity
             ORDER BY date;
@@ -152,45 +260,87 @@ def save_to_duckdb(cleaned_dfs: dict[str, pd.DataFrame], db_path: str) -> None:
         )
 
         # -----------------------------
-        # 3) Scheme A: geo_events_raw (NEW)
+        # 3) geo_events: the one geo fact table
         # -----------------------------
-        # This is a "raw geo fact table" used by the Hotspots tab.
-        # We do NOT pre-materialize grid tables with a fixed GRID_SCALE.
-        # Instead, the dashboard dynamically bins points into neighborhoods
-        # using a user-selected grid size at query time.
-        print("Creating geo_events_raw (raw geo fact table for dynamic neighborhood aggregation)...")
+        # One row per geo-located collision with every column the map and
+        # Hotspots tabs read; each dashboard query selects only the columns
+        # its tab declares (see src/dashboard/data.py). The Hotspots tab bins
+        # points into neighborhoods at a user-selected grid size at query time;
+        # the fixed-scale grid tables for Condition-aware Hotspots are built in
+        # step 4. Rows are sorted by (year, latitude) so per-year scans and
+        # radius / viewport bounding boxes skip row groups through DuckDB's
+        # min/max zone maps (no ART indexes: they cost file size and are not
+        # used for range filters). Coordinates are stored as coord_type; with
+        # DECIMAL(9,6) they are integer micro-degrees, which bit-pack smaller
+        # than DOUBLEs and make range filters integer comparisons.
+        # cell_key is the finest hierarchical grid cell of each collision
+        # (src/shared/spatial.py): any coarser Hotspots cell is a right shift of it.
+        print(f"Creating geo_events (geo fact table for the map and Hotspots tabs, {coord_type} coordinates)...")
         con.execute(
+            f"""
+            CREATE OR REPLACE TABLE geo_events AS
+            SELECT
+                *,
+                {cell_key_sql("latitude", "longitude")} AS cell_key
+            FROM (
+                SELECT
+                    CAST(latitude  AS {coord_type}) AS latitude,
+                    CAST(longitude AS {coord_type}) AS longitude,
+                    date,
+                    time,
+                    year,
+                    month_num,
+                    collision_severity,
+                    weather_conditions,
+                    light_conditions,
+                    road_type,
+                    number_of_casualties AS casualties,
+                    number_of_vehicles   AS vehicles
+                FROM collision
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            )
+            ORDER BY year, latitude;
+            """
+        )
+
+        # The two point tables geo_events replaces, kept as views for notebooks
+        # and older queries; they store nothing.
+        _create_view(
+            con,
+            "geo_events_raw",
             """
-            CREATE OR REPLACE TABLE geo_events_raw AS
             SELECT
-                latitude,
-                longitude,
-                date,
-                year,
-                month_num,
-                collision_severity,
-                weather_conditions,
-                light_conditions,
-                road_type,
-                number_of_casualties AS casualties,
-                number_of_vehicles   AS vehicles
-            FROM collision
-            WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+                latitude, longitude, date, year, month_num, collision_severity,
+                weather_conditions, light_conditions, road_type, casualties, vehicles
+            FROM geo_events
+            """,
+        )
+        _create_view(
+            con,
+            "collision_geopoints",
             """
+            SELECT
+                latitude, longitude, year, month_num, collision_severity, date, time,
+                casualties AS number_of_casualties,
+                vehicles   AS number_of_vehicles,
+                road_type, weather_conditions, light_conditions
+            FROM geo_events
+            """,
         )
 
-        # Optional indexes to speed up filters (DuckDB indexing support may vary by version)
+        # -----------------------------
+        # 4) geo_grid_events / geo_grid_agg (fixed GRID_SCALE)
+        # -----------------------------
+        _create_geo_grid_tables(con, grid_scale)
+
         try:
-            con.execute("CREATE INDEX IF NOT EXISTS idx_geo_events_raw_year ON geo_events_raw(year);")
-            con.execute("CREATE INDEX IF NOT EXISTS idx_geo_events_raw_month ON geo_events_raw(month_num);")
-            # date might be stored as string; we still can query with date::DATE in SQL.
-            con.execute("CREATE INDEX IF NOT EXISTS idx_geo_events_raw_date ON geo_events_raw(date);")
-            print("[opt] indexed geo_events_raw(year, month_num, date)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_geo_grid_agg_year ON geo_grid_agg(year);")
+            print("[opt] indexed geo_grid_agg(year)")
         except Exception as e:
-            print(f"[opt] Could not index geo_events_raw: {e}")
+            print(f"[opt] Could not index geo_grid_agg: {e}")
 
         # -----------------------------
-        # 4) Optimizations / Indexes (existing)
+        # 5) Optimizations / Indexes (existing)
         # -----------------------------
         try:
             con.execute("CREATE INDEX IF NOT EXISTS idx_kpi_daily_date ON kpi_daily(date);")
@@ -218,6 +368,16 @@ def save_to_duckdb(cleaned_dfs: dict[str, pd.DataFrame], db_path: str) -> None:
             except Exception as e:
                 print(f"[opt] Failed to run '{stmt}': {e}")
 
+        # -----------------------------
+        # 6) Build metadata
+        # -----------------------------
+        # A fresh build_id per ETL run lets the dashboard drop cached query results
+        # computed against an older build of the file.
+        con.execute(
+            "CREATE OR REPLACE TABLE etl_metadata AS SELECT ? AS build_id, now()::TIMESTAMP AS built_at, ? AS grid_scale;",
+            [uuid.uuid4().hex, int(grid_scale)],
+        )
+
         print("DuckDB database created successfully.")
 
     finally:
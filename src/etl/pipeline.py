@@ -242,13 +242,14 @@ if __name__ == "__main__":
 
 # src/etl/pipeline.py
 import pandas as pd
-import geopandas as gpd
 from pathlib import Path
 
 from .cleaning import clean_dataset
 from .geo import format_sf
 from .transformation import add_derived_features, merge_datasets
+from .arrow_store import HAS_PYARROW, write_tables
 from .loader import save_to_duckdb
+from .schema import load_schema
 
 
 START_YEAR = 2000
@@ -277,45 +278,23 @@ def _filter_year_range(df: pd.DataFrame, table_type: str) -> pd.DataFrame:
     return df
 
 
-def _load_schema(base_dir: Path) -> pd.DataFrame:
-    """
-    1) Prefer CSV at ref/stats19/data-raw/stats19_schema.csv
-    2) If missing, fallback to bundled RDA at ref/stats19/data/stats19_schema.rda
-       (export CSV for future runs).
-    """
-    csv_path = base_dir / "ref" / "stats19" / "data-raw" / "stats19_schema.csv"
-    if csv_path.exists():
-        return pd.read_csv(csv_path)
-
-    rda_path = base_dir / "ref" / "stats19" / "data" / "stats19_schema.rda"
-    if rda_path.exists():
-        try:
-            import pyreadr  # type: ignore
-        except ImportError as e:
-            raise ImportError(
-                "Schema CSV is missing and fallback requires `pyreadr`.\n"
-                "Install it with: pip install pyreadr"
-            ) from e
-
-        res = pyreadr.read_r(str(rda_path))
-
-        if "stats19_schema" in res:
-            df = res["stats19_schema"]
-        else:
-            # If object name differs, take the first object
-            df = next(iter(res.values()))
-
-        csv_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(csv_path, index=False)
-        print(f"[INFO] Exported schema CSV to: {csv_path}")
-        return df
+def _enforce_foreign_keys(cleaned_dfs: dict[str, pd.DataFrame]) -> None:
+    """Drop vehicle / casualty rows whose collision_index has no collision (in place)."""
+    if "collision" in cleaned_dfs and "collision_index" in cleaned_dfs["collision"].columns:
+        print("Enforcing foreign key consistency...")
+        valid_indices = set(cleaned_dfs["collision"]["collision_index"].dropna().unique())
 
-    raise FileNotFoundError(
-        "Schema not found.\n"
-        f"Expected CSV: {csv_path}\n"
-        f"Or bundled RDA: {rda_path}\n"
-        "Fix by generating the CSV (or adding the RDA) under ref/stats19/."
-    )
+        for table_type in ["vehicle", "casualty"]:
+            if table_type in cleaned_dfs and "collision_index" in cleaned_dfs[table_type].columns:
+                df2 = cleaned_dfs[table_type]
+                n_before = len(df2)
+                df2 = df2[df2["collision_index"].isin(valid_indices)]
+                n_dropped = n_before - len(df2)
+                cleaned_dfs[table_type] = df2
+                if n_dropped > 0:
+                    print(f"Dropped {n_dropped} orphaned records from {table_type}.")
+    else:
+        print("[WARN] Cannot enforce FK consistency (collision table missing or no collision_index).")
 
 
 def run_pipeline() -> None:
@@ -325,7 +304,7 @@ def run_pipeline() -> None:
     cleaned_dir.mkdir(parents=True, exist_ok=True)
 
     print("Loading schema...")
-    schema_df = _load_schema(base_dir)
+    schema_df = load_schema(base_dir)
 
     cleaned_dfs: dict[str, pd.DataFrame] = {"code_map": schema_df}
 
@@ -391,22 +370,7 @@ def run_pipeline() -> None:
 
     print("\n=== Finished cleaning all base tables ===")
 
-    # Enforce Foreign Key Consistency
-    if "collision" in cleaned_dfs and "collision_index" in cleaned_dfs["collision"].columns:
-        print("Enforcing foreign key consistency...")
-        valid_indices = set(cleaned_dfs["collision"]["collision_index"].dropna().unique())
-
-        for table_type in ["vehicle", "casualty"]:
-            if table_type in cleaned_dfs and "collision_index" in cleaned_dfs[table_type].columns:
-                df2 = cleaned_dfs[table_type]
-                n_before = len(df2)
-                df2 = df2[df2["collision_index"].isin(valid_indices)]
-                n_dropped = n_before - len(df2)
-                cleaned_dfs[table_type] = df2
-                if n_dropped > 0:
-                    print(f"Dropped {n_dropped} orphaned records from {table_type}.")
-    else:
-        print("[WARN] Cannot enforce FK consistency (collision table missing or no collision_index).")
+    _enforce_foreign_keys(cleaned_dfs)
 
     # Merge master
     if all(k in cleaned_dfs for k in ["collision", "vehicle", "casualty"]):
@@ -419,6 +383,13 @@ def run_pipeline() -> None:
     else:
         print("[WARN] Skipping master merge (missing one of collision/vehicle/casualty).")
 
+    # Arrow copies of the FK-consistent tables for offline analysis (src/etl/arrow_store.py)
+    if HAS_PYARROW:
+        print(f"Writing Feather tables to {cleaned_dir}...")
+        write_tables({k: v for k, v in cleaned_dfs.items() if k != "code_map"}, cleaned_dir)
+    else:
+        print("[WARN] pyarrow not installed; skipping Feather tables.")
+
     # Save to DuckDB
     db_path = base_dir / "road_safety.duckdb"
     save_to_duckdb(cleaned_dfs, str(db_path))
@@ -0,0 +1,45 @@
+# src/etl/schema.py
+from pathlib import Path
+
+import pandas as pd
+
+
+def load_schema(base_dir: Path) -> pd.DataFrame:
+    """
+    1) Prefer CSV at ref/stats19/data-raw/stats19_schema.csv
+    2) If missing, fallback to bundled RDA at ref/stats19/data/stats19_schema.rda
+       (export CSV for future runs).
+    """
+    csv_path = base_dir / "ref" / "stats19" / "data-raw" / "stats19_schema.csv"
+    if csv_path.exists():
+        return pd.read_csv(csv_path)
+
+    rda_path = base_dir / "ref" / "stats19" / "data" / "stats19_schema.rda"
+    if rda_path.exists():
+        try:
+            import pyreadr  # type: ignore
+        except ImportError as e:
+            raise ImportError(
+                "Schema CSV is missing and fallback requires `pyreadr`.\n"
+                "Install it with: pip install pyreadr"
+            ) from e
+
+        res = pyreadr.read_r(str(rda_path))
+
+        if "stats19_schema" in res:
+            df = res["stats19_schema"]
+        else:
+            # If object name differs, take the first object
+            df = next(iter(res.values()))
+
+        csv_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(csv_path, index=False)
+        print(f"[INFO] Exported schema CSV to: {csv_path}")
+        return df
+
+    raise FileNotFoundError(
+        "Schema not found.\n"
+        f"Expected CSV: {csv_path}\n"
+        f"Or bundled RDA: {rda_path}\n"
+        "Fix by generating the CSV (or adding the RDA) under ref/stats19/."
+    )
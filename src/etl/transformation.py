@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from src.shared.config import AGE_BANDS, AGE_UNKNOWN
+
 def merge_datasets(collision, vehicle, casualty):
     """
     Merges collision, vehicle, and casualty datasets.
@@ -14,9 +17,27 @@ def merge_datasets(collision, vehicle, casualty):
     
     return master
 
-def add_derived_features(df, table_type):
+def band_ages(age, edges, labels):
+    """
+    Bins ages into an ordered Categorical of `labels` + 'Unknown'.
+
+    Same bins as pd.cut(age, edges, labels=labels) (age in labels[i] when
+    edges[i] < age <= edges[i + 1]); missing and out-of-range ages get 'Unknown'.
+    Codes come straight from np.searchsorted, so no per-row strings are built.
+    """
+    edges = np.asarray(edges, dtype=float)
+    if len(labels) != len(edges) - 1 or np.any(np.diff(edges) <= 0):
+        raise ValueError(f"need increasing edges and one label per bin, got {list(edges)} / {list(labels)}")
+    codes = np.searchsorted(edges, np.asarray(age, dtype=float), side='left') - 1  # NaN sorts last
+    codes[(codes < 0) | (codes >= len(labels))] = len(labels)
+    return pd.Categorical.from_codes(codes.astype(np.int8), categories=[*labels, AGE_UNKNOWN], ordered=True)
+
+
+def add_derived_features(df, table_type, age_bands=AGE_BANDS):
     """
     Adds derived features required by the proposal (Time & Age).
+
+    age_bands: column -> (edges, labels) for the casualty age bands, see config.AGE_BANDS.
     """
     # 1. Time Features (for Collision table)
     if table_type == 'collision' and 'datetime' in df.columns:
@@ -28,13 +49,11 @@ def add_derived_features(df, table_type):
         df['hour'] = dt.hour
         df['day_of_week'] = dt.day_name() # e.g., 'Monday'
     
-    # 2. Age Group (for Casualty table)
+    # 2. Age bands (for Casualty table): age_group plus any other AGE_BANDS schemes
     if table_type == 'casualty' and 'age_of_casualty' in df.columns:
-        print("Adding age_group feature...")
-        bins = [-1, 15, 24, 64, 120]
-        labels = ['Child', 'Young Adult', 'Adult', 'Senior']
+        print(f"Adding age band features ({', '.join(age_bands)})...")
         age_numeric = pd.to_numeric(df['age_of_casualty'], errors='coerce')
-        df['age_group'] = pd.cut(age_numeric, bins=bins, labels=labels)
-        df['age_group'] = df['age_group'].astype(str).replace('nan', 'Unknown')
+        for column, (edges, labels) in age_bands.items():
+            df[column] = band_ages(age_numeric, edges, labels)
 
     return df
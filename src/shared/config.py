@@ -1,3 +1,57 @@
+import os
 from pathlib import Path
 
 DB_PATH = Path('road_safety.duckdb')
+
+# Grid scale (cells per degree) used when the ETL materializes geo_grid_events.
+# A power of two up to 4096 (cells are geo_events.cell_key prefixes, see src/shared/spatial.py);
+# 128 -> ~0.0078° cells (~0.9 km), the Hotspots "~0.9 km" option.
+GRID_SCALE = 128
+
+# Storage type of the geo_events latitude / longitude columns. DECIMAL(9,6) keeps integer
+# micro-degrees (int32, bit-packed on disk; STATS19 publishes 6 decimals); "DOUBLE" keeps
+# the raw floats. Compare them with `python -m benchmarks.geo_coords`.
+GEO_COORD_TYPE = "DECIMAL(9,6)"
+
+# Connection pool: at most POOL_MAX_SIZE script runs hold a DuckDB cursor at once;
+# further runs wait up to POOL_ACQUIRE_TIMEOUT seconds. Queries are interrupted
+# after QUERY_TIMEOUT seconds.
+POOL_MAX_SIZE = 16
+POOL_ACQUIRE_TIMEOUT = 30.0
+QUERY_TIMEOUT = 60.0
+
+# Background threads running view queries (src/dashboard/executor.py); each uses its own cursor.
+QUERY_WORKERS = 8
+
+# Query result cache shared by all sessions (see src/shared/query_cache.py).
+QUERY_CACHE_MAX_BYTES = 512 * 1024 * 1024
+QUERY_CACHE_TTL = 6 * 60 * 60
+
+# Replay the canonical dashboard queries once per database build (src/dashboard/warmup.py).
+WARMUP_ON_START = True
+
+# Query telemetry (src/shared/telemetry.py): the last TELEMETRY_BUFFER queries are kept in
+# memory; every query is also appended to a JSONL log rotated at TELEMETRY_LOG_MAX_BYTES.
+TELEMETRY_BUFFER = 1000
+TELEMETRY_LOG_PATH = Path('logs/query_telemetry.jsonl')
+TELEMETRY_LOG_MAX_BYTES = 10 * 1024 * 1024
+TELEMETRY_LOG_BACKUPS = 5
+
+# The admin sidebar panel (pool / cache / query stats, EXPLAIN ANALYZE) is shown when the
+# URL carries ?admin=<DASHBOARD_ADMIN_TOKEN>; without the env var it is disabled.
+ADMIN_TOKEN = os.environ.get('DASHBOARD_ADMIN_TOKEN')
+
+# Age bandings the ETL adds to the casualty table (src/etl/transformation.py), each as an
+# ordered categorical (a DuckDB ENUM): column -> (bin edges, labels). An age falls in
+# labels[i] when edges[i] < age <= edges[i + 1]; missing or out-of-range ages are AGE_UNKNOWN,
+# the last category.
+AGE_UNKNOWN = 'Unknown'
+AGE_BANDS = {
+    'age_group': ((-1, 15, 24, 64, 120), ('Child', 'Young Adult', 'Adult', 'Senior')),
+    # DfT age_band_of_casualty bands
+    'age_band_dft': ((-1, 5, 10, 15, 20, 25, 35, 45, 55, 65, 75, 120),
+                     ('0-5', '6-10', '11-15', '16-20', '21-25', '26-35', '36-45', '46-55', '56-65', '66-75',
+                      'Over 75')),
+    # bands used in KSI (killed or seriously injured) reporting
+    'age_band_ksi': ((-1, 15, 24, 59, 69, 120), ('0-15', '16-24', '25-59', '60-69', '70+')),
+}
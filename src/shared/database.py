@@ -1,6 +1,99 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 import duckdb
 import streamlit as st
-from .config import DB_PATH
+from .config import (
+    DB_PATH,
+    POOL_MAX_SIZE,
+    POOL_ACQUIRE_TIMEOUT,
+    QUERY_TIMEOUT,
+    QUERY_CACHE_MAX_BYTES,
+    QUERY_CACHE_TTL,
+    TELEMETRY_BUFFER,
+    TELEMETRY_LOG_BACKUPS,
+    TELEMETRY_LOG_MAX_BYTES,
+    TELEMETRY_LOG_PATH,
+)
+from .query_cache import QueryCache, make_key
+from .statements import StatementRegistry
+from .telemetry import QueryTelemetry
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DuckDB cursors over one read-only connection.
+
+    Each Streamlit script run borrows its own cursor (`con.cursor()`), so
+    concurrent sessions don't share statement state on a single connection.
+    At most `max_size` cursors are out at once; `stats()` reports wait times.
+    Returned cursors are kept and lent again, so statements prepared on them
+    (statements.py) are reused across runs.
+    """
+
+    def __init__(self, con, max_size: int = POOL_MAX_SIZE,
+                 acquire_timeout: float = POOL_ACQUIRE_TIMEOUT):
+        self._con = con
+        self.max_size = int(max_size)
+        self.acquire_timeout = float(acquire_timeout)
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._idle: list = []
+        self._in_use = 0
+        self._acquired = 0
+        self._acquire_timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @contextmanager
+    def cursor(self):
+        """
+        Borrow a cursor for the duration of the `with` block.
+        Raises TimeoutError if no slot frees up within acquire_timeout.
+        """
+        t0 = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self._acquire_timeouts += 1
+            raise TimeoutError(
+                f"No database connection available after {self.acquire_timeout:.0f}s "
+                f"({self.max_size} in use)."
+            )
+        waited = time.perf_counter() - t0
+
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        cur = None
+        try:
+            with self._lock:
+                cur = self._idle.pop() if self._idle else None
+            if cur is None:
+                cur = self._con.cursor()
+            yield cur
+        finally:
+            with self._lock:
+                if cur is not None:
+                    self._idle.append(cur)
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "acquired": self._acquired,
+                "acquire_timeouts": self._acquire_timeouts,
+                "wait_avg_ms": 1000 * self._wait_total / self._acquired if self._acquired else 0.0,
+                "wait_max_ms": 1000 * self._wait_max,
+            }
+
 
 @st.cache_resource
 def get_connection():
@@ -20,12 +113,130 @@ def get_connection():
         st.error(f'Failed to connect to database: {e}')
         return None
 
-@st.cache_data
-def run_query(query, _con):
+
+@st.cache_resource
+def get_pool():
+    """
+    Process-wide ConnectionPool over get_connection(), or None if the database is unavailable.
+    """
+    con = get_connection()
+    if con is None:
+        return None
+    return ConnectionPool(con)
+
+
+def execute_query(con, query, params=None, timeout=QUERY_TIMEOUT, statement=None):
+    """
+    Executes a SQL query (optionally with `?` parameters) and returns a DataFrame.
+    The query is interrupted if it runs longer than `timeout` seconds.
+    With `statement` (a name), it runs as a prepared statement via the registry.
+    """
+    timer = None
+    if timeout:
+        timer = threading.Timer(timeout, con.interrupt)
+        timer.daemon = True
+        timer.start()
+    try:
+        if statement:
+            return get_statement_registry().execute(con, statement, query, params)
+        if params is None:
+            return con.execute(query).fetchdf()
+        return con.execute(query, params).fetchdf()
+    except duckdb.InterruptException as e:
+        raise TimeoutError(f"Query exceeded {timeout:.0f}s and was cancelled.") from e
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+
+@st.cache_resource
+def get_statement_registry():
+    """
+    Process-wide registry of prepared dashboard statements (see statements.py).
+    """
+    return StatementRegistry()
+
+
+@st.cache_resource
+def get_query_cache():
+    """
+    Process-wide query result cache shared by every session.
+    """
+    return QueryCache(QUERY_CACHE_MAX_BYTES, ttl=QUERY_CACHE_TTL)
+
+
+@st.cache_resource
+def get_telemetry():
+    """
+    Process-wide query telemetry (see telemetry.py), logging to TELEMETRY_LOG_PATH.
+    Falls back to in-memory only if the log file can't be opened.
+    """
+    try:
+        return QueryTelemetry(TELEMETRY_BUFFER, TELEMETRY_LOG_PATH,
+                              TELEMETRY_LOG_MAX_BYTES, TELEMETRY_LOG_BACKUPS)
+    except OSError:
+        return QueryTelemetry(TELEMETRY_BUFFER)
+
+
+_build_lock = threading.Lock()
+_build_state = {"signature": None, "build_id": None}
+
+
+def get_build_id(con):
+    """
+    Identify the current database build, so cached results from an older
+    build are never served. Re-reads etl_metadata only when the database
+    file's mtime/size change; falls back to that signature if the table is missing.
+    """
+    try:
+        st_ = os.stat(DB_PATH)
+        signature = (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        signature = None
+
+    with _build_lock:
+        if signature is not None and signature == _build_state["signature"]:
+            return _build_state["build_id"]
+
+    try:
+        build_id = con.execute("SELECT build_id FROM etl_metadata LIMIT 1").fetchone()[0]
+    except Exception:
+        build_id = str(signature)
+
+    with _build_lock:
+        _build_state["signature"] = signature
+        _build_state["build_id"] = build_id
+    return build_id
+
+
+def run_query(query, con, params=None, timeout=QUERY_TIMEOUT, statement=None):
     """
     Executes a SQL query and returns the result as a DataFrame.
-    Uses caching to improve performance.
+    Results are served from the shared query cache (keyed on normalized SQL
+    + params) when possible. Canonical dashboard queries pass a `statement`
+    name so cache misses run as prepared statements. Every call is recorded
+    in the query telemetry (get_telemetry()).
     """
-    if _con is None:
+    if con is None:
         return None
-    return _con.execute(query).fetchdf()
+
+    telemetry = get_telemetry()
+    t0 = time.perf_counter()
+    cache = get_query_cache()
+    cache.validate(get_build_id(con))
+
+    key = make_key(query, params)
+    df, nbytes = cache.lookup(key)
+    if df is not None:
+        telemetry.record(query, params, 1000 * (time.perf_counter() - t0), df, "hit", statement, nbytes=nbytes)
+        return df
+
+    try:
+        df = execute_query(con, query, params, timeout=timeout, statement=statement)
+    except Exception as e:
+        telemetry.record(query, params, 1000 * (time.perf_counter() - t0), None, "error", statement,
+                         error=f"{type(e).__name__}: {e}")
+        raise
+    nbytes = cache.put(key, df)
+    telemetry.record(query, params, 1000 * (time.perf_counter() - t0), df, "miss", statement, nbytes=nbytes)
+    return df
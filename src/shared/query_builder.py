@@ -0,0 +1,141 @@
+import datetime as dt
+import re
+
+from .query_cache import make_key
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+
+def ident(name: str) -> str:
+    """
+    Validate a column name (optionally `alias.column`) before it is spliced into SQL.
+    Identifiers can't be bound as parameters, so everything else must go through `?`.
+    """
+    if not isinstance(name, str) or not _IDENT.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+def _param(value):
+    """Normalize a bound value so equal filters give equal params (and cache keys)."""
+    if isinstance(value, (list, tuple)):
+        return [_param(v) for v in value]
+    if isinstance(value, dt.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalar
+        return value.item()
+    return value
+
+
+class Where:
+    """
+    Typed WHERE-clause builder. Predicates are joined with AND and every value is
+    bound as a `?` parameter; only column names (validated) end up in the SQL text.
+
+    The SQL only depends on *which* predicates are used, never on their values
+    (IN-lists bind a single list parameter), so e.g. every year/severity choice
+    shares one statement: DuckDB can reuse the prepared plan and the query cache
+    sees one SQL text per filter shape.
+
+        w = Where().period(year=2024).isin("collision_severity", ["Fatal", "Serious"])
+        w.sql     -> "year = ? AND list_contains(?, collision_severity)"
+        w.params  -> [2024, ["Fatal", "Serious"]]
+
+    Unqualified columns can be prefixed with a table alias at render time
+    (`w.render("col")`), for queries that join several tables.
+    """
+
+    def __init__(self):
+        self._preds: list[tuple[str, str | None, tuple]] = []  # (template, column, params)
+
+    def _add(self, template: str, col: str | None, *params) -> "Where":
+        self._preds.append((template, ident(col) if col is not None else None, tuple(_param(p) for p in params)))
+        return self
+
+    # ---------- predicates ----------
+    def eq(self, col: str, value) -> "Where":
+        """col = value (skipped when value is None)."""
+        if value is None:
+            return self
+        return self._add("{col} = ?", col, value)
+
+    def isin(self, col: str, values) -> "Where":
+        """col IN values (skipped when values is None; an empty selection matches nothing)."""
+        if values is None:
+            return self
+        values = list(values)
+        if not values:
+            return self._add("1=0", None)
+        return self._add("list_contains(?, {col})", col, values)
+
+    def between(self, col: str, low, high) -> "Where":
+        """low <= col <= high."""
+        return self._add("{col} BETWEEN ? AND ?", col, low, high)
+
+    def month(self, col: str, month) -> "Where":
+        """month(col) = month; col is a DATE/TIMESTAMP."""
+        return self._add("month({col}) = ?", col, int(month))
+
+    def period(self, year=None, month=None, date_range=None,
+               date_col: str = "date", month_col: str | None = None) -> "Where":
+        """
+        Sidebar time selection.
+        - date_range=(start, end) (Custom Range mode) takes precedence over year/month
+        - month: "All"/None or 1-12; compared on month_col if the table has one,
+          else on month(date_col)
+        """
+        if date_range:
+            start_date, end_date = date_range
+            return self.between(date_col, start_date, end_date)
+        if year is not None:
+            self.eq("year", int(year))
+            if month is not None and month != "All":
+                if month_col:
+                    self.eq(month_col, int(month))
+                else:
+                    self.month(date_col, month)
+        return self
+
+    def extend(self, other: "Where | None") -> "Where":
+        """Append the predicates of another builder (e.g. the sidebar severity filter)."""
+        if other is not None:
+            self._preds.extend(other._preds)
+        return self
+
+    def copy(self) -> "Where":
+        return Where().extend(self)
+
+    # ---------- output ----------
+    def render(self, alias: str | None = None) -> tuple[str, list]:
+        """(sql, params); unqualified columns are prefixed with `alias.` if given."""
+        parts, params = [], []
+        for template, col, values in self._preds:
+            if col is not None and alias and "." not in col:
+                col = f"{ident(alias)}.{col}"
+            parts.append(template.format(col=col))
+            params.extend(values)
+        return (" AND ".join(parts) if parts else "1=1"), params
+
+    @property
+    def sql(self) -> str:
+        return self.render()[0]
+
+    @property
+    def params(self) -> list:
+        return self.render()[1]
+
+    def key(self) -> tuple:
+        """Stable, hashable identity of this filter (same shape as the query cache keys)."""
+        return make_key(*self.render())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Where) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        sql, params = self.render()
+        return f"Where({sql!r}, {params!r})"
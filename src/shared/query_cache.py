@@ -0,0 +1,128 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Canonical form of a SQL string for cache keys: collapse whitespace and
+    drop trailing semicolons. Case is kept, since it matters inside literals.
+    """
+    return _WS.sub(" ", str(query)).strip().rstrip(";").rstrip()
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def make_key(query: str, params=None) -> tuple:
+    return normalize_sql(query), _freeze(params) if params is not None else ()
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache of query results (DataFrames).
+
+    - Keyed on normalized SQL + parameters (see make_key).
+    - Bounded by total result size in bytes; least recently used entries are evicted.
+    - Entries expire after `ttl` seconds (None = never).
+    - Cleared whenever `validate()` sees a different database build ID.
+
+    Results are copied on the way in and out, so callers may mutate what they get.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float | None = None):
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (df, nbytes, stored_at)
+        self._bytes = 0
+        self._build_id = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def validate(self, build_id) -> None:
+        with self._lock:
+            if build_id != self._build_id:
+                self._clear_locked()
+                self._build_id = build_id
+
+    def get(self, key):
+        return self.lookup(key)[0]
+
+    def lookup(self, key):
+        """(copy of the cached result, its size in bytes), or (None, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] >= self.ttl:
+                self._drop_locked(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            df, nbytes, _ = entry
+        return df.copy(), nbytes
+
+    def put(self, key, df: pd.DataFrame) -> int | None:
+        """Store a result; returns its size in bytes."""
+        if df is None:
+            return None
+        nbytes = frame_nbytes(df)
+        if nbytes > self.max_bytes:
+            return nbytes
+        df = df.copy()
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+            self._entries[key] = (df, nbytes, time.monotonic())
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop_locked(next(iter(self._entries)))
+                self.evictions += 1
+        return nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_locked()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "build_id": self._build_id,
+            }
+
+    def _drop_locked(self, key) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def _clear_locked(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
@@ -0,0 +1,150 @@
+import math
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+
+R_MILES = 3958.8
+MILES_PER_DEG_LAT = R_MILES * math.pi / 180  # ~69.1
+MICRO_DEGREE = Decimal("0.000001")  # resolution of stored coordinates (GEO_COORD_TYPE)
+
+
+def haversine_sql(lat_col: str, lon_col: str) -> str:
+    """
+    Great-circle distance in miles from a centre point to (lat_col, lon_col).
+    Binds 3 parameters, in order: center_lat, center_lat, center_lon.
+    """
+    return f"""
+    ({R_MILES} * 2 * ASIN(SQRT(
+        POW(SIN(RADIANS(({lat_col} - ?) / 2)), 2) +
+        COS(RADIANS(?)) * COS(RADIANS({lat_col})) *
+        POW(SIN(RADIANS(({lon_col} - ?) / 2)), 2)
+    )))
+    """
+
+
+def radius_bbox(lat: float, lon: float, miles: float, pad_deg: float = 0.0):
+    """
+    (min_lat, min_lon, max_lat, max_lon) enclosing every point within `miles` of (lat, lon),
+    widened by pad_deg on each side. Conservative: the longitude span uses the
+    latitude furthest from the equator inside the box.
+    """
+    dlat = miles / MILES_PER_DEG_LAT
+    edge_lat = min(89.0, abs(lat) + dlat)
+    dlon = min(180.0, dlat / math.cos(math.radians(edge_lat)))
+    return (
+        lat - dlat - pad_deg,
+        lon - dlon - pad_deg,
+        lat + dlat + pad_deg,
+        lon + dlon + pad_deg,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Hierarchical grid cells (Morton / quadkey order)
+#
+# At level L the grid has 2**L cells per degree: iy = FLOOR((lat + 90) * 2**L),
+# ix = FLOOR((lon + 180) * 2**L). A cell key interleaves the bits of iy (odd
+# bits) and ix (even bits), so the parent of a cell is key >> 2 and a cell at
+# any coarser level is the finest key shifted right by 2 bits per level. The
+# finest keys of one cell form a contiguous range, and nearby cells get nearby
+# keys. The ETL stores the finest key per collision (geo_events.cell_key).
+# ---------------------------------------------------------------------------
+MAX_CELL_LEVEL = 12                  # 4096 cells per degree, ~27 m north-south
+_AXIS_BITS = MAX_CELL_LEVEL + 9      # 360 * 2**L < 2**(L + 9)
+
+
+def cell_level(scale: int) -> int:
+    """Cells per degree (a power of two up to 2**MAX_CELL_LEVEL) -> grid level."""
+    scale = int(scale)
+    level = scale.bit_length() - 1
+    if scale <= 0 or scale != 1 << level or level > MAX_CELL_LEVEL:
+        raise ValueError(f"Grid scale must be a power of two up to {1 << MAX_CELL_LEVEL}, got {scale}")
+    return level
+
+
+def _interleave(iy: int, ix: int) -> int:
+    key = 0
+    for b in range(_AXIS_BITS):
+        key |= ((iy >> b) & 1) << (2 * b + 1) | ((ix >> b) & 1) << (2 * b)
+    return key
+
+
+def _deinterleave(key: int) -> tuple[int, int]:
+    iy = ix = 0
+    for b in range(_AXIS_BITS):
+        iy |= ((key >> (2 * b + 1)) & 1) << b
+        ix |= ((key >> (2 * b)) & 1) << b
+    return iy, ix
+
+
+def cell_key(lat: float, lon: float, level: int = MAX_CELL_LEVEL) -> int:
+    """Key of the level-`level` cell containing (lat, lon)."""
+    return _interleave(math.floor((lat + 90) * 2 ** level), math.floor((lon + 180) * 2 ** level))
+
+
+def cell_key_sql(lat_col: str, lon_col: str) -> str:
+    """
+    SQL BIGINT expression for the finest-level cell key of (lat_col, lon_col).
+    (DuckDB gives all bitwise operators the same precedence, hence the parentheses.)
+    """
+    iy = f"CAST(FLOOR(({lat_col} + 90) * {1 << MAX_CELL_LEVEL}) AS BIGINT)"
+    ix = f"CAST(FLOOR(({lon_col} + 180) * {1 << MAX_CELL_LEVEL}) AS BIGINT)"
+    terms = [
+        f"((({axis} >> {b}) & 1) << {2 * b + odd})"
+        for b in range(_AXIS_BITS)
+        for axis, odd in ((iy, 1), (ix, 0))
+    ]
+    return "(" + " | ".join(terms) + ")"
+
+
+def cell_center(key: int, level: int) -> tuple[float, float]:
+    """(lat, lon) of the centre of level-`level` cell `key`."""
+    iy, ix = _deinterleave(key)
+    return (iy + 0.5) / 2 ** level - 90, (ix + 0.5) / 2 ** level - 180
+
+
+def cell_center_sql(key_sql: str, level: int) -> tuple[str, str]:
+    """SQL (lat, lon) expressions for the centre of level-`level` cell key_sql."""
+    bits = level + 9
+
+    def axis(odd: int) -> str:
+        return " | ".join(f"(((({key_sql}) >> {2 * b + odd}) & 1) << {b})" for b in range(bits))
+
+    return (
+        f"((({axis(1)}) + 0.5) / {1 << level} - 90)",
+        f"((({axis(0)}) + 0.5) / {1 << level} - 180)",
+    )
+
+
+def cell_key_range(key: int, level: int) -> tuple[int, int]:
+    """[first, last] finest-level keys inside level-`level` cell `key`."""
+    shift = 2 * (MAX_CELL_LEVEL - level)
+    return key << shift, ((key + 1) << shift) - 1
+
+
+def neighbour_keys(key: int, level: int, ring: int = 1) -> list[int]:
+    """Keys of the (2 * ring + 1)**2 cells centred on `key`, at the same level, in key order."""
+    iy, ix = _deinterleave(key)
+    return sorted(
+        _interleave(iy + dy, ix + dx)
+        for dy in range(-ring, ring + 1)
+        for dx in range(-ring, ring + 1)
+        if iy + dy >= 0 and ix + dx >= 0
+    )
+
+
+def coord_params(bbox):
+    """
+    (min_lat, min_lon, max_lat, max_lon) as Decimals rounded outwards to whole micro-degrees,
+    for binding as query parameters.
+
+    Decimal parameters compare natively with both DOUBLE and DECIMAL(9,6) coordinate
+    columns, so DuckDB pushes the range into the scan and skips row groups by their
+    min/max; float parameters would make it cast a DECIMAL column to DOUBLE row by row.
+    Rounding outwards never drops a point stored at micro-degree precision.
+    """
+    min_lat, min_lon, max_lat, max_lon = (Decimal(repr(float(v))) for v in bbox)
+    return (
+        min_lat.quantize(MICRO_DEGREE, ROUND_FLOOR),
+        min_lon.quantize(MICRO_DEGREE, ROUND_FLOOR),
+        max_lat.quantize(MICRO_DEGREE, ROUND_CEILING),
+        max_lon.quantize(MICRO_DEGREE, ROUND_CEILING),
+    )
@@ -0,0 +1,134 @@
+import datetime as dt
+import hashlib
+import math
+import re
+import threading
+import time
+import weakref
+from decimal import Decimal
+
+from .query_cache import normalize_sql
+
+_NAME = re.compile(r"[^A-Za-z0-9_]")
+
+
+def to_positional(query: str) -> str:
+    """
+    `?` placeholders -> `$1, $2, ...` (PREPARE needs numbered parameters).
+    Question marks inside quoted literals/identifiers are left alone.
+    """
+    out, n, quote = [], 0, None
+    for ch in query:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == "?":
+            n += 1
+            out.append(f"${n}")
+            continue
+        out.append(ch)
+    return "".join(out)
+
+
+def sql_literal(value) -> str:
+    """
+    Render a parameter value as a DuckDB literal for EXECUTE, which can't take
+    `?` parameters itself. Only plain data types are accepted.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if hasattr(value, "item") and not isinstance(value, (list, tuple, str)):  # numpy scalar
+        value = value.item()
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(f"Cannot bind non-finite decimal {value!r}")
+        return format(value, "f")
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot bind non-finite float {value!r}")
+        return repr(value)
+    if isinstance(value, dt.datetime):
+        value = value.isoformat(sep=" ")
+    elif isinstance(value, dt.date):
+        value = value.isoformat()
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(sql_literal(v) for v in value) + "]"
+    raise TypeError(f"Unsupported parameter type: {type(value).__name__}")
+
+
+class StatementRegistry:
+    """
+    Named, prepared versions of the dashboard's canonical queries.
+
+    execute(con, name, query, params) PREPAREs the query on that cursor the first
+    time it sees it there (prepared statements live per DuckDB cursor; the pool
+    keeps its cursors, so this is roughly once per cursor) and afterwards only
+    runs EXECUTE with the values, skipping parse/bind/optimize.
+
+    A name may cover a few SQL variants (e.g. one per filter shape); each variant
+    is prepared separately, the stats are kept per name:
+    calls, prepares, total / avg / max execution time in ms.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prepared = weakref.WeakKeyDictionary()  # cursor -> set of handles
+        self._stats: dict[str, dict] = {}
+
+    @staticmethod
+    def handle(name: str, query: str) -> str:
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:10]
+        return f"{_NAME.sub('_', name)}_{digest}"
+
+    def _ensure_prepared(self, con, handle: str, query: str) -> bool:
+        with self._lock:
+            done = self._prepared.setdefault(con, set())
+            if handle in done:
+                return False
+        con.execute(f"PREPARE {handle} AS {to_positional(query)}")
+        with self._lock:
+            self._prepared.setdefault(con, set()).add(handle)
+        return True
+
+    def execute(self, con, name: str, query: str, params=None):
+        """Run `query` (with `?` params) as prepared statement `name` on cursor `con`; returns a DataFrame."""
+        handle = self.handle(name, normalize_sql(query))
+        prepared = self._ensure_prepared(con, handle, query.strip().rstrip(";"))
+
+        args = ", ".join(sql_literal(p) for p in (params or []))
+        sql = f"EXECUTE {handle}({args})" if params else f"EXECUTE {handle}"
+
+        t0 = time.perf_counter()
+        try:
+            return con.execute(sql).fetchdf()
+        finally:
+            self._record(name, 1000 * (time.perf_counter() - t0), prepared)
+
+    def _record(self, name: str, ms: float, prepared: bool) -> None:
+        with self._lock:
+            s = self._stats.setdefault(name, {"calls": 0, "prepares": 0, "total_ms": 0.0, "max_ms": 0.0})
+            s["calls"] += 1
+            s["prepares"] += int(prepared)
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+
+    def stats(self) -> list[dict]:
+        """Per-statement counters, most expensive (cumulative time) first."""
+        with self._lock:
+            rows = [
+                {"statement": name, **s, "avg_ms": s["total_ms"] / s["calls"] if s["calls"] else 0.0}
+                for name, s in self._stats.items()
+            ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
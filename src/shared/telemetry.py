@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from .query_cache import frame_nbytes, make_key, normalize_sql
+
+
+def fingerprint(query: str) -> str:
+    """Short stable ID of a SQL text (after normalize_sql); the same for every parameter value."""
+    return hashlib.sha1(normalize_sql(query).encode("utf-8")).hexdigest()[:12]
+
+
+def params_hash(params) -> str | None:
+    if params is None:
+        return None
+    _, frozen = make_key("", params)
+    return hashlib.sha1(repr(frozen).encode("utf-8")).hexdigest()[:12]
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class QueryTelemetry:
+    """
+    Per-query timings for the dashboard.
+
+    record() is called by run_query for every query, cache hits included, with
+    SQL fingerprint, parameter hash, statement name, wall time, rows, result
+    bytes and hit / miss / error. The last `buffer_size` records stay in memory
+    for the admin panel; if `log_path` is set, each record is also appended as
+    one JSON line to a size-rotated log. Parameter values are never logged, only
+    their hash; the in-memory buffer keeps the last values per fingerprint so
+    explain() can re-run a query with EXPLAIN ANALYZE on demand.
+    """
+
+    def __init__(self, buffer_size: int = 500, log_path=None,
+                 log_max_bytes: int = 10 * 1024 * 1024, log_backups: int = 5):
+        self._lock = threading.Lock()
+        self._records: deque = deque(maxlen=int(buffer_size))
+        self._last: dict[str, tuple[str, object]] = {}  # fingerprint -> (query, params)
+        self._log = None
+        if log_path is not None:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = RotatingFileHandler(log_path, maxBytes=log_max_bytes, backupCount=log_backups,
+                                            encoding="utf-8")
+
+    def record(self, query: str, params, ms: float, df=None, cache: str = "miss",
+               statement: str | None = None, error: str | None = None, nbytes: int | None = None) -> dict:
+        """Record one query; `nbytes` is the result size if already known (else measured)."""
+        fp = fingerprint(query)
+        rec = {
+            "ts": time.time(),
+            "fingerprint": fp,
+            "statement": statement,
+            "params_hash": params_hash(params),
+            "ms": round(ms, 3),
+            "rows": int(len(df)) if df is not None else None,
+            "bytes": nbytes if nbytes is not None else (frame_nbytes(df) if df is not None else None),
+            "cache": cache,
+            "error": error,
+        }
+        with self._lock:
+            self._records.append(rec)
+            self._last[fp] = (query, params)
+        if self._log is not None:
+            self._log.handle(logging.makeLogRecord({"msg": json.dumps(rec)}))
+        return rec
+
+    def records(self, limit: int | None = None) -> list[dict]:
+        """Most recent records, newest first."""
+        with self._lock:
+            recs = list(self._records)
+        recs.reverse()
+        return recs[:limit] if limit else recs
+
+    def summary(self) -> list[dict]:
+        """Per-fingerprint aggregates over the buffered records, slowest (p95) first."""
+        groups: dict[str, list[dict]] = {}
+        for rec in self.records():
+            groups.setdefault(rec["fingerprint"], []).append(rec)
+        rows = []
+        for fp, recs in groups.items():
+            ms = sorted(r["ms"] for r in recs)
+            rows.append({
+                "fingerprint": fp,
+                "statement": next((r["statement"] for r in recs if r["statement"]), None),
+                "calls": len(recs),
+                "hit_rate": sum(r["cache"] == "hit" for r in recs) / len(recs),
+                "errors": sum(r["cache"] == "error" for r in recs),
+                "p50_ms": _percentile(ms, 0.50),
+                "p95_ms": _percentile(ms, 0.95),
+                "max_ms": ms[-1],
+                "rows": recs[0]["rows"],
+            })
+        return sorted(rows, key=lambda r: r["p95_ms"], reverse=True)
+
+    def last_query(self, fp: str):
+        """(query, params) last seen for a fingerprint, or None."""
+        with self._lock:
+            return self._last.get(fp)
+
+    def explain(self, con, fp: str) -> str:
+        """
+        Re-run the last query seen with this fingerprint under EXPLAIN ANALYZE and
+        return DuckDB's profile. Bypasses the result cache; the query really runs.
+        """
+        last = self.last_query(fp)
+        if last is None:
+            raise KeyError(f"No recorded query with fingerprint {fp}")
+        query, params = last
+        sql = "EXPLAIN ANALYZE " + normalize_sql(query)
+        rows = con.execute(sql, params).fetchall() if params is not None else con.execute(sql).fetchall()
+        return "\n".join(str(r[-1]) for r in rows)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._last.clear()
@@ -0,0 +1,109 @@
+import copy
+
+import pandas as pd
+import pytest
+
+from benchmarks.load_test import baseline_mismatch, build_synthetic_db, compare_to_baseline, machine_info, run_load
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {"results": {"p50_ms": 10.0, "p95_ms": 40.0, "p99_ms": 80.0, "qps": 100.0, "errors": 0}}
+    report = copy.deepcopy(baseline)
+    report["results"].update(p95_ms=49.0, qps=81.0)
+    assert compare_to_baseline(report, baseline, tolerance=0.25) == []
+
+    report["results"].update(p99_ms=101.0, qps=79.0, errors=2)
+    problems = compare_to_baseline(report, baseline, tolerance=0.25)
+    assert [p.split()[0] for p in problems] == ["p99_ms", "qps", "errors"]
+
+
+def test_baseline_from_another_machine_is_not_comparable():
+    report = {"config": {"workers": 8, "seed": 0}, "machine": machine_info()}
+    assert baseline_mismatch(report, copy.deepcopy(report)) is None
+    other = copy.deepcopy(report)
+    other["machine"]["cpus"] = (report["machine"]["cpus"] or 1) + 1
+    assert "machine" in baseline_mismatch(report, other)
+    assert "machine" in baseline_mismatch(report, {"config": report["config"]})  # recorded before machine info
+
+
+def test_load_run_on_synthetic_db(tmp_path):
+    db = build_synthetic_db(tmp_path / "road_safety.duckdb", rows=3000, seed=1)
+    report = run_load(db, workers=2, ops=15, seed=1)
+
+    assert report["config"]["collisions"] == 3000
+    assert report["results"]["errors"] == 0, report["error_samples"]
+    assert report["results"]["count"] == sum(q["count"] for q in report["queries"].values()) > 30
+    assert report["results"]["p50_ms"] <= report["results"]["p95_ms"] <= report["results"]["p99_ms"]
+
+
+def test_geo_coords_variants_on_synthetic_db(tmp_path):
+    from benchmarks.geo_coords import VARIANTS, run
+
+    db = build_synthetic_db(tmp_path / "road_safety.duckdb", rows=3000, seed=1)
+    rows = run(db, repeat=1)
+
+    assert [r["variant"] for r in rows] == list(VARIANTS)
+    assert {r["rows"] for r in rows} == {3000}
+    assert all(r["file_mb"] > 0 and r["bin_2048_ms"] > 0 and r["bbox_decimal_ms"] > 0 for r in rows)
+
+
+def test_synthetic_stats19_layout_and_consistency(tmp_path):
+    from benchmarks.synthetic_stats19 import PROJECT_ROOT, generate_stats19, raw_columns
+    from src.etl.cleaning import clean_dataset
+    from src.etl.schema import load_schema
+
+    try:
+        schema = load_schema(PROJECT_ROOT)
+    except (ImportError, FileNotFoundError) as e:
+        pytest.skip(f"stats19 schema unavailable: {e}")
+
+    paths = generate_stats19(tmp_path, 2500, seed=3, chunk_size=1000, schema=schema)
+    raw = {table: pd.read_csv(path, dtype={"collision_index": str}) for table, path in paths.items()}
+    collision, vehicle, casualty = raw["collision"], raw["vehicle"], raw["casualty"]
+
+    for table, df in raw.items():
+        assert list(df.columns) == raw_columns(schema, table)
+    assert len(collision) == 2500 and collision["collision_index"].is_unique
+    assert collision["latitude"].between(49.9, 60.85).all() and collision["longitude"].between(-7.6, 1.75).all()
+
+    # child rows match their collision's counts and worst severity
+    assert vehicle.groupby("collision_index").size().sum() == collision["number_of_vehicles"].sum()
+    per_collision = casualty.groupby("collision_index").agg(n=("casualty_reference", "size"),
+                                                           worst=("casualty_severity", "min"))
+    joined = collision.set_index("collision_index").join(per_collision)
+    assert (joined["n"] == joined["number_of_casualties"]).all()
+    assert (joined["worst"] == joined["collision_severity"]).all()
+
+    # every coded column decodes through the ETL's cleaning step
+    cleaned = clean_dataset(collision.copy(), "collision", schema)
+    assert set(cleaned["collision_severity"]) <= {"Fatal", "Serious", "Slight"}
+    assert cleaned["date"].notna().all() and cleaned["datetime"].notna().all()
+
+
+def test_etl_bench_scaling_and_history(tmp_path):
+    import numpy as np
+
+    from benchmarks.etl_bench import append_history, compare, load_history, measure, pick_reference, scaling
+
+    def stage(name, rows, seconds):
+        return {"stage": name, "table": "all", "collisions": rows, "rows": rows, "seconds": seconds,
+                "rows_per_s": rows / seconds, "peak_mb": 1.0, "skipped": False}
+
+    records = [stage("linear", 1000, 0.1), stage("linear", 10000, 1.0),
+               stage("quadratic", 1000, 0.1), stage("quadratic", 10000, 10.0)]
+    curve = scaling(records).set_index("stage")
+    assert curve.loc["linear", "k_last"] == pytest.approx(1.0)
+    assert curve.loc["quadratic", "k_last"] == pytest.approx(2.0)
+    assert curve["superlinear"].to_dict() == {"linear": False, "quadratic": True}
+
+    history = tmp_path / "history.jsonl"
+    append_history(history, {"commit": "aaa1111", "stages": records})
+    append_history(history, {"commit": "bbb2222", "stages": records})
+    runs = load_history(history)
+    assert pick_reference(runs, None, "bbb2222")["commit"] == "aaa1111"
+    assert pick_reference(runs, "bbb", "ccc3333")["commit"] == "bbb2222"
+    faster = [dict(r, rows_per_s=r["rows_per_s"] * 2) for r in records]
+    assert (compare({"stages": faster}, runs[0])["ratio"] == 2.0).all()
+
+    result, seconds, peak = measure(lambda n: np.ones(n), 1_000_000)
+    assert len(result) == 1_000_000 and seconds >= 0 and peak >= 8_000_000
@@ -0,0 +1,220 @@
+import datetime
+import math
+import time
+from decimal import Decimal
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.dashboard.data import cell_where, get_cell_rows, get_kpi_comparison, get_map_data, kpi_periods
+from src.dashboard.executor import QueryCancelled, QueryExecutor
+from src.dashboard.components.layers import SEVERITY_RGBA, prepare_points, severity_rgba
+from src.dashboard.tabs.heatmap import DEFAULT_FOCUS, DEFAULT_ZOOM, MAP_FOCUS, viewport_bbox
+from src.shared.query_builder import Where
+from src.shared.spatial import (
+    R_MILES, cell_center, cell_key, cell_key_range, cell_key_sql, cell_level, coord_params, neighbour_keys,
+    radius_bbox,
+)
+
+
+def test_severity_rgba_lookup():
+    colors = severity_rgba(pd.Series(["Fatal", "Slight", "Serious", None, "Other"]))
+    assert colors.shape == (5, 4)
+    assert colors[0].tolist() == [255, 0, 0, 160]
+    assert colors[1].tolist() == [0, 128, 255, 160]
+    assert colors[2].tolist() == [255, 165, 0, 160]
+    assert colors[3].tolist() == colors[4].tolist() == SEVERITY_RGBA[-1].tolist()
+
+
+def test_prepare_points_projects_tooltip_fields():
+    df = pd.DataFrame({
+        "latitude": [51.1234567, None],
+        "longitude": [-0.1234567, 0.0],
+        "date": pd.to_datetime(["2024-03-01", "2024-03-02"]),
+        "unused": [1, 2],
+    })
+    points, html = prepare_points(df, "<b>Date:</b> {date} {missing}")
+
+    assert list(points.columns) == ["x", "y", "t0"]
+    assert len(points) == 1
+    assert points.iloc[0].tolist() == [-0.12346, 51.12346, "2024-03-01"]
+    assert html == "<b>Date:</b> {t0} {missing}"
+
+
+def test_radius_bbox_contains_circle():
+    lat0, lon0, miles = 55.0, -3.0, 25.0
+    min_lat, min_lon, max_lat, max_lon = radius_bbox(lat0, lon0, miles)
+    # Walk the circle boundary (destination-point formula) and check it stays inside the box.
+    d = miles / R_MILES
+    for k in range(360):
+        b = math.radians(k)
+        p1 = math.radians(lat0)
+        p2 = math.asin(math.sin(p1) * math.cos(d) + math.cos(p1) * math.sin(d) * math.cos(b))
+        l2 = math.radians(lon0) + math.atan2(
+            math.sin(b) * math.sin(d) * math.cos(p1), math.cos(d) - math.sin(p1) * math.sin(p2)
+        )
+        assert min_lat <= math.degrees(p2) <= max_lat
+        assert min_lon <= math.degrees(l2) <= max_lon
+
+
+def test_coord_params_round_outwards_to_micro_degrees():
+    bounds = coord_params((51.1234564, -0.1000001, 51.5, -0.0000004))
+    assert bounds == (Decimal("51.123456"), Decimal("-0.100001"), Decimal("51.5"), Decimal("0"))
+
+    con = duckdb.connect()
+    con.execute("CREATE TABLE g AS SELECT 51.123456::DECIMAL(9,6) AS lat, 51.123457::DOUBLE AS lat_d")
+    min_lat, _, max_lat, _ = coord_params((51.1234565, 0, 51.1234569, 0))
+    assert con.execute("SELECT count(*) FROM g WHERE lat_d BETWEEN ? AND ?", [min_lat, max_lat]).fetchone()[0] == 1
+    min_lat, _, max_lat, _ = coord_params((51.123455, 0, 51.1234561, 0))
+    assert con.execute("SELECT count(*) FROM g WHERE lat BETWEEN ? AND ?", [min_lat, max_lat]).fetchone()[0] == 1
+
+
+def test_national_view_has_no_bbox():
+    # panning never refetches, so the default national view must not crop Shetland (~60.8 N)
+    assert viewport_bbox(MAP_FOCUS[DEFAULT_FOCUS], DEFAULT_ZOOM) is None
+    min_lat, min_lon, max_lat, max_lon = viewport_bbox(MAP_FOCUS["London"], 12)
+    assert min_lat < 51.5074 < max_lat and min_lon < -0.1278 < max_lon
+
+
+def test_cell_keys_nest_across_levels():
+    con = duckdb.connect()
+    points = [(51.507351, -0.127758), (-33.868820, 151.209290), (0.0, 0.0), (89.999999, -179.999999)]
+    for lat, lon in points:
+        key = cell_key(lat, lon)
+        assert con.execute(f"SELECT {cell_key_sql(repr(lat), repr(lon))}").fetchone()[0] == key
+        # every coarser cell is a prefix of the finest key
+        assert cell_key(lat, lon, 7) == key >> 10
+        lo, hi = cell_key_range(cell_key(lat, lon, 7), 7)
+        assert lo <= key <= hi
+        c_lat, c_lon = cell_center(cell_key(lat, lon, 7), 7)
+        assert abs(c_lat - lat) <= 2 ** -8 and abs(c_lon - lon) <= 2 ** -8
+
+    ring = neighbour_keys(cell_key(51.5, -0.1, 7), 7)
+    assert len(ring) == 9 and cell_key(51.5, -0.1, 7) in ring
+    assert len(neighbour_keys(cell_key(51.5, -0.1, 7), 7, ring=2)) == 25
+    with pytest.raises(ValueError):
+        cell_level(100)
+
+
+def test_cell_rows_keyset_pagination_covers_cell_once():
+    con = duckdb.connect()
+    con.execute("""
+        CREATE TABLE geo_events AS
+        SELECT 51.0 + (i % 7) * 0.001 AS latitude, -1.0 + (i % 5) * 0.001 AS longitude,
+               CASE WHEN i % 4 = 0 THEN NULL ELSE i % 3 END AS casualties, i AS vehicles
+        FROM range(60) t(i)
+    """)
+    con.execute("ALTER TABLE geo_events ADD COLUMN cell_key BIGINT")
+    con.execute(f"UPDATE geo_events SET cell_key = {cell_key_sql('latitude', 'longitude')}")
+    # one scale-128 cell covers every row above
+    cell = cell_key(51.0, -1.0, cell_level(128))
+    pages, key = [], None
+    while True:
+        page, key = get_cell_rows(con, "vehicles < 50", [], cell, 128, ["vehicles"], "casualties",
+                                  limit=4, after=key)
+        pages.append(page)
+        if key is None:
+            break
+    got = pd.concat(pages)["vehicles"].tolist()
+    expected = con.execute(
+        "SELECT vehicles FROM geo_events WHERE vehicles < 50 ORDER BY casualties NULLS LAST, rowid"
+    ).fetchdf()["vehicles"].tolist()
+    assert got == expected
+    assert len(pages) == 13
+
+    # the cell's lat / lon box and its 3x3 block keep every matching row
+    for ring in (0, 1):
+        sql, params = cell_where("vehicles < 50", [], cell, 128, ring)
+        assert con.execute(f"SELECT count(*) FROM geo_events WHERE {sql}", params).fetchone()[0] == 50
+
+
+def test_geo_queries_select_only_declared_columns():
+    con = duckdb.connect()
+    con.execute("""
+        CREATE TABLE geo_events AS
+        SELECT 51.0 + i * 0.0001 AS latitude, -1.0 AS longitude, DATE '2024-01-01' + CAST(i AS INTEGER) AS date,
+               '12:00' AS time, 2024 AS year, 1 AS month_num, 'Slight' AS collision_severity,
+               'Fine' AS weather_conditions, 'Daylight' AS light_conditions, 'Roundabout' AS road_type,
+               1 AS casualties, 2 AS vehicles
+        FROM range(20) t(i)
+    """)
+    points = get_map_data(con, Where().period(year=2024), budget=10, columns=["casualties", "latitude"])
+    assert list(points.columns) == ["latitude", "longitude", "collision_severity", "casualties", "n_matching"]
+    assert len(points) == 10
+
+    with pytest.raises(ValueError, match="number_of_casualties"):
+        get_map_data(con, Where(), columns=["number_of_casualties"])
+    with pytest.raises(ValueError, match="rowid"):
+        get_cell_rows(con, "1=1", [], 0, 128, ["rowid"])
+
+
+def test_kpi_periods():
+    d = datetime.date
+    assert kpi_periods(year=2024, month="All")["previous"] == (d(2023, 1, 1), d(2023, 12, 31))
+    p = kpi_periods(year=2024, month=3)
+    assert p["current"] == (d(2024, 3, 1), d(2024, 3, 31))
+    assert p["previous"] == (d(2024, 2, 1), d(2024, 2, 29))
+    assert p["year_3"] == (d(2021, 3, 1), d(2021, 3, 31))
+    p = kpi_periods(date_range=(d(2024, 2, 20), d(2024, 2, 29)))
+    assert p["previous"] == (d(2024, 2, 10), d(2024, 2, 19))
+    assert p["last_year"] == (d(2023, 2, 20), d(2023, 2, 28))
+
+
+def test_kpi_comparison_periods_and_rolling_mean():
+    con = duckdb.connect()
+    # one Fatal and two Slight collisions per day, 2019-2023; daily casualties = year - 2018
+    con.execute("""
+        CREATE TABLE collision AS
+        SELECT d::DATE AS date FROM range(DATE '2019-01-01', DATE '2024-01-01', INTERVAL 1 DAY) t(d)
+    """)
+    con.execute("""
+        CREATE TABLE kpi_daily AS
+        SELECT date, year(date) AS year, month(date) AS month_num, s AS collision_severity,
+               CASE s WHEN 'Fatal' THEN 1 ELSE 2 END::BIGINT AS collisions,
+               (year(date) - 2018)::BIGINT AS casualties, 1::BIGINT AS vehicles
+        FROM collision, (VALUES ('Fatal'), ('Slight')) v(s)
+    """)
+    kpi = get_kpi_comparison(con, ["Fatal"], year=2023, month=6)
+    assert list(kpi.index) == ["current", "previous", "last_year", "rolling_3y"]
+    assert kpi.loc["current", "total_collisions"] == 30
+    assert kpi.loc["previous", "total_collisions"] == 31
+    assert kpi.loc["last_year", "total_casualties"] == 30 * 4
+    assert kpi.loc["rolling_3y", "total_casualties"] == 30 * 3  # mean of 2020-2022
+    assert kpi["has_data"].all()
+
+    # Custom Range spanning everything loaded: nothing to compare against
+    kpi = get_kpi_comparison(con, ["Fatal", "Slight"], date_range=("2019-01-01", "2023-12-31"))
+    assert kpi.loc["current", "total_collisions"] == 3 * 1826
+    assert kpi["has_data"].tolist() == [True, False, False, False]
+
+
+def _slow_count(cur):
+    return cur.execute("SELECT COUNT(*) FROM range(100000000000) a").fetchall()
+
+
+def test_executor_supersedes_in_flight_query():
+    ex = QueryExecutor(duckdb.connect(), max_workers=2)
+    old = ex.submit("s1", "view", _slow_count)
+    time.sleep(0.2)  # let it start
+    t0 = time.perf_counter()
+    new = ex.submit("s1", "view", lambda cur: cur.execute("SELECT 42").fetchone()[0])
+
+    assert new.result(timeout=5) == 42
+    with pytest.raises(QueryCancelled):
+        old.result(timeout=5)
+    assert time.perf_counter() - t0 < 5
+    assert ex.stats() == {"in_flight": 0, "submitted": 2, "superseded": 1}
+
+
+def test_executor_slots_are_per_session():
+    ex = QueryExecutor(duckdb.connect(), max_workers=2)
+    a = ex.submit("s1", "view", lambda cur: cur.execute("SELECT 1").fetchone()[0])
+    b = ex.submit("s2", "view", lambda cur: cur.execute("SELECT 2").fetchone()[0])
+    assert (a.result(timeout=5), b.result(timeout=5)) == (1, 2)
+
+    slow = ex.submit("s1", "view", _slow_count)
+    time.sleep(0.2)
+    assert ex.cancel("s1") == 1
+    with pytest.raises(QueryCancelled):
+        slow.result(timeout=5)
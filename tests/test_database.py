@@ -0,0 +1,212 @@
+import datetime
+import json
+from decimal import Decimal
+import threading
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.shared.database import ConnectionPool, execute_query
+from src.shared.query_builder import Where
+from src.shared.query_cache import QueryCache, frame_nbytes, make_key
+from src.shared.statements import StatementRegistry, sql_literal, to_positional
+from src.shared.telemetry import QueryTelemetry, fingerprint
+
+
+@pytest.fixture()
+def mem_con():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t AS SELECT range AS i FROM range(100)")
+    yield con
+    con.close()
+
+
+def test_pool_hands_out_independent_cursors(mem_con):
+    pool = ConnectionPool(mem_con, max_size=2, acquire_timeout=1)
+    with pool.cursor() as a, pool.cursor() as b:
+        assert a is not b
+        assert execute_query(a, "SELECT count(*) AS n FROM t")["n"].iloc[0] == 100
+        assert execute_query(b, "SELECT count(*) AS n FROM t WHERE i < ?", [10])["n"].iloc[0] == 10
+        assert pool.stats()["in_use"] == 2
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["acquired"] == 2
+
+
+def test_pool_is_bounded(mem_con):
+    pool = ConnectionPool(mem_con, max_size=1, acquire_timeout=0.05)
+    with pool.cursor():
+        with pytest.raises(TimeoutError):
+            with pool.cursor():
+                pass
+    assert pool.stats()["acquire_timeouts"] == 1
+
+
+def test_pool_concurrent_sessions(mem_con):
+    pool = ConnectionPool(mem_con, max_size=4, acquire_timeout=5)
+    results = []
+
+    def session(k):
+        with pool.cursor() as cur:
+            results.append(execute_query(cur, "SELECT sum(i) AS s FROM t WHERE i < ?", [k])["s"].iloc[0])
+
+    threads = [threading.Thread(target=session, args=(k,)) for k in range(1, 21)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    assert sorted(results) == sorted(k * (k - 1) // 2 for k in range(1, 21))
+    assert pool.stats()["acquired"] == 20
+
+
+def test_pool_reuses_returned_cursors(mem_con):
+    pool = ConnectionPool(mem_con, max_size=2, acquire_timeout=1)
+    with pool.cursor() as a:
+        pass
+    with pool.cursor() as b:
+        assert b is a
+
+
+def test_execute_query_timeout(mem_con):
+    slow = "SELECT count(*) FROM range(1000000000) a, range(1000) b WHERE a.range * b.range % 7 = 3"
+    with pytest.raises(TimeoutError):
+        execute_query(mem_con.cursor(), slow, timeout=0.2)
+
+
+def test_query_cache_key_normalizes_sql():
+    a = make_key("SELECT *\n   FROM t  WHERE year = ?;", [2024])
+    b = make_key("SELECT * FROM t WHERE year = ?", (2024,))
+    assert a == b
+    assert a != make_key("SELECT * FROM t WHERE year = ?", [2023])
+
+
+def test_query_cache_lru_size_bound():
+    df = pd.DataFrame({"x": range(1000)})
+    size = frame_nbytes(df)
+    cache = QueryCache(max_bytes=2 * size)
+
+    cache.put("a", df)
+    cache.put("b", df)
+    assert cache.get("a") is not None  # "a" is now most recently used
+    cache.put("c", df)                 # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_query_cache_returns_copies():
+    cache = QueryCache(max_bytes=10**6)
+    cache.put("k", pd.DataFrame({"x": [1, 2]}))
+    got = cache.get("k")
+    got["y"] = 0
+    assert list(cache.get("k").columns) == ["x"]
+
+
+def test_query_cache_ttl_and_build_id():
+    cache = QueryCache(max_bytes=10**6, ttl=0)
+    cache.put("k", pd.DataFrame({"x": [1]}))
+    assert cache.get("k") is None  # already expired
+
+    cache = QueryCache(max_bytes=10**6)
+    cache.validate("build-1")
+    cache.put("k", pd.DataFrame({"x": [1]}))
+    cache.validate("build-1")
+    assert cache.get("k") is not None
+    cache.validate("build-2")
+    assert cache.get("k") is None
+
+
+def test_where_sql_depends_only_on_filter_shape():
+    a = Where().period(year=2023, month=5).isin("collision_severity", ["Fatal"])
+    b = Where().period(year=2024, month=11).isin("collision_severity", ["Fatal", "Serious", "Slight"])
+    assert a.sql == b.sql == "year = ? AND month(date) = ? AND list_contains(?, collision_severity)"
+    assert a.params == [2023, 5, ["Fatal"]]
+    assert a.key() != b.key()
+    assert a == Where().period(year=2023, month=5).isin("collision_severity", ["Fatal"])
+
+
+def test_where_alias_dates_and_empty_selection():
+    w = (
+        Where()
+        .period(date_range=(datetime.date(2024, 1, 1), datetime.date(2024, 3, 31)))
+        .isin("c.sex_of_casualty", ["Male"])
+        .isin("collision_severity", [])
+    )
+    sql, params = w.render("col")
+    assert sql == "col.date BETWEEN ? AND ? AND list_contains(?, c.sex_of_casualty) AND 1=0"
+    assert params == ["2024-01-01", "2024-03-31", ["Male"]]
+    assert Where().sql == "1=1"
+
+
+def test_where_rejects_bad_identifiers():
+    with pytest.raises(ValueError):
+        Where().eq("year; DROP TABLE collision", 1)
+
+
+def test_where_runs_on_duckdb(mem_con):
+    mem_con.execute(
+        "CREATE TABLE sev AS SELECT * FROM (VALUES (2024, 'Fatal'), (2024, 'Slight'), (2023, 'Fatal')) v(year, collision_severity)"
+    )
+    for sev, expected in [(["Fatal"], 1), (["Fatal", "Slight"], 2), ([], 0)]:
+        w = Where().eq("year", 2024).isin("collision_severity", sev)
+        assert mem_con.execute(f"SELECT COUNT(*) FROM sev WHERE {w.sql}", w.params).fetchone()[0] == expected
+
+
+def test_to_positional_and_literals():
+    assert to_positional("SELECT '?' AS q, x FROM t WHERE a = ? AND b IN ?") == \
+        "SELECT '?' AS q, x FROM t WHERE a = $1 AND b IN $2"
+    assert sql_literal("O'Brien") == "'O''Brien'"
+    assert sql_literal(["Fatal", None, 3]) == "['Fatal', NULL, 3]"
+    assert sql_literal(datetime.date(2024, 1, 31)) == "'2024-01-31'"
+    assert sql_literal(Decimal("-0.000001")) == "-0.000001"
+    with pytest.raises(TypeError):
+        sql_literal(object())
+
+
+def test_statement_registry_prepares_once_per_cursor(mem_con):
+    registry = StatementRegistry()
+    query = "SELECT count(*) AS n FROM t WHERE i < ? AND list_contains(?, i % 3)"
+    cur = mem_con.cursor()
+    for k in (10, 50, 100):
+        got = registry.execute(cur, "count", query, [k, [0, 1]])
+        assert got.equals(execute_query(cur, query, [k, [0, 1]]))
+    (row,) = registry.stats()
+    assert row["statement"] == "count"
+    assert row["calls"] == 3 and row["prepares"] == 1
+
+    registry.execute(mem_con.cursor(), "count", query, [5, [0]])
+    assert registry.stats()[0]["prepares"] == 2
+
+
+def test_telemetry_records_summarizes_and_logs(mem_con, tmp_path):
+    log = tmp_path / "logs" / "queries.jsonl"
+    telemetry = QueryTelemetry(buffer_size=3, log_path=log)
+    query = "SELECT i FROM t WHERE i < ?"
+    df = execute_query(mem_con, query, [5])
+    telemetry.record(query, [5], 2.0, df, "miss", "small")
+    telemetry.record(query + ";", [5], 0.1, df, "hit", "small")
+    telemetry.record("SELECT 1", None, 9.0, None, "error", error="boom")
+    telemetry.record(query, [7], 1.0, df, "miss", "small")  # pushes the oldest record out
+
+    recs = telemetry.records()
+    assert [r["cache"] for r in recs] == ["miss", "error", "hit"]
+    assert recs[0]["fingerprint"] == fingerprint(query) == recs[2]["fingerprint"]
+    assert recs[0]["params_hash"] != recs[2]["params_hash"]
+    assert recs[0]["rows"] == 5 and recs[0]["bytes"] > 0
+
+    slowest, small = telemetry.summary()
+    assert slowest["errors"] == 1
+    assert (small["statement"], small["calls"], small["hit_rate"]) == ("small", 2, 0.5)
+
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(lines) == 4
+    assert lines[-1] == {**recs[0], "ts": lines[-1]["ts"]}  # hash only, never the values
+
+    profile = telemetry.explain(mem_con, fingerprint(query))
+    assert "Query Profiling Information" in profile